@@ -0,0 +1,98 @@
+"""Compare the coercion of the types of lines, value by value or by column.
+
+The rows of a table of many lines are coerced to their types with
+`coerce_type` on each value, as the lines parser did, and with
+`coerce_rows`, coercing each column of the rows with `coerce_column`.
+Numbers use thousands and decimal separators, dates repeat as in a
+statement.
+
+Usage:
+    python benchmarks/bench_coercion.py [--rows 10000] [--repeat 5]
+"""
+
+import argparse
+import copy
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.parsers import lines
+
+
+TYPES = {"date": "date", "qty": "int", "price": "float", "amount": "float"}
+TEMPLATE = InvoiceTemplate(
+    [
+        ("template_name", "bench"),
+        ("keywords", ["bench"]),
+        ("options", {"decimal_separator": ",", "date_formats": ["%d.%m.%Y"]}),
+    ]
+)
+
+
+def table(rows: int) -> List[Dict[str, Any]]:
+    """Return the rows of a table, with their values as found."""
+    return [
+        {
+            "date": "%02d.%02d.2024" % (i % 28 + 1, i % 12 + 1),
+            "description": "Item %s" % i,
+            "qty": str(i % 7 + 1),
+            "price": "%s,%02d" % (i % 1000, i % 100),
+            "amount": "%s.%03d,%02d" % (i % 10 + 1, i % 1000, i % 100),
+        }
+        for i in range(rows)
+    ]
+
+
+def by_value(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Coerce the rows value by value."""
+    for row in rows:
+        for name, value in row.items():
+            if name in TYPES:
+                row[name] = TEMPLATE.coerce_type(value, TYPES[name])
+    return rows
+
+
+def by_column(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Coerce the rows column by column."""
+    return lines.coerce_rows(TEMPLATE, rows, TYPES)
+
+
+def measure(
+    function: Callable[[List[Dict[str, Any]]], Any],
+    rows: List[Dict[str, Any]],
+    repeat: int,
+) -> float:
+    """Return the best time of a coercion of copies of the rows."""
+    best = float("inf")
+    for _ in range(repeat):
+        copies = copy.deepcopy(rows)
+        start = time.perf_counter()
+        function(copies)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("  rows  by value (ms)  by column (ms)  speedup")
+    for count in args.rows:
+        rows = table(count)
+        assert by_column(copy.deepcopy(rows)) == by_value(copy.deepcopy(rows))
+        value_time = measure(by_value, rows, args.repeat)
+        column_time = measure(by_column, rows, args.repeat)
+        print(
+            "%6d  %13.1f  %14.1f  %6.2fx"
+            % (count, value_time * 1000, column_time * 1000, value_time / column_time)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compare the memory held by parsed lines, as rows or as columns.
+
+A statement with one block of many lines is parsed into the list of row
+dicts returned by `parse` and into `Columns` with `parse_columns`. The
+memory still allocated once the lines are parsed is traced with
+tracemalloc.
+
+Usage:
+    python benchmarks/bench_columns.py [--rows 10000 50000]
+"""
+
+import argparse
+import functools
+import time
+import tracemalloc
+from typing import Any
+from typing import Callable
+from typing import Tuple
+
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.parsers import lines
+
+
+SETTINGS = {
+    "parser": "lines",
+    "start": "Transactions",
+    "end": "Closing balance",
+    "line": (
+        r"(?P<date>\d{2}\.\d{2}\.\d{4}) (?P<description>.+?) (?P<qty>\d+) "
+        r"(?P<amount>-?\d+\.\d{2})"
+    ),
+    "types": {"qty": "int", "amount": "float"},
+}
+TEMPLATE = InvoiceTemplate(
+    [
+        ("template_name", "bench"),
+        ("keywords", ["Transactions"]),
+        ("fields", {"lines": SETTINGS}),
+    ]
+)
+
+
+def statement(rows: int) -> str:
+    """Return a bank statement with one line per transaction."""
+    return (
+        "Transactions\n"
+        + "".join(
+            "%02d.01.2024 Payment to supplier %s %s %s.%02d\n"
+            % (i % 28 + 1, i % 50, i % 7, i % 1000, i % 100)
+            for i in range(rows)
+        )
+        + "Closing balance\n"
+    )
+
+
+def measure(function: Callable[[], Any]) -> Tuple[float, int]:
+    """Return the time of a function and the memory held by its result."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return elapsed, held
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000])
+    args = parser.parse_args()
+
+    print("  rows  rows (ms)  rows (MiB)  columns (ms)  columns (MiB)")
+    for rows in args.rows:
+        content = statement(rows)
+        assert lines.parse_columns(
+            TEMPLATE, "lines", SETTINGS, content
+        ).to_rows() == lines.parse(TEMPLATE, "lines", SETTINGS, content)
+        rows_time, rows_held = measure(
+            functools.partial(lines.parse, TEMPLATE, "lines", SETTINGS, content)
+        )
+        columns_time, columns_held = measure(
+            functools.partial(lines.parse_columns, TEMPLATE, "lines", SETTINGS, content)
+        )
+        print(
+            "%6d  %9.1f  %10.2f  %12.1f  %13.2f"
+            % (
+                rows,
+                rows_time * 1e3,
+                rows_held / 2**20,
+                columns_time * 1e3,
+                columns_held / 2**20,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
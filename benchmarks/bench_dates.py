@@ -0,0 +1,80 @@
+"""Compare the template date coercers with `dateparser.parse`.
+
+The dates of each built-in template are parsed with its date options, as
+for each date field, line and table row of the documents.
+
+Usage:
+    python benchmarks/bench_dates.py [--repeat 20] [--rounds 3]
+"""
+
+import argparse
+import time
+from typing import Any
+from typing import Callable
+from typing import List
+from typing import Tuple
+
+import dateparser  # type: ignore[import-untyped]
+
+from invoice2data.extract import dates
+from invoice2data.extract.loader import read_templates
+
+
+VALUES = [
+    "%02d/03/2023",
+    "%02d.03.2023",
+    "2023-03-%02d",
+    "%d March 2023",
+    "%d mars 2023",
+    "%d. März 2023",
+]
+
+
+def measure(
+    function: Callable[[Any, str], Any], cases: List[Tuple[Any, str]], rounds: int
+) -> float:
+    """Return the best time of all rounds."""
+    best = float("inf")
+    for _ in range(rounds):
+        dates._cached_date.cache_clear()
+        start = time.perf_counter()
+        for arg, value in cases:
+            function(arg, value)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    templates = read_templates()
+    values = [value % (i % 28 + 1) for i in range(args.repeat) for value in VALUES]
+    legacy_cases = [(t.options, value) for t in templates for value in values]
+    coercer_cases = [(t.date_coercer, value) for t in templates for value in values]
+    for (options, value), (coercer, _) in zip(legacy_cases, coercer_cases):
+        assert coercer(value) == dateparser.parse(
+            value, date_formats=options["date_formats"], languages=options["languages"]
+        )
+
+    print("%s templates, %s dates per template" % (len(templates), len(values)))
+    legacy_time = measure(
+        lambda options, value: dateparser.parse(
+            value, date_formats=options["date_formats"], languages=options["languages"]
+        ),
+        legacy_cases,
+        args.rounds,
+    )
+    coercer_time = measure(
+        lambda coercer, value: coercer(value), coercer_cases, args.rounds
+    )
+    print("dateparser.parse: %.3fs" % legacy_time)
+    print("date coercer:     %.3fs" % coercer_time)
+    print("speedup:          %.2fx" % (legacy_time / coercer_time))
+
+
+if __name__ == "__main__":
+    main()
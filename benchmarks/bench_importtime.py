@@ -0,0 +1,55 @@
+"""Measure the import time of the command line interface.
+
+Python is started with `-X importtime` to import `invoice2data.__main__`,
+and the slowest modules imported with it are listed. The heavy
+dependencies are only imported when used, see tests/test_importtime.py.
+
+Usage:
+    python benchmarks/bench_importtime.py [--rounds 5] [--top 10]
+"""
+
+import argparse
+import subprocess
+import sys
+from typing import Dict
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Return the cumulative import time of each module, in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import %s" % module],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="invoice2data.__main__")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # The first round fills the bytecode cache, the best round is kept
+    rounds = [import_times(args.module) for _ in range(args.rounds + 1)][1:]
+    best = min(rounds, key=lambda times: times[args.module])
+    print("%s: %.1f ms" % (args.module, best[args.module] / 1e3))
+    # The module and its parent packages include all the others
+    imported = {n: t for n, t in best.items() if not args.module.startswith(n)}
+    slowest = sorted(imported.items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative in slowest[: args.top]:
+        print("  %-50s %.1f ms" % (name, cumulative / 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Measure the time to classify one line of a lines block.
+
+Each line is classified as in `iter_block`, with the `first_line`,
+`last_line`, `skip_line` and `line` patterns of a rule searched one after
+the other as `parse_block` did, and with the combined `LineMatcher`. The
+lines are a mix of rows, details, skipped and unmatched lines.
+
+Usage:
+    python benchmarks/bench_line_matcher.py [--lines 20000] [--rounds 5]
+"""
+
+import argparse
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from invoice2data.extract.parsers import lines
+from invoice2data.extract.patterns import compile_pattern
+
+
+RULES = {
+    "line only": {"line": r"^(?P<code>\d+)\s+(?P<name>.+?)\s+(?P<price>\d+\.\d\d)$"},
+    "first, line and last": {
+        "first_line": r"^(?P<code>\d+)\s+(?P<name>.+?)\s+(?P<price>\d+\.\d\d)$",
+        "line": r"^\s+(?P<desc>.+)$",
+        "last_line": r"^\s+(?P<desc>Serial: \w+)$",
+    },
+    "with skip lines": {
+        "first_line": r"^(?P<code>\d+)\s+(?P<name>.+?)\s+(?P<price>\d+\.\d\d)$",
+        "line": r"^\s+(?P<desc>.+)$",
+        "skip_line": ["Page \\d+", "Continued", "Carried forward", "Subtotal"],
+        "last_line": r"^\s+(?P<desc>Serial: \w+)$",
+    },
+    "pattern lists": {
+        "first_line": [
+            r"^(?P<code>\d+)\s+(?P<name>.+?)\s+(?P<price>\d+\.\d\d)$",
+            r"^(?P<code>[A-Z]{3}-\d+)\s+(?P<name>.+)$",
+            r"^--- (?P<section>\w+) ---$",
+        ],
+        "line": [r"^\s+(?P<desc>Note: .+)$", r"^\s+(?P<desc>.+)$"],
+        "skip_line": ["Page \\d+", "Continued"],
+        "last_line": r"^\s+(?P<desc>Serial: \w+)$",
+    },
+}
+
+Classifier = Callable[[str, bool], Optional[str]]
+
+SAMPLE = [
+    "1001    Industrial widget, blue    12.50",
+    "        Delivered in a box of twelve",
+    "        Serial: AB1234",
+    "Page 2 of 10",
+    "ABC-42  Service contract",
+    "        Note: renewed yearly",
+    "Some text which matches no pattern at all, like a footer",
+]
+
+
+def legacy_classifier(settings: Dict[str, Any]) -> Classifier:
+    """Former classification of `parse_block`."""
+
+    def classify(line: str, in_row: bool) -> Optional[str]:
+        if "first_line" in settings and lines.parse_line(settings["first_line"], line):
+            return lines.FIRST_LINE
+        if not in_row:
+            return None
+        if "last_line" in settings and lines.parse_line(settings["last_line"], line):
+            return lines.LAST_LINE
+        if "skip_line" in settings:
+            if isinstance(settings["skip_line"], list):
+                skip_line_results = [
+                    compile_pattern(x).search(line) for x in settings["skip_line"]
+                ]
+            else:
+                skip_line_results = [
+                    compile_pattern(settings["skip_line"]).search(line)
+                ]
+            if any(skip_line_results):
+                return lines.SKIP_LINE
+        if lines.parse_line(settings["line"], line):
+            return lines.LINE
+        return None
+
+    return classify
+
+
+def matcher_classifier(settings: Dict[str, Any]) -> Classifier:
+    """Classification of `iter_block`, with the matcher built once per block."""
+    matcher = lines.LineMatcher.for_settings(settings)
+
+    def classify(line: str, in_row: bool) -> Optional[str]:
+        return matcher.classify(line, in_row)[0]
+
+    return classify
+
+
+def measure(classify: Classifier, sample: List[str], rounds: int) -> float:
+    """Return the best time of all rounds."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for line in sample:
+            classify(line, True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    sample = [SAMPLE[i % len(SAMPLE)] for i in range(args.lines)]
+
+    print("rule                   legacy (ns/line)  matcher (ns/line)")
+    for name, rule in RULES.items():
+        settings = dict(rule)
+        if "first_line" not in settings:
+            settings["first_line"] = settings["line"]
+        legacy = legacy_classifier(settings)
+        matcher = matcher_classifier(settings)
+        for line in SAMPLE:
+            for in_row in (False, True):
+                assert legacy(line, in_row) == matcher(line, in_row)
+        legacy_time = measure(legacy, sample, args.rounds)
+        matcher_time = measure(matcher, sample, args.rounds)
+        print(
+            "%-21s  %16.0f  %17.0f"
+            % (name, legacy_time / args.lines * 1e9, matcher_time / args.lines * 1e9)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Show how the lines parser scales with the number of blocks.
+
+A statement with many blocks of lines is parsed with the block search from
+offsets and with the former search, which sliced the rest of the content
+after each block. The time per block stays flat when the search is linear.
+
+Usage:
+    python benchmarks/bench_lines.py [--blocks 500 1000 2000 4000] [--rounds 3]
+"""
+
+import argparse
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+
+from invoice2data.extract.parsers import lines
+from invoice2data.extract.patterns import compile_pattern
+
+
+TEMPLATE = {"template_name": "bench"}
+RULE = {
+    **lines.DEFAULT_OPTIONS,
+    "start": r"Items \d+",
+    "end": "Total",
+    "line": r"item (?P<name>\w+) (?P<qty>\d+)",
+}
+
+
+def statement(blocks: int) -> str:
+    """Return a statement with a block of two lines on each page."""
+    page = "Page %s\n" + "Some text of the page\n" * 60
+    return "".join(
+        page % i + "Items %s\nitem A %s\nitem B %s\nTotal\n" % (i, i, i * 2)
+        for i in range(blocks)
+    )
+
+
+def legacy_parse_by_rule(content: str) -> List[Dict[str, Any]]:
+    """Former block search of `parse_by_rule`."""
+    parsed = []
+    while True:
+        start = compile_pattern(RULE["start"]).search(content)
+        if not start:
+            break
+        content = content[start.end() :]
+        end = compile_pattern(RULE["end"]).search(content)
+        if not end:
+            break
+        parsed += lines.parse_block(TEMPLATE, "lines", RULE, content[0 : end.start()])
+        content = content[end.end() :]
+    return parsed
+
+
+def offsets_parse_by_rule(content: str) -> List[Dict[str, Any]]:
+    """Current block search of `parse_by_rule`."""
+    return lines.parse_by_rule(TEMPLATE, "lines", RULE, content)
+
+
+def measure(function: Callable[[str], Any], content: str, rounds: int) -> float:
+    """Return the best time of all rounds."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--blocks", type=int, nargs="+", default=[500, 1000, 2000, 4000]
+    )
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print("blocks  offsets (us/block)  sliced (us/block)")
+    for blocks in args.blocks:
+        content = statement(blocks)
+        assert offsets_parse_by_rule(content) == legacy_parse_by_rule(content)
+        offsets_time = measure(offsets_parse_by_rule, content, args.rounds)
+        legacy_time = measure(legacy_parse_by_rule, content, args.rounds)
+        print(
+            "%6d  %18.1f  %17.1f"
+            % (blocks, offsets_time / blocks * 1e6, legacy_time / blocks * 1e6)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare parsing a lines field with several rules, rule by rule or at once.
+
+Templates often define several rules for the different layouts of the
+lines of one table, with the same start and end patterns. The rules are
+parsed one after the other with `parse_by_rule`, each searching all its
+blocks, and with `parse`, which searches the blocks of all the rules first
+and shares the searches between rules.
+
+Usage:
+    python benchmarks/bench_lines_rules.py [--pages 100 400] [--rounds 3]
+"""
+
+import argparse
+import logging
+import time
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+
+from invoice2data.extract.parsers import lines
+
+
+TEMPLATE = {"template_name": "bench"}
+LINE = r"^(?P<code>\d+)\s+(?P<name>.+?)\s+(?P<price>\d+\.\d\d)$"
+RULES = [
+    {"start": r"Artikel\s+Aantal", "end": "Exclusief BTW", "line": LINE},
+    {
+        "start": r"Artikel\s+Aantal",
+        "end": "Exclusief BTW",
+        "line": r"^\s+(?P<desc>.+)$",
+    },
+    {
+        "start": r"Artikel\s+Aantal",
+        "end": "Exclusief BTW",
+        "line": r"^(?P<name>Korting.+?)\s+(?P<price>-\d+\.\d\d)$",
+    },
+    {"start": "BEDRAG", "end": r"TOTAAL\s", "line": LINE},
+    {"start": "BEDRAG", "end": r"TOTAAL\s", "line": r"(?P<name>Statiegeld)"},
+    {"start": r"Artikel\s+Aantal", "end": r"TOTAAL\s", "line": r"^\s+(?P<desc>.+)$"},
+]
+
+
+def document(pages: int) -> str:
+    """Return a document with a table of lines on each page."""
+    page = "Page %s\n" + "Some text of the page, with no lines at all\n" * 60
+    table = (
+        "Artikel   Aantal\n"
+        "1001   Industrial widget   12.50\n"
+        "       Delivered in a box\n"
+        "Korting widget   -1.50\n"
+        "Exclusief BTW\n"
+        "BEDRAG\n"
+        "1002   Statiegeld   0.25\n"
+        "TOTAAL \n"
+    )
+    return "".join(page % i + table for i in range(pages))
+
+
+def by_rule(content: str) -> List[Dict[str, Any]]:
+    """Rules parsed one after the other."""
+    parsed = []
+    for rule in RULES:
+        parsed += lines.parse_by_rule(TEMPLATE, "lines", rule, content)
+    return parsed
+
+
+def at_once(content: str) -> List[Dict[str, Any]]:
+    """Blocks of all the rules searched first."""
+    return lines.parse(TEMPLATE, "lines", {"rules": RULES}, content)
+
+
+def measure(function: Callable[[str], Any], content: str, rounds: int) -> float:
+    """Return the best time of all rounds."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function(content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 400])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger("invoice2data").setLevel(logging.ERROR)
+
+    print("pages  by rule (ms)  at once (ms)")
+    for pages in args.pages:
+        content = document(pages)
+        assert by_rule(content) == at_once(content)
+        by_rule_time = measure(by_rule, content, args.rounds)
+        at_once_time = measure(at_once, content, args.rounds)
+        print("%5d  %12.1f  %12.1f" % (pages, by_rule_time * 1e3, at_once_time * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Compare the memory used to parse a large block of lines.
+
+A statement with one block of many lines is parsed by the former
+`parse_block`, which split the whole block and built all the rows before
+coercing their types, and consumed row by row from `iter_lines`. The peak
+memory of the parsing is traced with tracemalloc.
+
+Usage:
+    python benchmarks/bench_lines_stream.py [--rows 10000 50000] [--rounds 3]
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.parsers import lines
+from invoice2data.extract.patterns import compile_pattern
+
+
+RULE = {
+    **lines.DEFAULT_OPTIONS,
+    "start": "Transactions",
+    "end": "Closing balance",
+    "line": r"(?P<date>\d{2}\.\d{2}\.\d{4}) (?P<description>.+?) (?P<amount>-?\d+\.\d{2})",
+    "types": {"amount": "float"},
+}
+TEMPLATE = InvoiceTemplate(
+    [
+        ("template_name", "bench"),
+        ("keywords", ["Transactions"]),
+        ("fields", {"lines": {"parser": "lines", **RULE}}),
+    ]
+)
+
+
+def statement(rows: int) -> str:
+    """Return a bank statement with one line per transaction."""
+    return (
+        "Transactions\n"
+        + "".join(
+            "%02d.01.2024 Payment to supplier number %s %s.%02d\n"
+            % (i % 28 + 1, i, i % 1000, i % 100)
+            for i in range(rows)
+        )
+        + "Closing balance\n"
+    )
+
+
+def legacy_parse_block(content: str) -> float:
+    """Former `parse_block`: split, build all rows, then coerce them."""
+    settings = dict(RULE, first_line=RULE["line"])
+    block = content[len("Transactions") : content.index("Closing balance")]
+    rows: List[Dict[str, Any]] = []
+    for line in compile_pattern(settings["line_separator"]).split(block):
+        if not line:
+            continue
+        match = lines.parse_line(settings["first_line"], line)
+        if match:
+            rows.append({k: v.strip() for k, v in match.groupdict().items()})
+    for row in rows:
+        row["amount"] = TEMPLATE.coerce_type(row["amount"], "float")
+    return sum(row["amount"] for row in rows)
+
+
+def streamed_parse(content: str) -> float:
+    """Rows consumed one by one from `iter_lines`."""
+    return sum(row["amount"] for row in TEMPLATE.iter_lines(content))
+
+
+def measure(
+    function: Callable[[str], float], content: str, rounds: int
+) -> Tuple[float, float, float]:
+    """Return the result, the best time and the peak memory of a function."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = function(content)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    function(content)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print("  rows  legacy (ms)  legacy (MiB)  streamed (ms)  streamed (MiB)")
+    for rows in args.rows:
+        content = statement(rows)
+        legacy, legacy_time, legacy_peak = measure(
+            legacy_parse_block, content, args.rounds
+        )
+        streamed, streamed_time, streamed_peak = measure(
+            streamed_parse, content, args.rounds
+        )
+        assert abs(legacy - streamed) < 1e-6
+        print(
+            "%6d  %11.1f  %12.2f  %13.1f  %14.2f"
+            % (
+                rows,
+                legacy_time * 1e3,
+                legacy_peak / 2**20,
+                streamed_time * 1e3,
+                streamed_peak / 2**20,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
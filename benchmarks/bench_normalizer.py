@@ -0,0 +1,106 @@
+"""Compare the compiled normalizer with the former `prepare_input`.
+
+Every built-in template normalizes every text of the test corpus. Each text
+is repeated to simulate long statements.
+
+Usage:
+    python benchmarks/bench_normalizer.py [--repeat 200] [--rounds 3] [files...]
+"""
+
+import argparse
+import glob
+import re
+import time
+import tracemalloc
+import unicodedata
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from invoice2data.extract.loader import read_templates
+
+
+def legacy_prepare_input(options: Dict[str, Any], extracted_str: str) -> str:
+    """Former implementation of `InvoiceTemplate.prepare_input`."""
+    if options["remove_whitespace"]:
+        optimized_str = re.sub(" +", "", extracted_str)
+    else:
+        optimized_str = extracted_str
+    if options["remove_accents"]:
+        optimized_str = re.sub(
+            "[\u0300-\u0362]", "", unicodedata.normalize("NFKD", optimized_str)
+        )
+    if options["lowercase"]:
+        optimized_str = optimized_str.lower()
+    if not isinstance(options.get("replace", []), list):
+        options["replace"] = [options["replace"]]
+    for replace in options.get("replace", []):
+        assert len(replace) == 2
+        optimized_str = re.sub(replace[0], replace[1], optimized_str)
+    return optimized_str
+
+
+def measure(
+    function: Callable[[Any, str], str], cases: List[Tuple[Any, str]], rounds: int
+) -> Tuple[float, int]:
+    """Return the best time of all rounds and the peak memory of one round."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for arg, text in cases:
+            function(arg, text)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    for arg, text in cases:
+        function(arg, text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("files", nargs="*", default=glob.glob("tests/**/*.txt"))
+    args = parser.parse_args()
+
+    texts = []
+    for path in args.files:
+        with open(path, encoding="utf-8") as text_file:
+            texts.append(text_file.read() * args.repeat)
+    templates = read_templates()
+    # Only keep templates which actually normalize the text
+    templates = [
+        t
+        for t in templates
+        if t.options["replace"]
+        or t.options["remove_whitespace"]
+        or t.options["remove_accents"]
+        or t.options["lowercase"]
+    ]
+
+    legacy_cases = [(dict(t.options), text) for t in templates for text in texts]
+    compiled_cases = [(t.normalizer, text) for t in templates for text in texts]
+    for (options, text), (normalizer, _) in zip(legacy_cases, compiled_cases):
+        assert legacy_prepare_input(options, text) == normalizer(text)
+
+    size = sum(len(text) for text in texts) / 1e6
+    print(
+        "%s templates, %s texts, %.1f M characters per template"
+        % (len(templates), len(texts), size)
+    )
+    legacy_time, legacy_peak = measure(legacy_prepare_input, legacy_cases, args.rounds)
+    compiled_time, compiled_peak = measure(
+        lambda normalizer, text: normalizer(text), compiled_cases, args.rounds
+    )
+    print("legacy:   %.3fs, peak %.1f MB" % (legacy_time, legacy_peak / 1e6))
+    print("compiled: %.3fs, peak %.1f MB" % (compiled_time, compiled_peak / 1e6))
+    print("speedup:  %.2fx" % (legacy_time / compiled_time))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare the in-process poppler backend with the pdftotext command.
+
+Extracts the text of the test PDFs with each available backend, for whole
+documents and for an area, and prints the documents per second.
+
+Usage:
+    python benchmarks/bench_pdftotext.py [--rounds 5] [files...]
+"""
+
+import argparse
+import glob
+import shutil
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from invoice2data.input import pdftotext
+
+
+AREA = {"f": 1, "l": 1, "r": 300, "x": 0, "y": 0, "W": 1000, "H": 600}
+
+
+def measure(files: List[str], area: Optional[Dict[str, Any]], rounds: int) -> float:
+    """Return the documents per second of the current backend."""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for path in files:
+            pdftotext.to_text(path, dict(area) if area else None)
+    return rounds * len(files) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("files", nargs="*", default=glob.glob("tests/compare/*.pdf"))
+    args = parser.parse_args()
+
+    backends = []
+    if pdftotext.poppler_available():
+        backends.append(("python-poppler", True))
+    if shutil.which("pdftotext"):
+        backends.append(("pdftotext command", False))
+    if not backends:
+        raise SystemExit("Neither python-poppler nor pdftotext is installed")
+
+    poppler_available = pdftotext.poppler_available
+    try:
+        for name, in_process in backends:
+            pdftotext.poppler_available = lambda in_process=in_process: in_process
+            for label, area in (("document", None), ("area", AREA)):
+                speed = measure(args.files, area, args.rounds)
+                print("%-18s %-8s %8.1f documents/s" % (name, label, speed))
+    finally:
+        pdftotext.poppler_available = poppler_available
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Compare the throughput of threads extracting documents with each regex engine.
+
+Documents of many lines are extracted by a thread pool, with the template
+patterns compiled by `re`, which holds the GIL while matching, and by the
+`regex` module, matching with `concurrent=True`. The throughput only grows
+with the threads when the patterns match with the GIL released, on a
+machine with several cores.
+
+Usage:
+    python benchmarks/bench_regex_engines.py [--threads 1 2 4] [--documents 32]
+"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Dict
+from typing import List
+
+from invoice2data.extract import patterns
+from invoice2data.extract.invoice_template import InvoiceTemplate
+
+
+def template() -> InvoiceTemplate:
+    """Return a template with regex fields and lines, compiled by the engine."""
+    return InvoiceTemplate(
+        [
+            ("issuer", "Bench"),
+            ("template_name", "bench"),
+            ("keywords", ["Bench"]),
+            (
+                "fields",
+                {
+                    "invoice_number": r"Invoice number:\s+(\w+)",
+                    "date": r"Date:\s+(\d{4}-\d{2}-\d{2})",
+                    "amount": r"Total\s+(?:\S+\s+)*?(\d+\.\d{2})\s*$",
+                    "references": {
+                        "parser": "regex",
+                        "regex": r"Ref\.\s+(\w+-\d+)",
+                        "group": "join",
+                    },
+                    "lines": {
+                        "parser": "lines",
+                        "start": "Description",
+                        "end": "Total",
+                        "line": (
+                            r"^(?P<description>\w+(?:\s\w+)*?)\s+"
+                            r"(?P<qty>\d+)\s+(?P<price>\d+\.\d{2})$"
+                        ),
+                        "types": {"qty": "int", "price": "float"},
+                    },
+                },
+            ),
+            ("options", {"remove_whitespace": False, "currency": "EUR"}),
+        ]
+    )
+
+
+def document(lines: int) -> str:
+    """Return the text of an invoice with many lines."""
+    return (
+        "Bench\nInvoice number: INV42\nDate: 2024-01-31\nDescription\n"
+        + "".join(
+            "Item %s of the order Ref. ORD-%s %s %s.%02d\n"
+            % (i, i, i % 9 + 1, i % 500, i % 100)
+            for i in range(lines)
+        )
+        + "Total EUR 1234.56\n"
+    )
+
+
+def run(engine: str, threads: int, texts: List[str]) -> float:
+    """Return the documents extracted per second by a thread pool."""
+    patterns.set_engine(engine)
+    bench = template()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda text: extract(bench, text), texts))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    return len(texts) / elapsed
+
+
+def extract(bench: InvoiceTemplate, text: str) -> Dict[str, Any]:
+    """Extract a document with the template."""
+    return bench.extract(bench.prepare_input(text), "bench.txt", None)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--documents", type=int, default=32)
+    parser.add_argument("--lines", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    texts = [document(args.lines) for _ in range(args.documents)]
+    patterns.set_engine("re")
+    expected = extract(template(), texts[0])
+    patterns.set_engine("regex")
+    assert extract(template(), texts[0]) == expected
+
+    print("%s CPUs" % os.cpu_count())
+    print("threads  re (docs/s)  regex (docs/s)")
+    for threads in args.threads:
+        print(
+            "%7d  %11.1f  %14.1f"
+            % (
+                threads,
+                run("re", threads, texts),
+                run("regex", threads, texts),
+            )
+        )
+    patterns.set_engine("re")
+
+
+if __name__ == "__main__":
+    main()
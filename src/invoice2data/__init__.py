@@ -1,3 +1,5 @@
 """Invoice2Data."""
 
 from .__main__ import extract_data  # noqa: F401
+from .__main__ import extract_data_async  # noqa: F401
+from .extractor import Extractor  # noqa: F401
@@ -10,42 +10,41 @@ from os.path import join
 from typing import Any
 from typing import ClassVar
 from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
 from typing import Tuple
 
 import click
 
+from invoice2data.extract import dates
+from invoice2data.extract import patterns
 from invoice2data.extract.invoice_template import InvoiceTemplate
-from invoice2data.extract.loader import read_templates
-
-from .input import gvision
-from .input import ocrmypdf
-from .input import pdfminer_wrapper
-from .input import pdfplumber
-from .input import pdftotext
-from .input import tesseract
-from .input import text
+from invoice2data.extract.loader import declared_languages
+from invoice2data.extract.loader import template_languages
+
+from .extractor import Extractor
+from .extractor import default_extractor
+from .extractor import extract_data_async  # noqa: F401
+from .extractor import extract_data_fallback_ocrmypdf  # noqa: F401
+from .extractor import extract_file
+from .extractor import input_mapping
+from .extractor import load_templates
+from .input.cache import DEFAULT_MAX_SIZE
+from .input.cache import TextCache
 from .output import to_csv
 from .output import to_json
+from .output import to_jsonl
 from .output import to_xml
+from .output.writer import StreamWriter
 
 
 logger = logging.getLogger()
 
-input_mapping = {
-    "pdftotext": pdftotext,
-    "tesseract": tesseract,
-    "pdfminer": pdfminer_wrapper,
-    "pdfplumber": pdfplumber,
-    "gvision": gvision,
-    "text": text,
-    "ocrmypdf": ocrmypdf,
-}
-
 output_mapping = {
     "csv": to_csv,
     "json": to_json,
+    "jsonl": to_jsonl,
     "xml": to_xml,
     "none": None,
 }
@@ -112,13 +111,15 @@ def extract_data(
     invoicefile: str,
     templates: Optional[List[InvoiceTemplate]] = None,
     input_module: Any = None,
+    text_cache: Optional[TextCache] = None,
 ) -> Dict[str, Any]:
     """Extracts structured data from PDF/image invoices.
 
     This function uses the text extracted from a PDF file or image and
     pre-defined regex templates to find structured data.
 
-    Reads template if no template assigned.
+    Uses the built-in templates, loaded once by the default `Extractor`,
+    if no template assigned.
     Required fields are matches from templates.
 
     Args:
@@ -128,6 +129,8 @@ def extract_data(
         input_module (Any, optional): Library to be used to extract text
                                         from the given `invoicefile`.
                                         Choices: {'pdftotext', 'pdfminer', 'tesseract', 'text'}.
+        text_cache (Optional[TextCache]): Persistent cache of the extracted texts.
+                                        Defaults to None (always extract the text).
 
     Returns:
         Dict[str, Any]: Extracted and matched fields, or False if no template matches.
@@ -137,6 +140,7 @@ def extract_data(
 
     See Also:
         read_template: Function to load templates.
+        Extractor: Session extracting many documents with the same settings.
         InvoiceTemplate: Class representing a single invoice template.
 
     Examples:
@@ -147,68 +151,10 @@ def extract_data(
         {'issuer': 'OYO', 'amount': 1939.0, 'date': datetime.datetime(2017, 12, 31, 0, 0), 'invoice_number': 'IBZY2087', 'currency': 'INR', 'hotel_details': ' OYO 4189 Resort Nanganallur', 'date_check_in': datetime.datetime(2017, 12, 31, 0, 0), 'date_check_out': datetime.datetime(2018, 1, 1, 0, 0), 'amount_rooms': 1.0, 'booking_id': 'IBZY2087', 'payment_method': 'Cash at Hotel', 'gstin': '06AABCO6063D1ZQ', 'cin': 'U63090DL2012PTC231770', 'desc': 'Invoice from OYO'}
 
     """
-    if isinstance(input_module, str):
-        input_module = input_mapping[input_module]
-    elif input_module is None:
-        input_module = text if invoicefile.lower().endswith(".txt") else pdftotext
-
-    extracted_str = input_module.to_text(invoicefile)
-    if not isinstance(extracted_str, str) or not extracted_str.strip():
-        logger.error(
-            "Failed to extract text from %s using %s",
-            invoicefile,
-            input_module.__name__,
-        )
-        return {}
-
-    logger.debug(
-        "START pdftotext result ===========================\n%s", extracted_str
-    )
-    logger.debug("END pdftotext result =============================")
-
-    templates = templates or read_templates()
-
-    for template in templates:
-        if template.matches_input(extracted_str):
-            logger.info("Using %s template", template["template_name"])
-            optimized_str = template.prepare_input(extracted_str)
-            return template.extract(
-                optimized_str, invoicefile, input_module
-            )  # Return directly if match found
-
-    # If no template matches, try OCR fallback
-    if ocrmypdf.ocrmypdf_available() and input_module is not ocrmypdf:
-        logger.debug("Text extraction failed, falling back to ocrmypdf")
-        extracted_str, invoicefile, templates_matched = extract_data_fallback_ocrmypdf(
-            invoicefile, templates, input_module
-        )
-        if templates_matched:
-            template = templates_matched[0]
-            return template.extract(extracted_str, invoicefile, input_module)
-
-    logger.error("No template for %s", invoicefile)
-    return {}
-
-
-def extract_data_fallback_ocrmypdf(
-    invoicefile: str,
-    templates: List[InvoiceTemplate],
-    input_module: Any,
-) -> Tuple[str, str, List[InvoiceTemplate]]:
-    logger.debug("Trying OCR extraction with ocrmypdf")
-    extracted_str = ocrmypdf.to_text(invoicefile)
-
-    # Convert the filter object to a list
-    templates_matched: List[InvoiceTemplate] = list(
-        filter(lambda t: t.matches_input(extracted_str), templates)
-    )
-    templates_matched.sort(key=lambda k: k["priority"], reverse=True)
-
-    if templates_matched:
-        return extracted_str, invoicefile, templates_matched
-    else:
-        # Return empty list if no template is matched
-        return extracted_str, invoicefile, []
+    # The built-in templates are loaded once, by the default extractor
+    if not templates:
+        templates = default_extractor().templates
+    return extract_file(invoicefile, templates, input_module, text_cache)
 
 
 @click.command()
@@ -261,6 +207,65 @@ def extract_data_fallback_ocrmypdf(
     is_flag=True,
     help="Ignore built-in templates.",
 )
+@click.option(
+    "--template-cache/--no-template-cache",
+    default=False,
+    help="Store prepared templates in a cache file of the user cache directory "
+    "($XDG_CACHE_HOME/invoice2data). Default: disabled",
+)
+@click.option(
+    "--rebuild-template-cache",
+    is_flag=True,
+    help="Parse all templates again and rewrite the template cache files.",
+)
+@click.option(
+    "--lazy-templates",
+    is_flag=True,
+    help="Only read template keywords at startup, load a template when a file matches it.",
+)
+@click.option(
+    "--date-languages",
+    help="Comma-separated languages dates are parsed in, for all templates, or "
+    "'auto' for the languages declared by the templates. Templates without "
+    "languages then skip the detection among all languages. "
+    "Default: the languages of each template",
+)
+@click.option(
+    "--text-cache-dir",
+    type=click.Path(file_okay=False),
+    help="Folder of a persistent cache of the extracted texts, "
+    "to skip the text extraction of files processed before. Default: no cache",
+)
+@click.option(
+    "--text-cache-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_MAX_SIZE // (1024 * 1024),
+    show_default=True,
+    help="Maximum size of the text cache in MB, least recently used texts are removed first.",
+)
+@click.option(
+    "--regex-engine",
+    type=click.Choice(list(patterns.ENGINES)),
+    default="re",
+    show_default=True,
+    help="Module matching the template regexes. 'regex' releases the GIL while "
+    "matching, so threads extract files in parallel.",
+)
+@click.option(
+    "--regex-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    help="Maximum duration of a regex match in seconds, fields whose regex takes "
+    "longer are not matched. Templates and fields override it with their "
+    "regex_timeout option. Default: no limit",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default="number of CPUs",
+    help="Number of processes extracting files in parallel.",
+)
 @click.argument(
     "input_files",
     type=click.File("wb"),
@@ -278,6 +283,15 @@ def main(
     filename_format: str,
     template_folder: Optional[str],
     exclude_built_in_templates: bool,
+    template_cache: bool,
+    rebuild_template_cache: bool,
+    lazy_templates: bool,
+    date_languages: Optional[str],
+    text_cache_dir: Optional[str],
+    text_cache_size: int,
+    regex_engine: str,
+    regex_timeout: Optional[float],
+    jobs: int,
     input_files: Tuple[Any, ...],
 ) -> None:
     """Extract data from PDF files and output it in a structured format."""
@@ -289,41 +303,204 @@ def main(
     input_module = input_reader
     output_module = output_mapping[output_format]
 
-    templates = _load_templates(template_folder, exclude_built_in_templates)
-
-    output = []
+    # Templates compile their patterns with the engine when they are loaded
+    patterns.set_engine(regex_engine)
+    patterns.set_timeout(regex_timeout)
+    templates = load_templates(
+        [template_folder] if template_folder else [],
+        exclude_built_in_templates,
+        template_cache,
+        rebuild_template_cache,
+        lazy_templates,
+    )
+    languages_cap = _date_languages(date_languages, templates)
+    try:
+        dates.restrict_languages(languages_cap)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--date-languages") from e
+    # Lazy templates leave the date locales to be loaded by their first dates
+    languages_sets = None if lazy_templates else template_languages(templates)
+
+    text_cache_max_size = text_cache_size * 1024 * 1024 if text_cache_dir else None
+    paths = [f.name for f in input_files]
     for f in input_files:
+        f.close()
+
+    cache_hits = cache_misses = 0
+    results = _extract_files(
+        paths,
+        templates,
+        input_module,
+        jobs,
+        text_cache_dir,
+        text_cache_max_size,
+        languages_cap,
+        list(languages_sets.values()) if languages_sets else [],
+        regex_engine,
+        regex_timeout,
+    )
+    # Each result is written as soon as it is extracted, not kept in memory
+    writer = (
+        output_module.open_writer(output_name, output_date_format)
+        if output_module is not None
+        else None
+    )
+    try:
+        # Results come in the order of the input files, copy/move runs here only
+        for path, (res, error, hits, misses) in zip(paths, results):
+            cache_hits += hits
+            cache_misses += misses
+            if error is not None:
+                logger.critical(
+                    "Invoice2data failed to process %s. \nError message: %s",
+                    path,
+                    error,
+                )
+            elif res:
+                _handle_result(path, res, writer, copy, move, filename_format)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if text_cache_dir:
+        logger.info("Text cache: %s hits, %s misses", cache_hits, cache_misses)
+
+
+def _handle_result(
+    path: str,
+    res: Dict[str, Any],
+    writer: Optional[StreamWriter],
+    copy: Optional[str],
+    move: Optional[str],
+    filename_format: str,
+) -> None:
+    """Log, copy/move and write the extracted data of a file."""
+    try:
+        logger.info(res)
+        if copy or move:
+            _process_and_move_copy(
+                path, res, copy, move, filename_format
+            )  # Extract file processing and copy/move
+    except Exception as e:
+        logger.critical(
+            "Invoice2data failed to process %s. \nError message: %s", path, e
+        )
+    # Written after copy/move, the writer formats the dates in place
+    if writer is not None:
+        writer.write(res)
+
+
+# Extractor of the current extraction process, with its templates and text cache
+_worker: Dict[str, Any] = {}
+
+# Extracted data, error message and text cache hits and misses of a file
+ExtractResult = Tuple[Dict[str, Any], Optional[str], int, int]
+
+
+def _extract_files(
+    paths: List[str],
+    templates: List[Any],
+    input_module: Any,
+    jobs: int,
+    text_cache_dir: Optional[str],
+    text_cache_max_size: Optional[int],
+    languages_cap: Optional[List[str]] = None,
+    preload_languages: Optional[List[Tuple[str, ...]]] = None,
+    regex_engine: str = "re",
+    regex_timeout: Optional[float] = None,
+) -> Iterator[ExtractResult]:
+    """Extract files in a process pool, yielding results in the order of the files.
+
+    The templates are sent once to each process, which loads the dateparser
+    locales of their languages. The message of an exception
+    raised for a file is returned with its result, so it doesn't stop the
+    other files.
+    """
+    initargs = (
+        templates,
+        input_module,
+        text_cache_dir,
+        text_cache_max_size,
+        logger.level,
+        languages_cap,
+        preload_languages or [],
+        regex_engine,
+        regex_timeout,
+    )
+    if jobs == 1 or len(paths) <= 1:
+        _init_worker(*initargs)
         try:
-            res = extract_data(f.name, templates=templates, input_module=input_module)
-            if res:
-                logger.info(res)
-                output.append(res)
-
-                if copy or move:
-                    _process_and_move_copy(
-                        f.name, res, copy, move, filename_format
-                    )  # Extract file processing and copy/move
-        except Exception as e:
-            logger.critical(
-                "Invoice2data failed to process %s. \nError message: %s", f.name, e
-            )
+            yield from map(_extract_file, paths)
         finally:
-            f.close()
-
-    if output_module is not None:
-        output_module.write_to_file(output, output_name, output_date_format)
-
-
-def _load_templates(
-    template_folder: Optional[str], exclude_built_in_templates: bool
-) -> List[Any]:
-    """Load templates from the specified folder."""
-    templates = []
-    if template_folder:
-        templates.extend(read_templates(os.path.abspath(template_folder)))
-    if not exclude_built_in_templates:
-        templates.extend(read_templates())
-    return templates
+            _close_worker()
+        return
+
+    # Imported here, multiprocessing is only needed to process several files
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(paths)),
+        initializer=_init_worker,
+        initargs=initargs,
+    ) as executor:
+        yield from executor.map(_extract_file, paths)
+
+
+def _init_worker(
+    templates: List[Any],
+    input_module: Any,
+    text_cache_dir: Optional[str],
+    text_cache_max_size: Optional[int],
+    log_level: int,
+    languages_cap: Optional[List[str]],
+    preload_languages: List[Tuple[str, ...]],
+    regex_engine: str = "re",
+    regex_timeout: Optional[float] = None,
+) -> None:
+    logger.setLevel(log_level)
+    patterns.set_engine(regex_engine)
+    patterns.set_timeout(regex_timeout)
+    dates.restrict_languages(languages_cap)
+    dates.preload(preload_languages)
+    _worker["extractor"] = Extractor(
+        templates=templates,
+        input_reader=input_module,
+        text_cache_dir=text_cache_dir,
+        text_cache_size=text_cache_max_size or DEFAULT_MAX_SIZE,
+        jobs=1,
+    )
+
+
+def _close_worker() -> None:
+    if _worker.get("extractor") is not None:
+        _worker["extractor"].close()
+    _worker.clear()
+
+
+def _extract_file(path: str) -> ExtractResult:
+    extractor = _worker["extractor"]
+    text_cache = extractor.text_cache
+    hits, misses = (text_cache.hits, text_cache.misses) if text_cache else (0, 0)
+    res: Dict[str, Any] = {}
+    error = None
+    try:
+        res = extractor.extract(path)
+    except Exception as e:  # noqa: BLE001
+        error = str(e)
+    if text_cache:
+        hits, misses = text_cache.hits - hits, text_cache.misses - misses
+    return res, error, hits, misses
+
+
+def _date_languages(
+    date_languages: Optional[str], templates: List[Any]
+) -> Optional[List[str]]:
+    """Return the languages all dates are parsed in, None for no cap."""
+    if not date_languages:
+        return None
+    if date_languages == "auto":
+        return declared_languages(templates) or None
+    return [lang.strip() for lang in date_languages.split(",") if lang.strip()]
 
 
 def _process_and_move_copy(
@@ -0,0 +1,139 @@
+"""Columnar representation of the rows extracted from tables and lines.
+
+The lines parser returns a list of rows, each a dict repeating the field
+names, and the tables plugin gathers the values of each field as they are
+read. `Columns` stores the rows as one column per field instead: a typed
+`array` for the fields holding only floats or only ints, a list for the
+other fields. The field names of each row are kept as a tuple shared by
+the rows with the same fields, so the rows can be converted back to the
+current shapes:
+
+- `to_rows` gives the list of row dicts returned by the lines parser,
+- `to_fields` gives the values by field set by the tables plugin, a single
+  value for a field found in one row, else a list.
+"""
+
+from array import array
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import MutableSequence
+from typing import Sequence
+from typing import Tuple
+
+
+# Typecodes of the array columns by type of their values
+ARRAY_TYPECODES = {float: "d", int: "q"}
+
+
+class Columns(Mapping[str, Sequence[Any]]):
+    """Rows stored as one column of values per field.
+
+    Rows without a field hold a placeholder in its column: None, or 0 in
+    an array. The fields of each row are listed in `row_keys`. A column
+    becomes a list when a value of another type is added to an array.
+
+    Args:
+        rows (Iterable[Dict[str, Any]]): The rows to store, if any.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]] = ()) -> None:
+        self.columns: Dict[str, MutableSequence[Any]] = {}
+        # Field names of each row, shared by the rows with the same fields
+        self.row_keys: List[Tuple[str, ...]] = []
+        self._keys: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        for row in rows:
+            self.append(row)
+
+    @property
+    def row_count(self) -> int:
+        """Return the number of rows."""
+        return len(self.row_keys)
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """Add a row at the end of the columns.
+
+        Args:
+            row (Dict[str, Any]): The values of the row, by field name.
+        """
+        keys = tuple(row)
+        index = len(self.row_keys)
+        self.row_keys.append(self._keys.setdefault(keys, keys))
+        for name, value in row.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = _new_column(value)
+            if len(column) < index:
+                _pad(column, index)
+            if isinstance(column, array) and type(value) is not _array_type(column):
+                column = self.columns[name] = list(column)
+            try:
+                column.append(value)
+            except OverflowError:
+                # An int too large for the array, the column becomes a list
+                column = self.columns[name] = list(column)
+                column.append(value)
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Return the rows as dicts, as returned by the lines parser.
+
+        Returns:
+            List[Dict[str, Any]]: The values of each row, by field name.
+        """
+        columns = self.columns
+        return [
+            {name: columns[name][i] for name in keys}
+            for i, keys in enumerate(self.row_keys)
+        ]
+
+    def to_fields(self) -> Dict[str, Any]:
+        """Return the values by field, as set by the tables plugin.
+
+        Returns:
+            Dict[str, Any]: The value of the fields found in one row, and
+                the list of the values of the fields found in several rows.
+        """
+        fields = {}
+        for name, column in self.columns.items():
+            values = [column[i] for i, keys in enumerate(self.row_keys) if name in keys]
+            fields[name] = values[0] if len(values) == 1 else values
+        return fields
+
+    def __getitem__(self, name: str) -> Sequence[Any]:
+        """Return the column of a field, with a value for each row."""
+        column = self.columns[name]
+        if len(column) < self.row_count:
+            _pad(column, self.row_count)
+        return column
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the field names."""
+        return iter(self.columns)
+
+    def __len__(self) -> int:
+        """Return the number of fields."""
+        return len(self.columns)
+
+    def __repr__(self) -> str:
+        """Return the columns, as a dict."""
+        return "%s(%r)" % (self.__class__.__name__, dict(self.items()))
+
+
+def _new_column(value: Any) -> MutableSequence[Any]:
+    """Return an empty column for values of the type of a value."""
+    typecode = ARRAY_TYPECODES.get(type(value))
+    return array(typecode) if typecode else []
+
+
+def _array_type(column: "array[Any]") -> type:
+    """Return the type of the values of an array column."""
+    return float if column.typecode == "d" else int
+
+
+def _pad(column: MutableSequence[Any], length: int) -> None:
+    """Add placeholders at the end of a column, up to a length."""
+    placeholder = 0 if isinstance(column, array) else None
+    column.extend([placeholder] * (length - len(column)))
@@ -0,0 +1,259 @@
+"""Date coercion of the fields with the `date` type.
+
+`dateparser.parse` creates a new parser, with its settings and locales, on
+every call with `languages`, and is called for each date of each line and
+table row. The `date_formats` and `languages` template options are compiled
+once into a `DateCoercer`, shared by all templates using the same options:
+
+- numeric formats giving a full date are tried with `datetime.strptime`,
+- other values are parsed by a `DateDataParser` created once per languages,
+- results are kept in a bounded LRU cache keyed by value, formats and languages.
+
+Values like "yesterday" or "March 5" are parsed relative to the current
+date, their results aren't reused: each value is parsed once more relative
+to another date, and only dates which don't depend on it are cached.
+
+Without languages, dateparser tries all of its locales, loading each one
+the first time it's needed. `restrict_languages` caps the languages of all
+templates, for example to the ones declared by the loaded templates, and
+`preload` loads the locales of the templates once at startup.
+
+The results are the ones of `dateparser.parse`, which also tries the date
+formats with strptime before parsing the value in the template languages.
+dateparser takes a while to import, so it's only imported when a date
+doesn't match the formats.
+"""
+
+import functools
+import re
+from datetime import datetime
+from typing import Any
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+
+DATE_CACHE_SIZE = 4096
+
+# Format directives parsed the same way by strptime and dateparser, whatever
+# the locale: with a day, a month and a 4-digit year, dateparser returns the
+# strptime result as is
+STRPTIME_DIRECTIVES = frozenset("dmYHMS%")
+FULL_DATE_DIRECTIVES = frozenset("dmY")
+
+DIRECTIVE_REGEX = re.compile(r"%(.)")
+
+# Dates parsed relative to the current date and to one of these differ, at
+# least one of them differs from any date in all of its fields
+RELATIVE_BASES = tuple(datetime(1900 + i, i + 1, i + 1, i) for i in range(4))
+
+_coercers: Dict[Hashable, "DateCoercer"] = {}
+
+# Languages all dates are parsed in, set by `restrict_languages`
+_languages_cap: Tuple[str, ...] = ()
+
+
+class DateCoercer:
+    """Compiled date parsing of a template.
+
+    Args:
+        date_formats (Any): Formats tried before parsing the value, as in
+            the `date_formats` argument of `dateparser.parse`.
+        languages (Any): Languages of the dates, as in the `languages`
+            argument of `dateparser.parse`.
+    """
+
+    def __init__(self, date_formats: Any = None, languages: Any = None) -> None:
+        self.date_formats = _freeze(date_formats or [])
+        self.languages = _freeze(languages or [])
+
+    @classmethod
+    def for_options(cls, options: Dict[str, Any]) -> "DateCoercer":
+        """Return the date coercer of template options, shared between templates.
+
+        Args:
+            options (Dict[str, Any]): The template options.
+
+        Returns:
+            DateCoercer: The date coercer for the options.
+        """
+        key = (
+            _freeze(options.get("date_formats") or []),
+            _freeze(options.get("languages") or []),
+        )
+        coercer = _coercers.get(key)
+        if coercer is None:
+            coercer = _coercers[key] = cls(*key)
+        return coercer
+
+    def __call__(self, value: str) -> Optional[datetime]:
+        """Parse a date.
+
+        Args:
+            value (str): The date, as found in the document.
+
+        Returns:
+            Optional[datetime]: The date, or None if it can't be parsed.
+        """
+        return parse_date(value, self.date_formats, effective_languages(self.languages))
+
+
+def restrict_languages(languages: Optional[Iterable[str]]) -> None:
+    """Cap the languages dates are parsed in, for all templates.
+
+    Templates without languages use the capped languages instead of all
+    the dateparser locales. Languages of other templates out of the cap
+    are ignored, and templates left without languages use the cap.
+
+    Args:
+        languages (Optional[Iterable[str]]): The language codes, or None to
+            remove the cap.
+
+    Raises:
+        ValueError: If a language is unknown to dateparser.
+    """
+    global _languages_cap
+    cap = tuple(dict.fromkeys(languages or []))
+    if cap:
+        from dateparser.languages.loader import default_loader  # type: ignore[import-untyped]
+
+        try:
+            default_loader.get_locale_map(languages=list(cap))
+        except ValueError as error:
+            raise ValueError("Error in date languages: %s" % error) from error
+    _languages_cap = cap
+    _cached_date.cache_clear()
+
+
+def effective_languages(languages: Any) -> Any:
+    """Return the languages dates are parsed in, with the cap applied.
+
+    Args:
+        languages (Any): The languages of a template.
+
+    Returns:
+        Any: The languages, capped by `restrict_languages`.
+    """
+    if not _languages_cap or not isinstance(languages, tuple):
+        return languages
+    kept = tuple(language for language in languages if language in _languages_cap)
+    return kept or _languages_cap
+
+
+def preload(languages_sets: Iterable[Iterable[str]]) -> None:
+    """Load the dateparser locales of templates ahead of the first date.
+
+    Sets of languages left empty after the cap are skipped, as loading
+    all the dateparser locales takes seconds.
+
+    Args:
+        languages_sets (Iterable[Iterable[str]]): Languages of each template.
+    """
+    preloaded = {effective_languages(tuple(langs)) for langs in languages_sets}
+    preloaded.discard(())
+    if not preloaded:
+        return
+    from dateparser.conf import settings  # type: ignore[import-untyped]
+    from dateparser.languages.loader import default_loader
+
+    for languages in preloaded:
+        _parser(languages)
+        for locale in default_loader.get_locales(languages=list(languages)):
+            # Builds the translation data dateparser loads on first use
+            locale.is_applicable("", settings=settings)
+
+
+def parse_date(value: str, date_formats: Any, languages: Any) -> Optional[datetime]:
+    """Parse a date like `dateparser.parse`, trying strptime first.
+
+    Args:
+        value (str): The date, as found in the document.
+        date_formats (Any): Tuple of formats tried in order.
+        languages (Any): Tuple of languages of the date.
+
+    Returns:
+        Optional[datetime]: The date, or None if it can't be parsed.
+    """
+    date, absolute = _cached_date(value, date_formats, languages)
+    if absolute:
+        return date
+    # Relative to the current date, parsed again on every call
+    return _parse(value, date_formats, languages)
+
+
+@functools.lru_cache(maxsize=DATE_CACHE_SIZE)
+def _cached_date(
+    value: str, date_formats: Any, languages: Any
+) -> Tuple[Optional[datetime], bool]:
+    """Return a date and whether it doesn't depend on the current date."""
+    for date_format in _strptime_formats(date_formats):
+        try:
+            return datetime.strptime(value, date_format), True
+        except ValueError:
+            continue
+    now = datetime.now()
+    date = _parse(value, date_formats, languages)
+    # Dates parsed relative to a base differing from now in all its fields
+    base = next(
+        base
+        for base in RELATIVE_BASES
+        if base.month != now.month and base.day != now.day and base.hour != now.hour
+    )
+    return date, _parse(value, date_formats, languages, base) == date
+
+
+def _parse(
+    value: str,
+    date_formats: Any,
+    languages: Any,
+    relative_base: Optional[datetime] = None,
+) -> Optional[datetime]:
+    """Parse a date with dateparser, relative to a date or to now."""
+    res = _parser(languages, relative_base).get_date_data(value, _thaw(date_formats))
+    return res["date_obj"]  # type: ignore[no-any-return]
+
+
+@functools.lru_cache(maxsize=None)
+def _parser(languages: Any, relative_base: Optional[datetime] = None) -> Any:
+    """Return the dateparser parser of languages, created once."""
+    import dateparser  # type: ignore[import-untyped]
+
+    settings = {"RELATIVE_BASE": relative_base} if relative_base else None
+    # Without languages, dateparser detects the language among all locales
+    return dateparser.DateDataParser(
+        languages=_thaw(languages) or None, settings=settings
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _strptime_formats(date_formats: Any) -> Tuple[str, ...]:
+    """Return the leading formats which can be tried with strptime.
+
+    The formats are tried in order by dateparser, so the first format
+    which needs dateparser ends the formats tried with strptime.
+    """
+    if not isinstance(date_formats, tuple):
+        return ()
+    formats = []
+    for date_format in date_formats:
+        directives = (
+            set(DIRECTIVE_REGEX.findall(date_format))
+            if isinstance(date_format, str)
+            else set()
+        )
+        if not FULL_DATE_DIRECTIVES <= directives <= STRPTIME_DIRECTIVES:
+            break
+        formats.append(date_format)
+    return tuple(formats)
+
+
+def _freeze(value: Any) -> Any:
+    """Return a hashable version of a list option, other values are kept."""
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _thaw(value: Any) -> Any:
+    """Return the list given to dateparser for a frozen list option."""
+    return list(value) if isinstance(value, tuple) else value
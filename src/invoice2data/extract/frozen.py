@@ -0,0 +1,73 @@
+"""Read-only containers of the settings of loaded templates.
+
+Templates are shared by all the documents extracted, possibly by several
+threads at once, so their settings must not change during an extraction.
+Once a template is built, its values are copied into `FrozenDict` and
+`FrozenList`, subclasses of `dict` and `list` raising `TypeError` on any
+change. They are read, compared, pickled and copied like the values
+they replace.
+"""
+
+from typing import Any
+from typing import NoReturn
+
+
+def _refuse(self: Any, *args: Any, **kwargs: Any) -> NoReturn:
+    """Refuse a change of a frozen value."""
+    raise TypeError("%s of a template can't be changed" % type(self).__name__)
+
+
+class FrozenDict(dict):  # type: ignore[type-arg]
+    """A dict which can't be changed once built."""
+
+    __setitem__ = __delitem__ = __ior__ = _refuse  # type: ignore[assignment]
+    clear = pop = popitem = setdefault = update = _refuse  # type: ignore[assignment]
+
+    def __reduce__(self) -> Any:
+        """Pickle and copy the frozen dict as a dict given to its constructor."""
+        return (self.__class__, (dict(self),))
+
+
+class FrozenList(list):  # type: ignore[type-arg]
+    """A list which can't be changed once built."""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _refuse  # type: ignore[assignment]
+    append = extend = insert = pop = remove = clear = _refuse  # type: ignore[assignment]
+    sort = reverse = _refuse  # type: ignore[assignment]
+
+    def __reduce__(self) -> Any:
+        """Pickle and copy the frozen list as a list given to its constructor."""
+        return (self.__class__, (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Return a read-only copy of a value of a template.
+
+    Args:
+        value (Any): The value, dicts and lists being copied recursively.
+
+    Returns:
+        Any: The value, with its dicts and lists frozen.
+    """
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Return a mutable copy of a frozen value, to hand it out.
+
+    Args:
+        value (Any): The value, frozen dicts and lists being copied
+            recursively.
+
+    Returns:
+        Any: The value, with plain dicts and lists.
+    """
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
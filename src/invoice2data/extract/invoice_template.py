@@ -3,29 +3,52 @@
 Templates are initially read from .yml files and then kept as class.
 """
 
+import functools
 import re
-import unicodedata
+import threading
+from collections import OrderedDict
 from logging import getLogger
 from pprint import pformat
+from typing import TYPE_CHECKING
 from typing import Any
+from typing import Callable
+from typing import ClassVar
 from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
 from typing import OrderedDict as OrderedDictType
+from typing import Sequence
+from typing import Tuple
 
-import dateparser  # type: ignore[import-untyped]
-
-from ..input import ocrmypdf
-
-# Area extraction is currently added for pdftotext, ocrmypdf and tesseract (which uses pdftotext)
-from ..input import pdftotext
-from ..input import tesseract
+from ..input import cache
+from ..input.cache import TextCache
+from ..input.layout import LazyLayout
 from . import parsers
+from .dates import DateCoercer
+from .frozen import freeze
+from .frozen import thaw
+from .normalizer import NormalizationMemo
+from .normalizer import Normalizer
+from .numbers import NumberParser
+from .patterns import check_timeout
+from .patterns import compile_pattern
+from .patterns import iter_template_patterns
+from .patterns import match_timeout
 from .plugins import lines
 from .plugins import tables
 
 
+if TYPE_CHECKING:
+    # The views of ordered dicts, only declared by the type stubs
+    from collections import _odict_items
+    from collections import _odict_keys
+    from collections import _odict_values
+
+
 logger = getLogger(__name__)
 
-OPTIONS_DEFAULT = {
+OPTIONS_DEFAULT: Dict[str, Any] = {
     "remove_whitespace": False,
     "remove_accents": False,
     "lowercase": False,
@@ -34,6 +57,7 @@ OPTIONS_DEFAULT = {
     "languages": [],
     "decimal_separator": ".",
     "replace": [],  # example: see templates/fr/fr.free.mobile.yml
+    "area_layout": False,
 }
 
 PARSERS_MAPPING = {
@@ -44,6 +68,35 @@ PARSERS_MAPPING = {
 
 PLUGIN_MAPPING = {"lines": lines, "tables": tables}
 
+THOUSANDS_SEPARATORS_REGEX = re.compile(r"[\s']")
+
+# Area extraction is currently added for pdftotext, ocrmypdf and tesseract (which uses pdftotext)
+# Compared by name, so the input modules are only imported when selected
+AREA_INPUT_MODULES = frozenset(
+    "invoice2data.input.%s" % name for name in ("pdftotext", "ocrmypdf", "tesseract")
+)
+
+
+def _refuse_when_frozen(method: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap a method changing the keys of a template, refused once it's built."""
+
+    @functools.wraps(method)
+    def wrapper(self: "InvoiceTemplate", *args: Any, **kwargs: Any) -> Any:
+        if self.frozen:
+            raise TypeError(
+                "Template %s can't be changed" % OrderedDict.get(self, "template_name")
+            )
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _freeze_keys(template: "InvoiceTemplate") -> None:
+    """Freeze the values of the keys of a template, and its keys."""
+    for key, value in list(OrderedDict.items(template)):
+        OrderedDict.__setitem__(template, key, freeze(value))
+    template.frozen = True
+
 
 class InvoiceTemplate(OrderedDictType[str, Any]):
     """Represents single template files that live as .yml files on the disk.
@@ -60,10 +113,21 @@ class InvoiceTemplate(OrderedDictType[str, Any]):
           Parse date and return the date after parsing.
       coerce_type(value, target_type)
           Change the type of values.
+      coerce_column(values, target_type)
+          Change the type of a column of values.
       extract(optimized_str)
           Given a template file and a string, extract matching data fields.
+      iter_lines(optimized_str, field)
+          Iterate over the rows of a lines field, as they are parsed.
+
+    Once built, a template and its settings can't be changed: they are
+    frozen, changing them raises `TypeError`. One template list can be
+    shared by threads extracting documents concurrently.
     """
 
+    # Whether the keys of the template can't be changed anymore
+    frozen = False
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
 
@@ -78,7 +142,7 @@ class InvoiceTemplate(OrderedDictType[str, Any]):
         if not isinstance(languages, list):
             languages = [languages]
 
-        for lang in self.options.get("languages", []):  # type: ignore [attr-defined]
+        for lang in self.options.get("languages", []):
             if len(lang) != 2:
                 raise AssertionError(
                     "Error in Template %s lang code must have 2 letters"
@@ -89,36 +153,67 @@ class InvoiceTemplate(OrderedDictType[str, Any]):
         if "issuer" not in self.keys():
             self["issuer"] = self["keywords"][0]
 
-    def prepare_input(self, extracted_str: str) -> str:
-        """Input raw string and do transformations, as set in template file."""
-        # Remove whitespace
-        if self.options["remove_whitespace"]:
-            optimized_str = re.sub(" +", "", extracted_str)
-        else:
-            optimized_str = extracted_str
-
-        # Remove accents
-        if self.options["remove_accents"]:
-            optimized_str = re.sub(
-                "[\u0300-\u0362]", "", unicodedata.normalize("NFKD", optimized_str)
-            )
+        _check_timeouts(self)
 
-        # Convert to lower case
-        if self.options["lowercase"]:
-            optimized_str = optimized_str.lower()
+        # Compile all regexes once, so a bad one is reported at load time
+        for field, pattern in iter_template_patterns(self):
+            try:
+                compile_pattern(pattern)
+            except re.error as error:
+                raise ValueError(
+                    "Error in Template %s field %s: invalid regex %r (%s)"
+                    % (self.get("template_name"), field, pattern, error)
+                ) from error
 
-        if not isinstance(self.options.get("replace", []), list):
+        if not isinstance(self.options["replace"], list):
             self.options["replace"] = [self.options["replace"]]
-
-        # Specific replace
-        for replace in self.options.get("replace", []):
+        for replace in self.options["replace"]:
             assert len(replace) == 2, (
                 "Error in Template %s A replace should be a list of exactly 2 elements."
                 % self["template_name"]
             )
-            optimized_str = re.sub(replace[0], replace[1], optimized_str)
 
-        return optimized_str
+        # Shared by the threads extracting documents, nothing changes it anymore
+        self.options = freeze(self.options)
+        _freeze_keys(self)
+
+        # Whitespace, accents, case and replace options, compiled once
+        self.normalizer = Normalizer.for_options(self.options)
+        # Date formats and languages, with the parsed dates cached
+        self.date_coercer = DateCoercer.for_options(self.options)
+        # Separators of the numbers, to parse columns of numbers at once
+        self.number_parser = NumberParser.for_options(self.options)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle the template keys only, the template is built again when loaded."""
+        return (self.__class__, (list(self.items()),))
+
+    # Changes of the keys, refused once the template is built
+    __setitem__ = _refuse_when_frozen(OrderedDict.__setitem__)
+    __delitem__ = _refuse_when_frozen(OrderedDict.__delitem__)
+    clear = _refuse_when_frozen(OrderedDict.clear)
+    pop = _refuse_when_frozen(OrderedDict.pop)
+    popitem = _refuse_when_frozen(OrderedDict.popitem)
+    setdefault = _refuse_when_frozen(OrderedDict.setdefault)
+    update = _refuse_when_frozen(OrderedDict.update)
+    move_to_end = _refuse_when_frozen(OrderedDict.move_to_end)
+
+    def prepare_input(
+        self, extracted_str: str, memo: Optional[NormalizationMemo] = None
+    ) -> str:
+        """Input raw string and do transformations, as set in template file.
+
+        Args:
+            extracted_str (str): The raw text of the document.
+            memo (Optional[NormalizationMemo]): Normalized texts of the document,
+                shared with the other templates evaluated on it.
+
+        Returns:
+            str: The normalized text.
+        """
+        if memo is not None:
+            return memo.normalize(self.normalizer, extracted_str)
+        return self.normalizer(extracted_str)
 
     def matches_input(self, extracted_str: str) -> bool:
         """Check if the extracted string matches the template keywords.
@@ -185,8 +280,8 @@ class InvoiceTemplate(OrderedDictType[str, Any]):
         thousands_separator = "," if self.options["decimal_separator"] == "." else "."
 
         # Remove all possible thousands separators
-        amount_no_thousand_sep = re.sub(
-            r"[\s']", "", value.replace(thousands_separator, "")
+        amount_no_thousand_sep = THOUSANDS_SEPARATORS_REGEX.sub(
+            "", value.replace(thousands_separator, "")
         )
 
         # Replace the decimal separator with a dot
@@ -196,11 +291,7 @@ class InvoiceTemplate(OrderedDictType[str, Any]):
 
     def parse_date(self, value: str) -> Any:
         """Parses date and returns date after parsing."""
-        res = dateparser.parse(
-            value,
-            date_formats=self.options["date_formats"],
-            languages=self.options["languages"],
-        )
+        res = self.date_coercer(value)
         logger.debug("result of date parsing=%s", res)
         return res
 
@@ -232,8 +323,41 @@ class InvoiceTemplate(OrderedDictType[str, Any]):
             return self.parse_date(value)
         raise AssertionError("Unknown type")
 
+    def coerce_column(self, values: Sequence[Any], target_type: str) -> List[Any]:
+        """Coerces a column of values to the specified target type.
+
+        Gives the results of `coerce_type` on each value, checking the
+        target type once and parsing the numbers of the column together.
+
+        Args:
+            values (Sequence[Any]): The values to be coerced.
+            target_type (str): The target type to which the values should be
+                coerced. Valid values: 'int', 'float', 'date', 'datetime'.
+
+        Returns:
+            List[Any]: The coerced values.
+
+        Raises:
+            AssertionError: If the target_type is unknown.
+        """
+        if target_type in ("int", "float"):
+            convert = int if target_type == "int" else float
+            numbers = iter(
+                self.number_parser.parse_column(
+                    [value for value in values if value], self["template_name"]
+                )
+            )
+            return [convert(next(numbers)) if value else convert() for value in values]
+        elif target_type in ("date", "datetime"):
+            return [self.date_coercer(value) for value in values]
+        raise AssertionError("Unknown type")
+
     def extract(
-        self, optimized_str: str, invoice_file: str, input_module: Any
+        self,
+        optimized_str: str,
+        invoice_file: str,
+        input_module: Any,
+        text_cache: Optional[TextCache] = None,
     ) -> Dict[str, Any]:
         """Extracts data from the optimized string using the template.
 
@@ -241,17 +365,34 @@ class InvoiceTemplate(OrderedDictType[str, Any]):
             optimized_str (str): The optimized string.
             invoice_file (str): The path to the invoice file.
             input_module (Any): The input module used.
+            text_cache (Optional[TextCache]): Cache of the texts extracted
+                from areas, if any.
 
         Returns:
             Dict[str, Any]: The extracted data.
 
         """
         output = _initialize_output_and_log(self, optimized_str)
+        # With the area_layout option, all areas are cropped from one layout,
+        # read on the first area field, instead of running pdftotext per area
+        layout = None
+        if self.options["area_layout"] and hasattr(input_module, "to_bbox_layout"):
+            layout = LazyLayout(
+                functools.partial(
+                    cache.to_bbox_layout, input_module, invoice_file, text_cache
+                )
+            )
 
         for k, v in self["fields"].items():
             if isinstance(v, dict):
                 optimized_str_for_parser = _handle_area(
-                    self, v, input_module, invoice_file, optimized_str
+                    self,
+                    v,
+                    input_module,
+                    invoice_file,
+                    optimized_str,
+                    text_cache,
+                    layout,
                 )
 
                 if "parser" in v:
@@ -259,7 +400,7 @@ class InvoiceTemplate(OrderedDictType[str, Any]):
 
             elif k.startswith("static_"):
                 logger.debug("field=%s | static value=%s", k, v)
-                output[k.replace("static_", "")] = v
+                output[k.replace("static_", "")] = thaw(v)
 
             else:
                 _handle_legacy_syntax(self, k, v, optimized_str, output)
@@ -268,9 +409,180 @@ class InvoiceTemplate(OrderedDictType[str, Any]):
         # Run plugins:
         for plugin_keyword, plugin_func in PLUGIN_MAPPING.items():
             if plugin_keyword in self.keys():
-                plugin_func.extract(self, optimized_str, output)
+                try:
+                    with match_timeout(self.options.get("regex_timeout")):
+                        plugin_func.extract(self, optimized_str, output)
+                except TimeoutError:
+                    _log_timeout(self, plugin_keyword)
         return _check_required_fields(self, output)
 
+    def iter_lines(
+        self, optimized_str: str, field: str = "lines"
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate lazily over the lines of a document, as they are parsed.
+
+        Gives the rows `extract` returns for a field using the lines parser,
+        or for the `lines` plugin, without keeping them all in memory.
+
+        Args:
+            optimized_str (str): The text of the document, as prepared by
+                `prepare_input`.
+            field (str): The name of the field. Defaults to the `lines`
+                field or plugin.
+
+        Returns:
+            Iterator[Dict[str, Any]]: The rows, with their types coerced,
+                parsed as they are read.
+
+        Raises:
+            KeyError: If the template has no lines field with this name, as
+                soon as it is called.
+        """
+        settings = (self.get("fields") or {}).get(field)
+        if not (isinstance(settings, dict) and settings.get("parser") == "lines"):
+            if field != "lines" or "lines" not in self:
+                raise KeyError(
+                    "Error in Template %s no lines field %s"
+                    % (self["template_name"], field)
+                )
+            settings = self["lines"]
+        return parsers.lines.iter_lines(self, field, settings, optimized_str)
+
+
+class LazyInvoiceTemplate(InvoiceTemplate):
+    """Template only parsed and built when a document is routed to it.
+
+    Until then it only holds the keys needed to match documents:
+    `template_name`, `keywords`, `exclude_keywords` and `priority`.
+    Accessing any other key, the options or the extraction methods loads
+    the full template once and keeps it.
+
+    Args:
+        stub (Dict[str, Any]): The prepared matching keys of the template.
+        load (Callable[[], Optional[Dict[str, Any]]]): Returns the prepared
+            full template.
+        languages (Tuple[str, ...]): The date languages of the template.
+            Defaults to none.
+
+    Attributes:
+        STUB_KEYS (ClassVar[Tuple[str, ...]]): The keys held before the
+            template is loaded.
+    """
+
+    STUB_KEYS: ClassVar[Tuple[str, ...]] = (
+        "template_name",
+        "keywords",
+        "exclude_keywords",
+        "priority",
+    )
+
+    def __init__(
+        self,
+        stub: Dict[str, Any],
+        load: Callable[[], Optional[Dict[str, Any]]],
+        languages: Tuple[str, ...] = (),
+    ) -> None:
+        OrderedDict.__init__(self, stub)
+        _freeze_keys(self)
+        # Read without loading the template, see `loader.template_languages`
+        self.languages = languages
+        self._load = load
+        self._lock = threading.Lock()
+        self._materialized = False
+
+    def materialize(self) -> None:
+        """Load the full template, if it wasn't loaded yet.
+
+        Raises:
+            ValueError: If the template file can't be loaded anymore.
+        """
+        if self._materialized:
+            return
+        with self._lock:
+            # Another thread may have loaded it meanwhile
+            if not self._materialized:
+                tpl = self._load()
+                if not tpl:
+                    raise ValueError(
+                        "Error in Template %s: failed to load template"
+                        % OrderedDict.__getitem__(self, "template_name")
+                    )
+                self._update(InvoiceTemplate(tpl))
+
+    def _update(self, template: InvoiceTemplate) -> None:
+        """Take the keys and options of the loaded full template."""
+        logger.debug("Template %s materialized", template["template_name"])
+        for key, value in OrderedDict.items(template):
+            OrderedDict.__setitem__(self, key, value)
+            OrderedDict.move_to_end(self, key)
+        self.options = template.options
+        self.normalizer = template.normalizer
+        self.date_coercer = template.date_coercer
+        self.number_parser = template.number_parser
+        self._materialized = True
+
+    def __getattr__(self, name: str) -> Any:
+        """Load the full template when its options are first needed."""
+        if name in ("options", "normalizer", "date_coercer", "number_parser"):
+            self.materialize()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def __getitem__(self, key: str) -> Any:
+        """Return a key, loading the full template if it's not a stub key."""
+        if key not in self.STUB_KEYS:
+            self.materialize()
+        return OrderedDict.__getitem__(self, key)
+
+    def __contains__(self, key: object) -> bool:
+        """Check a key, loading the full template if it's not a stub key."""
+        if key not in self.STUB_KEYS:
+            self.materialize()
+        return OrderedDict.__contains__(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a key or a default, loading the full template if needed."""
+        if key not in self.STUB_KEYS:
+            self.materialize()
+        return OrderedDict.get(self, key, default)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys of the full template."""
+        self.materialize()
+        return OrderedDict.__iter__(self)
+
+    def __len__(self) -> int:
+        """Return the number of keys of the full template."""
+        self.materialize()
+        return OrderedDict.__len__(self)
+
+    def keys(self) -> "_odict_keys[str, Any]":
+        """Return the keys of the full template."""
+        self.materialize()
+        return OrderedDict.keys(self)
+
+    def values(self) -> "_odict_values[str, Any]":
+        """Return the values of the full template."""
+        self.materialize()
+        return OrderedDict.values(self)
+
+    def items(self) -> "_odict_items[str, Any]":
+        """Return the items of the full template."""
+        self.materialize()
+        return OrderedDict.items(self)
+
+    def __repr__(self) -> str:
+        """Represent the template without loading it."""
+        if not self._materialized:
+            return "%s(%r)" % (self.__class__.__name__, dict(OrderedDict.items(self)))
+        return OrderedDict.__repr__(self)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        """Pickle the stub and loader, or the full template once loaded."""
+        if not self._materialized:
+            return (self.__class__, (dict(OrderedDict.items(self)), self._load))
+        return (InvoiceTemplate, (list(OrderedDict.items(self)),))
+
 
 def _initialize_output_and_log(
     self: InvoiceTemplate, optimized_str: str
@@ -300,11 +612,17 @@ def _handle_area(
     input_module: Any,
     invoice_file: str,
     optimized_str: str,
+    text_cache: Optional[TextCache] = None,
+    layout: Optional[LazyLayout] = None,
 ) -> str:
     """Handle area-specific extraction."""
-    if "area" in v and input_module in (pdftotext, ocrmypdf, tesseract):
+    if "area" in v and getattr(input_module, "__name__", None) in AREA_INPUT_MODULES:
         logger.debug(f"Area was specified with parameters {v['area']}")
-        optimized_str_area: str = input_module.to_text(invoice_file, v["area"])
+        optimized_str_area = layout.crop(v["area"]) if layout is not None else None
+        if optimized_str_area is None:
+            optimized_str_area = cache.to_text(
+                input_module, invoice_file, v["area"], text_cache
+            )
         logger.debug(
             "START pdftotext area result ===========================\n%s",
             optimized_str_area,
@@ -324,7 +642,14 @@ def _handle_parser(
     """Handle parsing using different parsers."""
     if v["parser"] in PARSERS_MAPPING:
         parser = PARSERS_MAPPING[v["parser"]]
-        value = parser.parse(self, k, v, optimized_str_for_parser)
+        try:
+            with match_timeout(
+                v.get("regex_timeout", self.options.get("regex_timeout"))
+            ):
+                value = parser.parse(self, k, v, optimized_str_for_parser)
+        except TimeoutError:
+            _log_timeout(self, k)
+            return
         if value or value == 0.0:
             output[k] = value
         else:
@@ -338,21 +663,30 @@ def _handle_legacy_syntax(
 ) -> None:
     """Handle legacy syntax for backward compatibility."""
     result = None
-    if k.startswith("sum_amount") and type(v) is list:
-        k = k[4:]
-        result = parsers.regex.parse(
-            self, k, {"regex": v, "type": "float", "group": "sum"}, optimized_str, True
-        )
-    elif k.startswith("date") or k.endswith("date"):
-        result = parsers.regex.parse(
-            self, k, {"regex": v, "type": "date"}, optimized_str, True
-        )
-    elif k.startswith("amount"):
-        result = parsers.regex.parse(
-            self, k, {"regex": v, "type": "float"}, optimized_str, True
-        )
-    else:
-        result = parsers.regex.parse(self, k, {"regex": v}, optimized_str, True)
+    try:
+        with match_timeout(self.options.get("regex_timeout")):
+            if k.startswith("sum_amount") and type(v) is list:
+                k = k[4:]
+                result = parsers.regex.parse(
+                    self,
+                    k,
+                    {"regex": v, "type": "float", "group": "sum"},
+                    optimized_str,
+                    True,
+                )
+            elif k.startswith("date") or k.endswith("date"):
+                result = parsers.regex.parse(
+                    self, k, {"regex": v, "type": "date"}, optimized_str, True
+                )
+            elif k.startswith("amount"):
+                result = parsers.regex.parse(
+                    self, k, {"regex": v, "type": "float"}, optimized_str, True
+                )
+            else:
+                result = parsers.regex.parse(self, k, {"regex": v}, optimized_str, True)
+    except TimeoutError:
+        _log_timeout(self, k)
+        return
 
     if result or result == 0.0:
         output[k] = result
@@ -360,6 +694,32 @@ def _handle_legacy_syntax(
         logger.warning("regexp for field %s didn't match", k)
 
 
+def _check_timeouts(self: InvoiceTemplate) -> None:
+    """Check the timeouts of the matches, of the template and its fields."""
+    fields = [("options", self.options)] + [
+        (field, settings)
+        for field, settings in (self.get("fields") or {}).items()
+        if isinstance(settings, dict)
+    ]
+    for field, settings in fields:
+        try:
+            check_timeout(settings.get("regex_timeout"))
+        except ValueError as error:
+            raise ValueError(
+                "Error in Template %s field %s: %s"
+                % (self.get("template_name"), field, error)
+            ) from error
+
+
+def _log_timeout(self: InvoiceTemplate, k: str) -> None:
+    """Report a field whose regex timed out, left unmatched."""
+    logger.warning(
+        "Error in Template %s field %s: regex timed out, the field is not matched",
+        self["template_name"],
+        k,
+    )
+
+
 def _check_required_fields(
     self: InvoiceTemplate, output: Dict[str, Any]
 ) -> Dict[str, Any]:
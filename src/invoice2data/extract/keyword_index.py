@@ -0,0 +1,169 @@
+"""Keyword index used to route a document to its candidate templates.
+
+Every template declares `keywords` (all of them must be present) and
+`exclude_keywords` (none of them may be present). Instead of scanning the
+document once per keyword and template, all keywords of all loaded templates
+are compiled into a single Aho-Corasick automaton which finds every keyword
+present in the document in one pass over the text.
+"""
+
+import threading
+from collections import OrderedDict
+from logging import getLogger
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Set
+from typing import Tuple
+
+
+logger = getLogger(__name__)
+
+# Amount of indexes kept for distinct template lists.
+INDEX_CACHE_SIZE = 8
+
+_index_cache: "OrderedDict[Tuple[int, ...], KeywordIndex]" = OrderedDict()
+# Guards the cache, shared by the threads extracting documents
+_index_lock = threading.Lock()
+
+
+class KeywordIndex:
+    """Aho-Corasick automaton over the keywords of a list of templates.
+
+    Args:
+        templates (Sequence[Any]): Templates to index, in priority order.
+    """
+
+    def __init__(self, templates: Sequence[Any]) -> None:
+        self.templates = list(templates)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[str]] = [set()]
+        # Templates with non-string keywords can't be indexed,
+        # they are checked with `matches_input` as before.
+        self._unindexed: Set[int] = set()
+
+        keywords: Set[str] = set()
+        for i, template in enumerate(self.templates):
+            template_keywords = [
+                *template["keywords"],
+                *(template["exclude_keywords"] or []),
+            ]
+            if all(isinstance(keyword, str) for keyword in template_keywords):
+                keywords.update(template_keywords)
+            else:
+                self._unindexed.add(i)
+
+        # The empty string is always part of the document.
+        self._always_found = "" in keywords
+        keywords.discard("")
+        self._keyword_count = len(keywords)
+        for keyword in keywords:
+            self._add_keyword(keyword)
+        self._build_failure_links()
+
+    @classmethod
+    def for_templates(cls, templates: Sequence[Any]) -> "KeywordIndex":
+        """Return the index of a template list, building it only once.
+
+        Args:
+            templates (Sequence[Any]): Templates to index, in priority order.
+
+        Returns:
+            KeywordIndex: The (cached) index of the given templates.
+        """
+        key = tuple(id(template) for template in templates)
+        with _index_lock:
+            index = _index_cache.get(key)
+            if index is None:
+                index = cls(templates)
+                _index_cache[key] = index
+                if len(_index_cache) > INDEX_CACHE_SIZE:
+                    _index_cache.popitem(last=False)
+            else:
+                _index_cache.move_to_end(key)
+        return index
+
+    def _add_keyword(self, keyword: str) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._out[state].add(keyword)
+
+    def _build_failure_links(self) -> None:
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] |= self._out[self._fail[next_state]]
+
+    def find_keywords(self, extracted_str: str) -> Set[str]:
+        """Find all indexed keywords present in a string.
+
+        Args:
+            extracted_str (str): The extracted text from the invoice.
+
+        Returns:
+            Set[str]: The keywords found in the string.
+        """
+        found: Set[str] = set()
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        state = 0
+        for char in extracted_str:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state] and not out[state] <= found:
+                found |= out[state]
+                if len(found) == self._keyword_count:
+                    break
+        if self._always_found:
+            found.add("")
+        return found
+
+    def candidates(self, extracted_str: str) -> List[Any]:
+        """Return the templates matching a string, in their original order.
+
+        A template matches when all of its keywords and none of its
+        exclude_keywords are found, as in `InvoiceTemplate.matches_input`.
+
+        Args:
+            extracted_str (str): The extracted text from the invoice.
+
+        Returns:
+            List[Any]: The matching templates.
+        """
+        found = self.find_keywords(extracted_str)
+        matched = []
+        for i, template in enumerate(self.templates):
+            if i in self._unindexed:
+                if template.matches_input(extracted_str):
+                    matched.append(template)
+            elif _is_match(template, found):
+                matched.append(template)
+        logger.debug(
+            "Keyword index matched templates: %s",
+            [template["template_name"] for template in matched],
+        )
+        return matched
+
+
+def _is_match(template: Any, found: Set[str]) -> bool:
+    """Check the keywords of a template against the found keywords."""
+    return all(keyword in found for keyword in template["keywords"]) and not any(
+        keyword in found for keyword in template["exclude_keywords"] or []
+    )
@@ -4,31 +4,43 @@ Templates are initially read from .yml or .json files and then kept as class.
 """
 
 import codecs
+import functools
+import hashlib
 import json
 import os
+import tempfile
 from logging import getLogger
 from typing import Any
 from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Tuple
 from typing import cast
 
 
 try:
     from yaml import CSafeLoader as SafeLoader
+    from yaml import MappingNode
     from yaml import YAMLError
     from yaml import load
 except ImportError:  # pragma: no cover
-    from yaml import SafeLoader  # type: ignore[import-untyped]
+    from yaml import MappingNode  # type: ignore[import-untyped]
+    from yaml import SafeLoader
     from yaml import YAMLError
     from yaml import load
 
 from .invoice_template import InvoiceTemplate  # type: ignore[unused-ignore]
+from .invoice_template import LazyInvoiceTemplate
 
 
 logger = getLogger(__name__)
 
+# Bump when the content of prepared templates changes
+TEMPLATE_CACHE_VERSION = 2
+
+MERGE_TAG = "tag:yaml.org,2002:merge"
+
 
 def ordered_load(
     stream: str, loader: Callable[[str], Any] = json.loads
@@ -54,19 +66,42 @@ def ordered_load(
     for tpl in tpl_stream:
         tpl = prepare_template(tpl)
         if tpl:
-            output.append(InvoiceTemplate(cast(Dict[str, Any], tpl)))
+            output.append(InvoiceTemplate(tpl))
 
     return output
 
 
-def read_templates(folder: Optional[str] = None) -> List[InvoiceTemplate]:
+def read_templates(
+    folder: Optional[str] = None,
+    use_cache: bool = False,
+    rebuild_cache: bool = False,
+    lazy: bool = False,
+) -> List[InvoiceTemplate]:
     """Load YAML templates from template folder. Return list of dicts.
 
     Use built-in templates if no folder is set.
 
+    When `use_cache` is set, the prepared templates are stored as JSON in
+    a cache file of the user cache directory (see `template_cache_path`).
+    Files whose path, modification time and size didn't change since the
+    cache was written are loaded from it without being parsed again.
+    Templates with values JSON can't represent, such as dates, are parsed
+    on every run.
+
+    With `lazy` set, only the keys used to match documents (`keywords`,
+    `exclude_keywords` and `priority`) are read from each file and
+    `LazyInvoiceTemplate` objects are returned. A template is parsed and
+    built only when a document is routed to it.
+
     Args:
         folder (Optional[str]): User-defined folder where templates are stored.
                                 If None, uses built-in templates.
+        use_cache (bool): Read and update the template cache file.
+                          Defaults to False.
+        rebuild_cache (bool): Ignore the content of the cache file and
+                              write it again. Defaults to False.
+        lazy (bool): Return templates which are only fully loaded when
+                     first used. Defaults to False.
 
     Returns:
         List[InvoiceTemplate]: List of InvoiceTemplate objects.
@@ -78,43 +113,272 @@ def read_templates(folder: Optional[str] = None) -> List[InvoiceTemplate]:
         >>> templates[0]['template_name']  # Check the name of the first template
                 'au.com.opal.yml'
     """
-    output = []
+    output: List[InvoiceTemplate] = []
     if folder is None:
         folder = "./src/invoice2data/extract/templates"
     else:
         folder = os.path.abspath(folder)
 
+    cache_path = template_cache_path(folder)
+    cached: Dict[str, Any] = {}
+    if use_cache and not rebuild_cache:
+        cached = _read_template_cache(cache_path)
+    entries: Dict[str, Any] = {}
+
     for path, _subdirs, files in os.walk(folder):
         for name in sorted(files):
-            with codecs.open(
-                os.path.join(path, name), encoding="utf-8"
-            ) as template_file:
-                if name.endswith((".yaml", ".yml")):
-                    try:
-                        tpl = load(template_file.read(), Loader=SafeLoader)
-                    except YAMLError as error:
-                        logger.warning("Failed to load %s template:\n%s", name, error)
-                        continue
-                elif name.endswith(".json"):
-                    try:
-                        tpl = json.loads(template_file.read())
-                    except ValueError as error:
-                        logger.warning(
-                            "json Loader Failed to load %s template:\n%s", name, error
-                        )
-                        continue
-                else:
-                    continue
-            tpl["template_name"] = name
-            tpl = prepare_template(tpl)
-
-            if tpl:
-                output.append(InvoiceTemplate(cast(Dict[str, Any], tpl)))
+            if not name.endswith((".yaml", ".yml", ".json")):
+                continue
+            file_path = os.path.join(path, name)
+            key = os.path.relpath(file_path, folder)
+            entry = _read_template_entry(
+                file_path, name, cached.get(key), stub_only=lazy and not use_cache
+            )
+            if entry is None:
+                continue
+            entries[key] = entry
+            if lazy:
+                stub = {k: entry[1][k] for k in LazyInvoiceTemplate.STUB_KEYS}
+                output.append(
+                    LazyInvoiceTemplate(
+                        stub,
+                        functools.partial(_load_template_file, file_path, name),
+                        _languages(entry[1].get("options")),
+                    )
+                )
+            else:
+                output.append(InvoiceTemplate(entry[1]))
+
+    if use_cache:
+        storable = {key: e for key, e in entries.items() if _is_storable(e[1])}
+        if rebuild_cache or _signatures(storable) != _signatures(cached):
+            _write_template_cache(cache_path, storable)
 
     logger.info("Loaded %d templates from %s", len(output), folder)
     return output
 
 
+def template_languages(templates: List[InvoiceTemplate]) -> Dict[str, Tuple[str, ...]]:
+    """Return the date languages declared by each template.
+
+    Lazy templates aren't loaded, their languages are read with their
+    matching keys.
+
+    Args:
+        templates (List[InvoiceTemplate]): The loaded templates.
+
+    Returns:
+        Dict[str, Tuple[str, ...]]: The languages, by template name. Templates
+            without languages have an empty tuple.
+    """
+    languages = {}
+    for template in templates:
+        if isinstance(template, LazyInvoiceTemplate):
+            languages[template["template_name"]] = template.languages
+        else:
+            languages[template["template_name"]] = _languages(template.options)
+    return languages
+
+
+def declared_languages(templates: List[InvoiceTemplate]) -> List[str]:
+    """Return the union of the date languages declared by the templates.
+
+    Args:
+        templates (List[InvoiceTemplate]): The loaded templates.
+
+    Returns:
+        List[str]: The language codes, sorted.
+    """
+    return sorted(
+        {lang for langs in template_languages(templates).values() for lang in langs}
+    )
+
+
+def template_cache_dir() -> str:
+    """Return the folder of the template cache files.
+
+    The folder is `invoice2data/templates` in `$XDG_CACHE_HOME`, by default
+    `~/.cache`, so that the cache files are owned by the user.
+
+    Returns:
+        str: The path of the folder.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "invoice2data", "templates")
+
+
+def template_cache_path(folder: str) -> str:
+    """Return the path of the cache file of a template folder.
+
+    The cache file is named after the hash of the absolute path of the
+    folder, in `template_cache_dir`.
+
+    Args:
+        folder (str): The template folder.
+
+    Returns:
+        str: The path of the cache file.
+    """
+    digest = hashlib.sha256(os.path.abspath(folder).encode("utf-8")).hexdigest()
+    return os.path.join(template_cache_dir(), "%s.json" % digest[:32])
+
+
+def _read_template_entry(
+    path: str, name: str, cached_entry: Optional[Any], stub_only: bool
+) -> Optional[Tuple[Tuple[int, int], Dict[str, Any]]]:
+    """Return the file signature and prepared template of a template file."""
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    if cached_entry is not None and cached_entry[0] == signature:
+        return cast(Tuple[Tuple[int, int], Dict[str, Any]], cached_entry)
+
+    if stub_only:
+        tpl = _load_template_stub(path, name)
+    else:
+        tpl = _load_template_file(path, name)
+    if not tpl:
+        return None
+    return signature, tpl
+
+
+def _load_template_file(path: str, name: str) -> Optional[Dict[str, Any]]:
+    """Parse and prepare a single template file."""
+    with codecs.open(path, encoding="utf-8") as template_file:
+        if name.endswith((".yaml", ".yml")):
+            try:
+                tpl = load(template_file.read(), Loader=SafeLoader)
+            except YAMLError as error:
+                logger.warning("Failed to load %s template:\n%s", name, error)
+                return None
+        else:
+            try:
+                tpl = json.loads(template_file.read())
+            except ValueError as error:
+                logger.warning(
+                    "json Loader Failed to load %s template:\n%s", name, error
+                )
+                return None
+    tpl["template_name"] = name
+    return prepare_template(tpl)
+
+
+def _signatures(entries: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: entry[0] for key, entry in entries.items()}
+
+
+def _load_template_stub(path: str, name: str) -> Optional[Dict[str, Any]]:
+    """Read only the keys used to match documents from a template file."""
+    with codecs.open(path, encoding="utf-8") as template_file:
+        if name.endswith((".yaml", ".yml")):
+            try:
+                tpl = _load_yaml_keys(
+                    template_file.read(), (*LazyInvoiceTemplate.STUB_KEYS, "options")
+                )
+            except YAMLError as error:
+                logger.warning("Failed to load %s template:\n%s", name, error)
+                return None
+        else:
+            try:
+                tpl = json.loads(template_file.read())
+            except ValueError as error:
+                logger.warning(
+                    "json Loader Failed to load %s template:\n%s", name, error
+                )
+                return None
+    if not isinstance(tpl, dict):
+        return None
+    stub = {k: tpl[k] for k in LazyInvoiceTemplate.STUB_KEYS if k in tpl}
+    stub["template_name"] = name
+    # The date languages are read without loading the template
+    options = tpl.get("options")
+    if isinstance(options, dict) and "languages" in options:
+        stub["options"] = {"languages": options["languages"]}
+    return prepare_template(stub)
+
+
+def _languages(options: Any) -> Tuple[str, ...]:
+    """Return the date languages declared by the options of a template."""
+    declared = (options.get("languages") if isinstance(options, dict) else None) or []
+    if not isinstance(declared, list):
+        declared = [declared]
+    return tuple(declared)
+
+
+def _load_yaml_keys(content: str, keys: Tuple[str, ...]) -> Any:
+    """Load only some top level keys of a YAML document.
+
+    The document is composed into nodes, but only the values of the
+    requested keys are constructed into Python objects.
+    """
+    loader = SafeLoader(content)
+    try:
+        node = loader.get_single_node()
+        if not isinstance(node, MappingNode) or any(
+            key_node.tag == MERGE_TAG for key_node, _value_node in node.value
+        ):
+            return loader.construct_document(node)
+        tpl = {}
+        for key_node, value_node in node.value:
+            key = loader.construct_object(key_node, deep=True)
+            if key in keys:
+                tpl[key] = loader.construct_object(value_node, deep=True)
+        return tpl
+    finally:
+        loader.dispose()
+
+
+def _is_storable(tpl: Dict[str, Any]) -> bool:
+    """Return whether a prepared template is read back unchanged from JSON."""
+    try:
+        return bool(json.loads(json.dumps(tpl)) == tpl)
+    except (TypeError, ValueError):
+        return False
+
+
+def _read_template_cache(cache_path: str) -> Dict[str, Any]:
+    """Read the entries of a template cache file, if it's usable."""
+    try:
+        with open(cache_path, encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as error:
+        logger.debug("Ignoring unreadable template cache %s: %s", cache_path, error)
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != TEMPLATE_CACHE_VERSION:
+        logger.debug("Ignoring outdated template cache %s", cache_path)
+        return {}
+    entries = {}
+    for key, entry in cache.get("entries", {}).items():
+        # Signatures are tuples of the modification time and size
+        if isinstance(entry, list) and len(entry) == 2 and isinstance(entry[1], dict):
+            entries[key] = (tuple(entry[0]), entry[1])
+    return entries
+
+
+def _write_template_cache(cache_path: str, entries: Dict[str, Any]) -> None:
+    """Atomically replace a template cache file."""
+    cache = {"version": TEMPLATE_CACHE_VERSION, "entries": entries}
+    try:
+        os.makedirs(os.path.dirname(cache_path), mode=0o700, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path))
+    except OSError as error:
+        logger.debug("Failed to write template cache %s: %s", cache_path, error)
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as cache_file:
+            json.dump(cache, cache_file)
+        os.replace(tmp_path, cache_path)
+    except OSError as error:
+        logger.debug("Failed to write template cache %s: %s", cache_path, error)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    logger.debug("Template cache written to %s", cache_path)
+
+
 def prepare_template(tpl: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """Prepare a template for use.
 
@@ -0,0 +1,209 @@
+"""Text normalization applied to the extracted text before parsing.
+
+The `remove_whitespace`, `remove_accents`, `lowercase` and `replace`
+template options are compiled once into a `Normalizer`, shared by all
+templates using the same options. Each step uses the cheapest operation
+giving the same result as the regex it replaces:
+
+- spaces and single character literals are replaced with `str.replace`,
+- the search for accents is skipped when the decomposed text is ASCII,
+- other replacements use a precompiled regex.
+
+Steps are not merged into a `str.translate` table or one alternation of
+the literal replacements: on CPython, `str.translate` leaves its fast path
+on any non-ASCII text and is about ten times slower than a few
+`str.replace` calls on the test corpus, and an alternation needs a Python
+callback per match. See benchmarks/bench_normalizer.py.
+"""
+
+import re
+import unicodedata
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from .patterns import compile_pattern
+from .patterns import get_engine
+
+
+REGEX_SPECIAL_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+# Combining diacritical marks left by the NFKD normalization
+ACCENTS_REGEX = re.compile("[\u0300-\u0362]")
+
+_normalizers: Dict[Hashable, "Normalizer"] = {}
+
+Step = Tuple[str, Any]
+
+
+class Normalizer:
+    """Compiled text normalization of a template.
+
+    Args:
+        remove_whitespace (bool): Remove all spaces.
+        remove_accents (bool): Decompose characters and remove accents.
+        lowercase (bool): Convert the text to lower case.
+        replace (Optional[List[Any]]): Pairs of regex and replacement, applied
+            in order.
+    """
+
+    def __init__(
+        self,
+        remove_whitespace: bool = False,
+        remove_accents: bool = False,
+        lowercase: bool = False,
+        replace: Optional[List[Any]] = None,
+    ) -> None:
+        steps: List[Step] = []
+        if remove_whitespace:
+            steps.append(("literal", (" ", "")))
+        if remove_accents:
+            steps.append(("accents", None))
+        if lowercase:
+            steps.append(("lower", None))
+        for pattern, repl in replace or []:
+            steps.append(_replace_step(pattern, repl))
+
+        self.signature = _signature(
+            remove_whitespace, remove_accents, lowercase, replace or []
+        )
+        self.steps = steps
+        self._functions = [_step_function(kind, arg) for kind, arg in steps]
+
+    @classmethod
+    def for_options(cls, options: Dict[str, Any]) -> "Normalizer":
+        """Return the normalizer of template options, shared between templates.
+
+        Args:
+            options (Dict[str, Any]): The template options.
+
+        Returns:
+            Normalizer: The normalizer for the options.
+        """
+        # Normalizers hold patterns compiled by the engine, kept by engine
+        key = (get_engine(), signature(options))
+        normalizer = _normalizers.get(key)
+        if normalizer is None:
+            normalizer = _normalizers[key] = cls(
+                bool(options["remove_whitespace"]),
+                bool(options["remove_accents"]),
+                bool(options["lowercase"]),
+                options["replace"],
+            )
+        return normalizer
+
+    def __call__(self, text: str) -> str:
+        """Normalize a text.
+
+        Args:
+            text (str): The text to normalize.
+
+        Returns:
+            str: The normalized text.
+        """
+        for function in self._functions:
+            text = function(text)
+        return text
+
+
+class NormalizationMemo:
+    """Normalized texts of one document, shared by all templates.
+
+    Templates with the same normalization options reuse the text normalized
+    for the first of them, instead of building another copy of the document.
+    Use one memo per document: it keeps the normalized texts alive.
+    """
+
+    def __init__(self) -> None:
+        self._texts: Dict[Tuple[Hashable, str], str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def normalize(self, normalizer: Normalizer, text: str) -> str:
+        """Return the text normalized by a normalizer, normalizing it only once.
+
+        Args:
+            normalizer (Normalizer): The normalizer of the template.
+            text (str): The raw text of the document.
+
+        Returns:
+            str: The normalized text.
+        """
+        key = (normalizer.signature, text)
+        try:
+            normalized = self._texts[key]
+        except KeyError:
+            self.misses += 1
+            normalized = self._texts[key] = normalizer(text)
+        else:
+            self.hits += 1
+        return normalized
+
+
+def signature(options: Dict[str, Any]) -> Hashable:
+    """Return a hashable key of the normalization options.
+
+    Args:
+        options (Dict[str, Any]): The template options.
+
+    Returns:
+        Hashable: Equal for options normalizing text the same way.
+    """
+    return _signature(
+        bool(options["remove_whitespace"]),
+        bool(options["remove_accents"]),
+        bool(options["lowercase"]),
+        options["replace"],
+    )
+
+
+def _signature(
+    remove_whitespace: bool,
+    remove_accents: bool,
+    lowercase: bool,
+    replace: List[Any],
+) -> Hashable:
+    return (
+        remove_whitespace,
+        remove_accents,
+        lowercase,
+        tuple((_hashable(pattern), _hashable(repl)) for pattern, repl in replace),
+    )
+
+
+def _hashable(value: Any) -> Hashable:
+    return value if isinstance(value, Hashable) else repr(value)
+
+
+def _replace_step(pattern: Any, repl: Any) -> Step:
+    """Return the cheapest step equivalent to `re.sub(pattern, repl, text)`."""
+    if not isinstance(pattern, str) or not isinstance(repl, str):
+        # Let re.sub report the error when the text is normalized
+        return ("sub", (pattern, repl))
+    if len(pattern) == 1 and pattern not in REGEX_SPECIAL_CHARS and "\\" not in repl:
+        return ("literal", (pattern, repl))
+    # Not limited in time, prepare_input runs out of the timed matches
+    return ("regex", (compile_pattern(pattern, timed=False), repl))
+
+
+def _remove_accents(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    if text.isascii():
+        return text
+    return ACCENTS_REGEX.sub("", text)
+
+
+def _step_function(kind: str, arg: Any) -> Callable[[str], str]:
+    if kind == "accents":
+        return _remove_accents
+    if kind == "lower":
+        return str.lower
+    if kind == "literal":
+        return lambda text: text.replace(arg[0], arg[1])
+    if kind == "regex":
+        return lambda text: arg[0].sub(arg[1], text)
+    return lambda text: re.sub(arg[0], arg[1], text)
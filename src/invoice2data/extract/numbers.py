@@ -0,0 +1,115 @@
+"""Number coercion of the fields with the `int` and `float` types.
+
+`InvoiceTemplate.parse_number` checks the separators of each value and
+removes them with `str.replace` and a regex substitution. The
+`decimal_separator` template option is compiled once into a
+`NumberParser`, shared by all templates using the same option, which
+parses whole columns of values:
+
+- values without separators are converted as they are,
+- other values are converted with one `str.translate`, removing the
+  thousands separators, apostrophes and whitespace and replacing the
+  decimal separator with a dot.
+
+The results are the ones of `parse_number` and `coerce_type` on each value.
+"""
+
+import re
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+
+# Values holding one of these characters need their separators removed, as
+# checked by `parse_number`
+SEPARATORS_REGEX = re.compile(r"[,.'\\s]")
+
+# Characters removed from numbers with the thousands separators, as
+# `THOUSANDS_SEPARATORS_REGEX` of the templates: apostrophes and whitespace,
+# whose last character is U+3000
+REMOVED_REGEX = re.compile(r"[\s']")
+REMOVED_CHARS = "".join(
+    chr(code) for code in range(0x3001) if REMOVED_REGEX.match(chr(code))
+)
+
+_parsers: Dict[str, "NumberParser"] = {}
+
+
+class NumberParser:
+    """Compiled number parsing of a template.
+
+    Args:
+        decimal_separator (Any): The decimal separator of the numbers.
+    """
+
+    def __init__(self, decimal_separator: Any = ".") -> None:
+        self.decimal_separator = decimal_separator
+        self.translation: Optional[Dict[int, Optional[str]]] = None
+        if isinstance(decimal_separator, str) and len(decimal_separator) == 1:
+            thousands_separator = "," if decimal_separator == "." else "."
+            # Characters removed before the decimal separator is replaced win
+            translation: Dict[int, Optional[str]] = {ord(decimal_separator): "."}
+            for char in thousands_separator + REMOVED_CHARS:
+                translation[ord(char)] = None
+            self.translation = translation
+
+    @classmethod
+    def for_options(cls, options: Dict[str, Any]) -> "NumberParser":
+        """Return the number parser of template options, shared between templates.
+
+        Args:
+            options (Dict[str, Any]): The template options.
+
+        Returns:
+            NumberParser: The number parser for the options.
+        """
+        decimal_separator = options.get("decimal_separator", ".")
+        if not isinstance(decimal_separator, str):
+            # Rejected by `parse_column` when a number has separators
+            return cls(decimal_separator)
+        parser = _parsers.get(decimal_separator)
+        if parser is None:
+            parser = _parsers[decimal_separator] = cls(decimal_separator)
+        return parser
+
+    def parse_column(self, values: Iterable[str], template_name: Any) -> List[float]:
+        """Parse numbers, like `parse_number` on each value.
+
+        Args:
+            values (Iterable[str]): The numbers, as found in the document.
+            template_name (Any): The name of the template, for the errors.
+
+        Returns:
+            List[float]: The numbers.
+
+        Raises:
+            AssertionError: If a value holds several decimal separators.
+        """
+        decimal_separator = self.decimal_separator
+        translation = self.translation
+        search = SEPARATORS_REGEX.search
+        numbers = []
+        for value in values:
+            assert isinstance(value, str)
+            if not search(value):
+                numbers.append(float(value))
+                continue
+
+            assert isinstance(decimal_separator, str)
+            assert value.count(decimal_separator) < 2, (
+                f"Error in Template {template_name}: "
+                "Decimal separator cannot be present several times"
+            )
+            if translation is not None:
+                numbers.append(float(value.translate(translation)))
+            else:
+                numbers.append(float(self._replace_separators(value)))
+        return numbers
+
+    def _replace_separators(self, value: str) -> str:
+        """Replace the separators of a value as `parse_number` does."""
+        thousands_separator = "," if self.decimal_separator == "." else "."
+        value = REMOVED_REGEX.sub("", value.replace(thousands_separator, ""))
+        return value.replace(self.decimal_separator, ".")
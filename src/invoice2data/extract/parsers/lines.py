@@ -3,15 +3,32 @@
 Initial work and maintenance by Holger Brunn @hbrunn
 """
 
+import functools
+import itertools
 import re
 from logging import getLogger
 from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
 from typing import Match
 from typing import Optional
+from typing import Pattern
+from typing import Tuple
 from typing import Union
 
+from ..columns import Columns
+from ..patterns import SearchMemo
+from ..patterns import compile_pattern
+from ..patterns import get_engine
+from ..patterns import get_timeout
+from ..patterns import is_anchored
+from ..patterns import iter_split
+from ..patterns import prefix_groups
+from ..patterns import search_from
+
 
 # from ..invoice_template import InvoiceTemplate  # type: ignore[unused-ignore]
 
@@ -19,6 +36,16 @@ logger = getLogger(__name__)
 
 DEFAULT_OPTIONS = {"line_separator": r"\n"}
 
+# Kinds of the lines of a block, and the keys of their patterns in a rule
+FIRST_LINE = "first_line"
+LAST_LINE = "last_line"
+SKIP_LINE = "skip_line"
+LINE = "line"
+MATCHED_KEYS = (FIRST_LINE, LAST_LINE, SKIP_LINE, LINE)
+
+# Number of rows whose types are coerced together
+COERCE_BATCH_SIZE = 256
+
 
 def parse_line(patterns: Union[str, List[str]], line: str) -> Optional[Match[str]]:
     """Parse a line using a given pattern or list of patterns.
@@ -36,13 +63,173 @@ def parse_line(patterns: Union[str, List[str]], line: str) -> Optional[Match[str
     """
     patterns = patterns if isinstance(patterns, list) else [patterns]
     for pattern in patterns:
-        match = re.search(pattern, line)
+        match = compile_pattern(pattern).search(line)
         if match:
             return match
     return None
 
 
-def parse_block(  # noqa: RUF100 C901
+class LineMatcher:
+    """Classify the lines of a block with one regex evaluation per line.
+
+    The `first_line`, `last_line`, `skip_line` and `line` patterns of a
+    rule are combined into one alternation, tried in this order at the
+    start of the line. Each alternative looks ahead for one pattern
+    anywhere in the line, like `re.search`, and ends with an empty group
+    telling which pattern matched. The first pattern found wins, as when
+    the patterns are searched one after the other.
+
+    The group names of each pattern get a prefix in the alternation, as
+    patterns often use the same names. Rules with patterns referring to
+    their groups or setting global flags are searched one pattern at a time.
+
+    Args:
+        first_line (Tuple[str, ...]): Patterns starting a row.
+        last_line (Tuple[str, ...]): Patterns ending a row.
+        skip_line (Tuple[str, ...]): Patterns of lines to ignore in a row.
+        line (Tuple[str, ...]): Patterns of the lines of a row.
+    """
+
+    def __init__(
+        self,
+        first_line: Tuple[str, ...],
+        last_line: Tuple[str, ...],
+        skip_line: Tuple[str, ...],
+        line: Tuple[str, ...],
+    ) -> None:
+        # Patterns tried outside of a row, and in a row, in order
+        self.first_patterns = [(FIRST_LINE, pattern) for pattern in first_line]
+        self.patterns = self.first_patterns + [
+            (kind, pattern)
+            for kind, patterns in (
+                (LAST_LINE, last_line),
+                (SKIP_LINE, skip_line),
+                (LINE, line),
+            )
+            for pattern in patterns
+        ]
+        self.first_dispatcher = _dispatcher(self.first_patterns)
+        self.dispatcher = _dispatcher(self.patterns)
+
+    @classmethod
+    def for_settings(cls, settings: Dict[str, Any]) -> "LineMatcher":
+        """Return the matcher of the patterns of a rule, built once.
+
+        Args:
+            settings (Dict[str, Any]): The settings of the rule.
+
+        Returns:
+            LineMatcher: The matcher of the rule.
+        """
+        return _line_matcher(
+            get_engine(),
+            get_timeout(),
+            *(_patterns(settings.get(key)) for key in MATCHED_KEYS),
+        )
+
+    def classify(
+        self, line: str, in_row: bool
+    ) -> Tuple[Optional[str], Optional[Dict[str, Optional[str]]]]:
+        """Find the first pattern matching a line.
+
+        Args:
+            line (str): The line.
+            in_row (bool): Whether a row was started by a first line, in
+                which case all the patterns are tried, else only the
+                first line patterns.
+
+        Returns:
+            Tuple[Optional[str], Optional[Dict[str, Optional[str]]]]: The
+                kind of the matching pattern (FIRST_LINE, LAST_LINE,
+                SKIP_LINE or LINE) and the values of its named groups, or
+                None and None if no pattern matches. Skipped lines have no
+                values.
+        """
+        dispatcher = self.dispatcher if in_row else self.first_dispatcher
+        if dispatcher is None:
+            for kind, pattern in self.patterns if in_row else self.first_patterns:
+                match = compile_pattern(pattern).search(line)
+                if match:
+                    return kind, None if kind == SKIP_LINE else match.groupdict()
+            return None, None
+
+        combined, alternatives = dispatcher
+        match = combined.match(line)
+        if not match:
+            return None, None
+        kind, names, first_group = alternatives[match.lastindex]  # type: ignore[index]
+        if kind == SKIP_LINE:
+            return kind, None
+        values = match.groups()[first_group : first_group + len(names)]
+        return kind, dict(zip(names, values))
+
+
+# Alternation of the patterns of a rule, and the kind, group names and index
+# of the first group of each alternative, by index of its tag group
+Dispatcher = Tuple[Pattern[str], Dict[int, Tuple[str, List[str], int]]]
+
+
+@functools.lru_cache(maxsize=None)
+def _line_matcher(
+    engine: str, timeout: Optional[float], *patterns: Tuple[str, ...]
+) -> LineMatcher:
+    """Return the matcher of patterns, shared by the rules using them.
+
+    Matchers hold patterns compiled by the engine, with the timeout of
+    their matches, they are kept by engine and timeout.
+    """
+    return LineMatcher(*patterns)
+
+
+def _patterns(value: Union[str, List[str], None]) -> Tuple[str, ...]:
+    """Return the patterns of a setting, which may be one or a list."""
+    if value is None:
+        return ()
+    return tuple(value) if isinstance(value, list) else (value,)
+
+
+def _dispatcher(patterns: List[Tuple[str, str]]) -> Optional[Dispatcher]:
+    """Combine patterns into an alternation, tagging each with a group.
+
+    Returns None if there is no pattern, or if a pattern can't be combined.
+    """
+    # Any skip line pattern skips the line, so they are searched at once
+    alternatives: List[Tuple[str, List[str]]] = []
+    for kind, pattern in patterns:
+        if kind == SKIP_LINE and alternatives and alternatives[-1][0] == SKIP_LINE:
+            alternatives[-1][1].append(pattern)
+        else:
+            alternatives.append((kind, [pattern]))
+
+    parts = []
+    tags = {}
+    groups = 0
+    for i, (kind, alternative) in enumerate(alternatives):
+        combined = []
+        names: List[str] = []
+        for j, pattern in enumerate(alternative):
+            prefixed = prefix_groups(pattern, "_%s_%s_" % (i, j))
+            if prefixed is None:
+                return None
+            combined.append(prefixed[0])
+            names += prefixed[1]
+        # Patterns starting the line are only tried at its start
+        if all(is_anchored(pattern) for pattern in alternative):
+            lookahead = "(?=(?:%s))"
+        else:
+            lookahead = r"(?=[\s\S]*?(?:%s))"
+        parts.append((lookahead + "(?P<_%s>)") % ("|".join(combined), i))
+        tags[groups + len(names) + 1] = (kind, names, groups)
+        groups += len(names) + 1
+    if not parts:
+        return None
+    try:
+        return compile_pattern("|".join(parts)), tags
+    except re.error:
+        return None
+
+
+def parse_block(
     template: Dict[str, Any],
     field: str,
     settings: Dict[str, Any],
@@ -65,6 +252,30 @@ def parse_block(  # noqa: RUF100 C901
         List[Dict[str, Any]]: A list of dictionaries, where each dictionary
                                 represents an extracted row with field-value pairs.
     """
+    return list(iter_block(template, field, settings, content))
+
+
+def iter_block(
+    template: Dict[str, Any],
+    field: str,
+    settings: Dict[str, Any],
+    content: str,
+) -> Iterator[Dict[str, Any]]:
+    """Iterate over the rows of a block of lines, as they are completed.
+
+    The block is read line by line, without splitting it first. The rows
+    are yielded by batches of `COERCE_BATCH_SIZE` rows at most, the types
+    of each batch being coerced column by column.
+
+    Args:
+        template (Dict[str, Any]): The template containing extraction rules.
+        field (str): The name of the field to extract.
+        settings (Dict[str, Any]): The settings for the extraction rule.
+        content (str): The text content to parse.
+
+    Yields:
+        Dict[str, Any]: The extracted rows with field-value pairs.
+    """
     # Validate settings
     assert "line" in settings, (
         "Error in Template %s Line regex missing" % template["template_name"]
@@ -72,7 +283,21 @@ def parse_block(  # noqa: RUF100 C901
 
     logger.debug("START lines block content ========================\n%s", content)
     logger.debug("END lines block content ==========================")
-    lines: List[Dict[str, Any]] = []
+    types = settings.get("types", [])
+    rows = _iter_block_rows(settings, content)
+    if not types:
+        yield from rows
+        return
+    batch = list(itertools.islice(rows, COERCE_BATCH_SIZE))
+    while batch:
+        yield from coerce_rows(template, batch, types)
+        batch = list(itertools.islice(rows, COERCE_BATCH_SIZE))
+
+
+def _iter_block_rows(  # noqa: RUF100 C901
+    settings: Dict[str, Any], content: str
+) -> Iterator[Dict[str, Any]]:
+    """Iterate over the rows of a block of lines, with their values as found."""
     current_row: Dict[str, Any] = {}
 
     # We assume that structured line fields may either be individual lines or
@@ -88,82 +313,79 @@ def parse_block(  # noqa: RUF100 C901
     # As first_line and last_line are optional, if neither were provided,
     # set the first_line to be the provided line parameter.
     # In this way the code will simply loop through and extract the lines as expected.
+    # The settings of the template are left unchanged, they are shared.
     if "first_line" not in settings and "last_line" not in settings:
-        settings["first_line"] = settings["line"]
+        settings = dict(settings, first_line=settings["line"])
+    matcher = LineMatcher.for_settings(settings)
     # As we enter the loop, we set the boolean for first_line being found to False,
     # This indicates the we are looking for the first_line pattern
     first_line_found = False
-    for line in re.split(settings["line_separator"], content):
+    for line in iter_split(settings["line_separator"], content):
         # If the line has empty lines in it , skip them
-        if not line.strip("").strip("\n").strip("\r") or not line:
+        if not line or not line.strip("").strip("\n").strip("\r"):
             continue
-        if "first_line" in settings:
-            # Check if the current lines the first_line pattern
-            match = parse_line(settings["first_line"], line)
-            if match:
-                # The line matches the first_line pattern so append current row to output
-                # then assign a new current_row
-                if current_row:
-                    lines.append(current_row)
-                current_row = {
-                    field: value.strip() if value else ""
-                    for field, value in match.groupdict().items()
-                }
-                # Flip first_line_found boolean as first_line has been found
-                # This will allow last_line and line to be matched on below
-                first_line_found = True
-                continue
-        # Look for line or last_line only if the first has has been found
-        if first_line_found is True:
-            # If last_line was provided, check that
-            if "last_line" in settings:
-                # last_line pattern provided, so check if the current line is that line
-                match = parse_line(settings["last_line"], line)
-                if match:
-                    # This is the last_line, so parse all lines thus far,
-                    # append to output,
-                    # and reset current_row
-                    current_row = parse_current_row(match, current_row)
-                    if current_row:
-                        lines.append(current_row)
-                    current_row = {}
-                    # Flip first_line_found boolean to look for first_line again on next loop
-                    first_line_found = False
-                    continue
-            # Next we see if this is a line that should be skipped
-            if "skip_line" in settings:
-                # If skip_line was provided, check for a match now
-                if isinstance(settings["skip_line"], list):
-                    # Accepts a list
-                    skip_line_results = [
-                        re.search(x, line) for x in settings["skip_line"]
-                    ]
-                else:
-                    # Or a simple string
-                    skip_line_results = [re.search(settings["skip_line"], line)]
-                if any(skip_line_results):
-                    # There was at least one match to a skip_line
-                    logger.debug("skip_line match on \ns*%s*", line)
-                    continue
-            # If none of those have continued the loop, check if this is just a normal line
-            match = parse_line(settings["line"], line)
-            if match:
-                # This is one of the lines between first_line and last_line
-                # Parse the data and add it to the current_row
-                current_row = parse_current_row(match, current_row)
-                continue
-        # If the line doesn't match anything, log and continue to next line
-        logger.debug("The following line doesn't match anything:\n*%s*", line)
+        # Look for line or last_line only if the first line has been found
+        kind, values = matcher.classify(line, first_line_found)
+        if kind == FIRST_LINE:
+            # The line matches the first_line pattern so output the current row
+            # then assign a new current_row
+            if current_row:
+                yield current_row
+            current_row = {
+                field: value.strip() if value else ""
+                for field, value in (values or {}).items()
+            }
+            # Flip first_line_found boolean as first_line has been found
+            # This will allow last_line and line to be matched on below
+            first_line_found = True
+        elif kind == LAST_LINE:
+            # This is the last_line, so parse all lines thus far,
+            # output the row,
+            # and reset current_row
+            current_row = merge_values(values, current_row)
+            if current_row:
+                yield current_row
+            current_row = {}
+            # Flip first_line_found boolean to look for first_line again on next loop
+            first_line_found = False
+        elif kind == SKIP_LINE:
+            # There was at least one match to a skip_line
+            logger.debug("skip_line match on \ns*%s*", line)
+        elif kind == LINE:
+            # This is one of the lines between first_line and last_line
+            # Parse the data and add it to the current_row
+            current_row = merge_values(values, current_row)
+        else:
+            # If the line doesn't match anything, log and continue to next line
+            logger.debug("The following line doesn't match anything:\n*%s*", line)
     if current_row:
-        # All lines processed, so append whatever the final current_row was to output
-        lines.append(current_row)
+        # All lines processed, so output whatever the final current_row was
+        yield current_row
 
-    types = settings.get("types", [])
-    for row in lines:
-        for name in row.keys():
-            if name in types:
-                row[name] = template.coerce_type(row[name], types[name])  # type: ignore[attr-defined]
-    return lines
+
+def coerce_rows(
+    template: Dict[str, Any], rows: List[Dict[str, Any]], types: Dict[str, str]
+) -> List[Dict[str, Any]]:
+    """Coerce the values of rows to the types of the rule, column by column.
+
+    Args:
+        template (Dict[str, Any]): The template, coercing the values.
+        rows (List[Dict[str, Any]]): The rows, updated in place.
+        types (Dict[str, str]): The types of the row fields.
+
+    Returns:
+        List[Dict[str, Any]]: The rows.
+    """
+    for name, target_type in types.items():
+        found = [row for row in rows if name in row]
+        if not found:
+            continue
+        values = template.coerce_column(  # type: ignore[attr-defined]
+            [row[name] for row in found], target_type
+        )
+        for row, value in zip(found, values):
+            row[name] = value
+    return rows
 
 
 def parse_by_rule(
@@ -183,6 +405,41 @@ def parse_by_rule(
     Returns:
         List[Dict[str, Any]]: The parsed lines.
     """
+    return list(iter_by_rule(template, field, rule, content))
+
+
+def iter_by_rule(
+    template: Dict[str, Any],
+    field: str,
+    rule: Dict[str, Any],
+    content: str,
+) -> Iterator[Dict[str, Any]]:
+    """Iterate over the lines of all the blocks of text found by a rule.
+
+    Args:
+        template (Dict[str, Any]): The template dictionary.
+        field (str): The field name.
+        rule (Dict[str, Any]): The rule dictionary.
+        content (str): The text content to parse.
+
+    Yields:
+        Dict[str, Any]: The parsed lines.
+    """
+    settings = rule_settings(template, rule)
+    blocks = iter_blocks(settings["start"], settings["end"], content)
+    yield from _iter_blocks_lines(template, field, settings, content, blocks)
+
+
+def rule_settings(template: Dict[str, Any], rule: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the settings of a rule, with the default options.
+
+    Args:
+        template (Dict[str, Any]): The template dictionary.
+        rule (Dict[str, Any]): The rule dictionary.
+
+    Returns:
+        Dict[str, Any]: The settings of the rule.
+    """
     # First apply default options.
     settings = DEFAULT_OPTIONS.copy()
     settings.update(rule)
@@ -194,37 +451,68 @@ def parse_by_rule(
     assert "end" in settings, (
         "Error in Template %s Lines end regex missing" % template["template_name"]
     )
+    return settings
 
-    blocks_count = 0
-    lines = []
 
-    # Try finding & parsing blocks of lines one by one
+def iter_blocks(
+    start: str,
+    end: str,
+    content: str,
+    search: Callable[[str, str, int], Optional[Tuple[int, int]]] = search_from,
+) -> Iterator[Tuple[int, int]]:
+    """Iterate over the blocks of text between a start and an end pattern.
+
+    Args:
+        start (str): The pattern before each block.
+        end (str): The pattern after each block.
+        content (str): The text content to search.
+        search (Callable[[str, str, int], Optional[Tuple[int, int]]]): The
+            search of a pattern from a position, `search_from` by default.
+
+    Yields:
+        Tuple[int, int]: The start and end of each block in the content.
+    """
+    # Try finding blocks of lines one by one, searching from the end of the
+    # previous block instead of copying the rest of the content
+    pos = 0
     while True:
-        start = re.search(settings["start"], content)
-        if not start:
+        start_span = search(start, content, pos)
+        if not start_span:
             logger.debug("Failed to find lines block start")
-            break
-        content = content[start.end() :]
+            return
 
-        end = re.search(settings["end"], content)
-        if not end:
+        end_span = search(end, content, start_span[1])
+        if not end_span:
             logger.debug("Failed to find lines block end")
-            break
+            return
 
-        blocks_count += 1
-        lines += parse_block(template, field, settings, content[0 : end.start()])
+        yield start_span[1], end_span[0]
+        pos = end_span[1]
 
-        content = content[end.end() :]
+
+def _iter_blocks_lines(
+    template: Dict[str, Any],
+    field: str,
+    settings: Dict[str, Any],
+    content: str,
+    blocks: Iterable[Tuple[int, int]],
+) -> Iterator[Dict[str, Any]]:
+    """Iterate over the lines of blocks of text, warning if there are none."""
+    blocks_count = 0
+    lines_count = 0
+    for start, end in blocks:
+        blocks_count += 1
+        for line in iter_block(template, field, settings, content[start:end]):
+            lines_count += 1
+            yield line
 
     if blocks_count == 0:
         logger.warning(
             'Failed to find any matching block (part) of invoice for "%s"', field
         )
-    elif not lines:
+    elif not lines_count:
         logger.warning('Failed to find any lines for "%s"', field)
 
-    return lines
-
 
 def parse(
     template: Dict[str, Any],
@@ -243,6 +531,54 @@ def parse(
     Returns:
         List[Dict[str, Any]]: The parsed lines.
     """
+    return list(iter_lines(template, field, settings, content))
+
+
+def parse_columns(
+    template: Dict[str, Any],
+    field: str,
+    settings: Dict[str, Any],
+    content: str,
+) -> Columns:
+    """Parse lines from the content into columns.
+
+    Gives the lines of `parse` as one column per field, each row being
+    added to the columns as soon as it's parsed.
+
+    Args:
+        template (Dict[str, Any]): The template dictionary.
+        field (str): The field name.
+        settings (Dict[str, Any]): The settings dictionary.
+        content (str): The text content to parse.
+
+    Returns:
+        Columns: The parsed lines, `Columns.to_rows` giving the list of
+            `parse`.
+    """
+    return Columns(iter_lines(template, field, settings, content))
+
+
+def iter_lines(
+    template: Dict[str, Any],
+    field: str,
+    settings: Dict[str, Any],
+    content: str,
+) -> Iterator[Dict[str, Any]]:
+    """Iterate lazily over the lines found in the content.
+
+    Yields the items of `parse` one by one, parsing the content only as far
+    as the lines are consumed, so documents with many lines don't need to
+    be held as a list of rows.
+
+    Args:
+        template (Dict[str, Any]): The template dictionary.
+        field (str): The field name.
+        settings (Dict[str, Any]): The settings dictionary.
+        content (str): The text content to parse.
+
+    Yields:
+        Dict[str, Any]: The parsed lines, with their types coerced.
+    """
     if "rules" in settings:
         # One field can have multiple sets of line-parsing rules
         rules = settings["rules"]
@@ -251,14 +587,26 @@ def parse(
         keys = ("start", "end", "line", "first_line", "last_line", "skip_line", "types")
         rules = [{k: v for k, v in settings.items() if k in keys}]
 
-    lines = []
-    for i, rule in enumerate(rules):
-        logger.debug("Testing Rules set #%s", i)
-        new_lines = parse_by_rule(template, field, rule, content)
-        if new_lines is not None:
-            lines += new_lines
+    # Find the blocks of all the rules first, in one pass over the rules:
+    # rules with the same start and end patterns share their blocks, and
+    # the searches of a pattern shared by several rules are reused
+    rules_settings = [rule_settings(template, rule) for rule in rules]
+    searches = SearchMemo(content)
+    blocks: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+    for rule in rules_settings:
+        boundaries = (rule["start"], rule["end"])
+        if boundaries not in blocks:
+            blocks[boundaries] = list(
+                iter_blocks(*boundaries, content, searches.search)
+            )
 
-    return lines
+    # Then parse the blocks rule by rule, giving the lines in the same order
+    for i, rule in enumerate(rules_settings):
+        logger.debug("Testing Rules set #%s", i)
+        boundaries = (rule["start"], rule["end"])
+        yield from _iter_blocks_lines(
+            template, field, rule, content, blocks[boundaries]
+        )
 
 
 def parse_current_row(
@@ -274,10 +622,29 @@ def parse_current_row(
         Dict[str, Any]: The updated current row dictionary.
     """
     if match:
-        for field, value in match.groupdict().items():
-            current_row[field] = "%s%s%s" % (
-                current_row.get(field, ""),
-                (current_row.get(field, "") and "\n") or "",
-                value.strip() if value else "",
-            )
+        merge_values(match.groupdict(), current_row)
+    return current_row
+
+
+def merge_values(
+    values: Optional[Dict[str, Optional[str]]], current_row: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Add the values of a line to the current row.
+
+    Values of fields already in the row are appended on a new line.
+
+    Args:
+        values (Optional[Dict[str, Optional[str]]]): The values of the
+            named groups of the line.
+        current_row (Dict[str, Any]): The current row dictionary.
+
+    Returns:
+        Dict[str, Any]: The updated current row dictionary.
+    """
+    for field, value in (values or {}).items():
+        current_row[field] = "%s%s%s" % (
+            current_row.get(field, ""),
+            (current_row.get(field, "") and "\n") or "",
+            value.strip() if value else "",
+        )
     return current_row
@@ -12,13 +12,13 @@ For more detailed parsing "type" and "group" settings can be specified.
 """
 
 import logging
-import re
 from collections import OrderedDict
 from typing import Any
 from typing import Dict
 from typing import List
 from typing import Optional
 
+from ..patterns import compile_pattern
 from ..utils import _apply_grouping
 
 
@@ -81,7 +81,7 @@ def _extract_matches(settings: Dict[str, Any], content: str) -> Optional[List[An
             )
             continue
 
-        matches = re.findall(regex, content)
+        matches = compile_pattern(regex).findall(content)
         logger.debug(
             "field=\033[1m\033[93m%s\033[0m | regex=\033[36m%s\033[0m | matches=\033[1m\033[92m%s\033[0m",
             settings.get("field", ""),
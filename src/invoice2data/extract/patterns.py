@@ -0,0 +1,475 @@
+"""Store of compiled regular expressions shared by all templates.
+
+Templates compile their patterns once when they are loaded. Parsers and
+plugins look up the compiled patterns here instead of passing raw pattern
+strings to the `re` module, whose internal cache is limited to 512 entries.
+
+The patterns are compiled by the selected engine, see `set_engine`:
+
+- `re`, the default, holds the GIL while it matches,
+- `regex`, the `regex` module, matching with `concurrent=True` so threads
+  match texts in parallel.
+
+Matches can be limited in time, see `set_timeout` and `match_timeout`:
+patterns are then compiled by the `regex` module, whatever the engine,
+and raise `TimeoutError` when a match takes longer.
+"""
+
+import contextlib
+import functools
+import re
+from contextvars import ContextVar
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Pattern
+from typing import Tuple
+from typing import cast
+
+
+# Keys holding regexes in the settings of the lines parser and plugin
+LINES_PATTERN_KEYS = (
+    "start",
+    "end",
+    "line",
+    "first_line",
+    "last_line",
+    "skip_line",
+    "line_separator",
+)
+
+# Keys holding regexes in the settings of the tables plugin
+TABLES_PATTERN_KEYS = ("start", "end", "body", "line_separator")
+
+# Tokens of a pattern, to find the constructs reading the text before the
+# position a search starts at: `^`, `\A`, `\b`, `\B` and lookbehinds. Other
+# escapes and negated character sets are matched to be skipped
+LOOKBEHIND_TOKENS = re.compile(r"\\.|\[\^|\^|\(\?<[=!]", re.DOTALL)
+LOOKBEHIND_CONSTRUCTS = frozenset(("^", "\\A", "\\b", "\\B", "(?<=", "(?<!"))
+
+# Tokens of a pattern, to rename its groups: escapes, character sets,
+# comments, group openings and closings and alternations. Group references
+# and global flags can't be kept when patterns are combined
+GROUP_TOKENS = re.compile(
+    r"\\(?P<escape>.)"
+    r"|\[\^?\]?(?:\\.|[^\]])*\]"
+    r"|\(\?#[^)]*\)"
+    r"|(?P<group>\((?:\?P<(?P<name>\w+)>)?(?!\?))"
+    r"|(?P<unsupported>\(\?(?:P=|\(|[aiLmsux]+\)))"
+    r"|(?P<open>\()"
+    r"|(?P<close>\))"
+    r"|(?P<branch>\|)",
+    re.DOTALL,
+)
+
+# Methods of the patterns compiled by the regex module, matching concurrently
+CONCURRENT_METHODS = (
+    "search",
+    "match",
+    "fullmatch",
+    "findall",
+    "finditer",
+    "split",
+    "sub",
+    "subn",
+)
+
+
+class ConcurrentPattern:
+    """A pattern compiled by the `regex` module, releasing the GIL to match.
+
+    Has the methods of a compiled `re` pattern used by the parsers, which
+    pass `concurrent=True`, and the timeout if any, to the `regex` pattern.
+
+    Args:
+        compiled (Any): The pattern compiled by the `regex` module.
+        timeout (Optional[float]): The maximum duration of a match, in
+            seconds, or None for no limit.
+    """
+
+    def __init__(self, compiled: Any, timeout: Optional[float] = None) -> None:
+        self.compiled = compiled
+        self.timeout = timeout
+        self.pattern: str = compiled.pattern
+        self.flags: int = compiled.flags
+        self.groups: int = compiled.groups
+        self.groupindex: Dict[str, int] = dict(compiled.groupindex)
+        options: Dict[str, Any] = {"concurrent": True}
+        if timeout is not None:
+            options["timeout"] = timeout
+        for name in CONCURRENT_METHODS:
+            setattr(self, name, functools.partial(getattr(compiled, name), **options))
+
+
+def _compile_regex(pattern: str, timeout: Optional[float] = None) -> Pattern[str]:
+    """Compile a pattern with the `regex` module, like `re.compile`."""
+    # Imported here, the regex module is only needed when it is selected
+    import regex  # type: ignore[import-untyped]
+
+    try:
+        compiled = regex.compile(pattern)
+    except regex.error as error:
+        # Reported as the errors of the re module
+        raise re.error(str(error), pattern) from error
+    # Matches like a compiled re pattern
+    return cast(Pattern[str], ConcurrentPattern(compiled, timeout))
+
+
+# Functions compiling the patterns, by engine name
+ENGINES: Dict[str, Callable[[str], Pattern[str]]] = {
+    "re": re.compile,
+    "regex": _compile_regex,
+}
+
+_engine = "re"
+# Compiled patterns of each engine, and of the selected one
+_caches: Dict[str, Dict[str, Pattern[str]]] = {}
+_compiled: Dict[str, Pattern[str]] = _caches.setdefault(_engine, {})
+# Compiled patterns limited in time, by pattern and timeout
+_timed: Dict[Tuple[str, float], Pattern[str]] = {}
+
+# Maximum duration of a match, for all templates and in the current context
+_default_timeout: Optional[float] = None
+_timeout: ContextVar[Optional[float]] = ContextVar("regex_timeout", default=None)
+
+
+def set_engine(name: str) -> None:
+    """Select the engine compiling the patterns, for all templates.
+
+    Templates loaded before keep the normalization patterns of the
+    previous engine, so the engine is selected before loading them.
+
+    Args:
+        name (str): The name of the engine, a key of `ENGINES`.
+
+    Raises:
+        ValueError: If the engine is unknown.
+    """
+    global _engine, _compiled
+    if name not in ENGINES:
+        raise ValueError(
+            "Unknown regex engine %r, expected one of %s" % (name, ", ".join(ENGINES))
+        )
+    _engine = name
+    _compiled = _caches.setdefault(name, {})
+
+
+def get_engine() -> str:
+    """Return the name of the engine compiling the patterns.
+
+    Returns:
+        str: The name of the selected engine.
+    """
+    return _engine
+
+
+def set_timeout(seconds: Optional[float]) -> None:
+    """Limit the duration of each match, for all templates.
+
+    The duration is checked by `check_timeout`.
+
+    Args:
+        seconds (Optional[float]): The maximum duration of a match, or None
+            for no limit.
+    """
+    global _default_timeout
+    _default_timeout = check_timeout(seconds)
+
+
+def get_timeout() -> Optional[float]:
+    """Return the maximum duration of a match in the current context.
+
+    Returns:
+        Optional[float]: The duration in seconds, or None for no limit.
+    """
+    timeout = _timeout.get()
+    return _default_timeout if timeout is None else timeout
+
+
+@contextlib.contextmanager
+def match_timeout(seconds: Optional[float]) -> Iterator[None]:
+    """Limit the duration of the matches run in the block.
+
+    The duration is checked by `check_timeout`.
+
+    Args:
+        seconds (Optional[float]): The maximum duration of a match, or None
+            for the limit set for all templates.
+
+    Yields:
+        None: The matches of the block are limited.
+    """
+    token = _timeout.set(check_timeout(seconds))
+    try:
+        yield
+    finally:
+        _timeout.reset(token)
+
+
+def check_timeout(seconds: Optional[float]) -> Optional[float]:
+    """Check the maximum duration of a match.
+
+    Args:
+        seconds (Optional[float]): The duration, or None for no limit.
+
+    Returns:
+        Optional[float]: The duration.
+
+    Raises:
+        ValueError: If the duration isn't a positive number.
+    """
+    if seconds is not None and (
+        isinstance(seconds, bool)
+        or not isinstance(seconds, (int, float))
+        or seconds <= 0
+    ):
+        raise ValueError("Invalid regex timeout %r, expected seconds > 0" % (seconds,))
+    return seconds
+
+
+def compile_pattern(pattern: str, timed: bool = True) -> Pattern[str]:
+    """Return the compiled version of a pattern, compiling it only once.
+
+    Args:
+        pattern (str): The regular expression.
+        timed (bool): Whether the matches are limited in time, as set by
+            `set_timeout` and `match_timeout`. Defaults to True.
+
+    Returns:
+        Pattern[str]: The regular expression compiled by the selected engine,
+            or by the `regex` module when the matches are limited in time.
+    """
+    timeout = get_timeout() if timed else None
+    if timeout is not None:
+        return _compile_timed(pattern, timeout)
+    try:
+        return _compiled[pattern]
+    except KeyError:
+        compiled = _compiled[pattern] = ENGINES[_engine](pattern)
+        return compiled
+
+
+def _compile_timed(pattern: str, timeout: float) -> Pattern[str]:
+    """Return a pattern compiled once, whose matches are limited in time."""
+    try:
+        return _timed[pattern, timeout]
+    except KeyError:
+        compiled = _timed[pattern, timeout] = _compile_regex(pattern, timeout)
+        return compiled
+
+
+def search_from(pattern: str, string: str, pos: int) -> Optional[Tuple[int, int]]:
+    """Search a pattern in the end of a string, starting at a position.
+
+    Gives the same match as searching `string[pos:]`, without copying the
+    end of the string unless the pattern reads the text before the match.
+
+    Args:
+        pattern (str): The regular expression.
+        string (str): The string to search.
+        pos (int): The position to start the search at.
+
+    Returns:
+        Optional[Tuple[int, int]]: The start and end of the match in `string`,
+            or None if the pattern isn't found.
+    """
+    if _looks_behind(pattern):
+        match = compile_pattern(pattern).search(string[pos:])
+        return (match.start() + pos, match.end() + pos) if match else None
+    match = compile_pattern(pattern).search(string, pos)
+    return match.span() if match else None
+
+
+def prefix_groups(pattern: str, prefix: str) -> Optional[Tuple[str, List[str]]]:
+    """Rename the groups of a pattern, to combine it with other patterns.
+
+    Named groups get a prefix, so patterns using the same group names can
+    be combined, and other groups are made non-capturing. The pattern
+    matches the same text.
+
+    Args:
+        pattern (str): The regular expression.
+        prefix (str): The prefix of the group names.
+
+    Returns:
+        Optional[Tuple[str, List[str]]]: The pattern with the renamed groups
+            and the names of its groups in order, or None if the pattern
+            refers to its groups or sets global flags.
+    """
+    parts = []
+    names = []
+    last = 0
+    for token in GROUP_TOKENS.finditer(pattern):
+        if token["unsupported"] or (token["escape"] or "0") in "123456789":
+            return None
+        if token["group"]:
+            parts.append(pattern[last : token.start()])
+            if token["name"]:
+                names.append(token["name"])
+                parts.append("(?P<%s%s>" % (prefix, token["name"]))
+            else:
+                parts.append("(?:")
+            last = token.end()
+    parts.append(pattern[last:])
+    return "".join(parts), names
+
+
+def is_anchored(pattern: str) -> bool:
+    r"""Return whether all the matches of a pattern start the string.
+
+    True for patterns starting with `^` or `\A` outside of an alternation,
+    without the multiline flag, which can't be set in the middle of a
+    pattern.
+
+    Args:
+        pattern (str): The regular expression.
+
+    Returns:
+        bool: True if the pattern only matches at the start of the string.
+    """
+    if not pattern.startswith(("^", "\\A")):
+        return False
+    depth = 0
+    for token in GROUP_TOKENS.finditer(pattern):
+        if token["unsupported"] and "m" in token["unsupported"]:
+            return False
+        if token["group"] or token["open"]:
+            depth += 1
+        elif token["close"]:
+            depth -= 1
+        elif token["branch"] and depth == 0:
+            return False
+    return True
+
+
+def iter_split(pattern: str, string: str) -> Iterator[Optional[str]]:
+    """Iterate over the parts of a string split by a pattern.
+
+    Yields the items of `re.split(pattern, string)`, including the groups
+    captured by the pattern, without building the list of all the parts.
+
+    Args:
+        pattern (str): The regular expression of the separator.
+        string (str): The string to split.
+
+    Yields:
+        Optional[str]: The parts of the string, and the captured groups.
+    """
+    last = 0
+    for match in compile_pattern(pattern).finditer(string):
+        yield string[last : match.start()]
+        yield from match.groups()
+        last = match.end()
+    yield string[last:]
+
+
+class SearchMemo:
+    """Searches of patterns in a string, reused by the searches they answer.
+
+    When a search from a position finds a match, or none, a search of the
+    same pattern from any position up to the start of that match gives the
+    same result. The last search of each pattern is kept, so rules sharing
+    a pattern search the string once.
+
+    Args:
+        string (str): The string searched.
+    """
+
+    def __init__(self, string: str) -> None:
+        self.string = string
+        self._last: Dict[str, Tuple[int, Optional[Tuple[int, int]]]] = {}
+
+    def search(self, pattern: str, string: str, pos: int) -> Optional[Tuple[int, int]]:
+        """Search a pattern from a position, like `search_from`.
+
+        Args:
+            pattern (str): The regular expression.
+            string (str): The string to search, the one of the memo.
+            pos (int): The position to start the search at.
+
+        Returns:
+            Optional[Tuple[int, int]]: The start and end of the match, or
+                None if the pattern isn't found.
+        """
+        assert string is self.string
+        last = self._last.get(pattern)
+        if last is not None:
+            last_pos, span = last
+            if last_pos <= pos and (span is None or pos <= span[0]):
+                return span
+        span = search_from(pattern, string, pos)
+        # Searches of patterns reading the text before their position give
+        # results depending on the position
+        if not _looks_behind(pattern):
+            self._last[pattern] = (pos, span)
+        return span
+
+
+@functools.lru_cache(maxsize=None)
+def _looks_behind(pattern: str) -> bool:
+    """Return whether a search from a position may differ from a slice search."""
+    return any(
+        token in LOOKBEHIND_CONSTRUCTS for token in LOOKBEHIND_TOKENS.findall(pattern)
+    )
+
+
+def iter_template_patterns(template: Any) -> Iterator[Tuple[str, str]]:
+    """Iterate over all the regexes used by a template.
+
+    Args:
+        template (Any): The template (InvoiceTemplate or dict).
+
+    Yields:
+        Tuple[str, str]: The field name and the pattern.
+    """
+    for field, settings in (template.get("fields") or {}).items():
+        yield from _iter_field_patterns(field, settings)
+
+    if "lines" in template:
+        yield from _iter_lines_patterns("lines", template["lines"])
+
+    for i, table in enumerate(template.get("tables") or []):
+        if not isinstance(table, dict):
+            continue
+        for key in TABLES_PATTERN_KEYS:
+            yield from _iter_values("tables[%s].%s" % (i, key), table.get(key))
+
+    replaces = (template.get("options") or {}).get("replace") or []
+    if not isinstance(replaces, list):
+        replaces = [replaces]
+    for replace in replaces:
+        if isinstance(replace, (list, tuple)) and replace:
+            yield from _iter_values("options.replace", replace[0])
+
+
+def _iter_field_patterns(field: str, settings: Any) -> Iterator[Tuple[str, str]]:
+    if isinstance(settings, dict):
+        if settings.get("parser") == "regex":
+            yield from _iter_values(field, settings.get("regex"))
+        elif settings.get("parser") == "lines":
+            yield from _iter_lines_patterns(field, settings)
+    elif not field.startswith("static_"):
+        # Legacy syntax, the value is the regex itself
+        yield from _iter_values(field, settings)
+
+
+def _iter_lines_patterns(field: str, settings: Any) -> Iterator[Tuple[str, str]]:
+    if not isinstance(settings, dict):
+        return
+    rules = settings.get("rules") or [settings]
+    for rule in rules:
+        if not isinstance(rule, dict):
+            continue
+        for key in LINES_PATTERN_KEYS:
+            yield from _iter_values("%s.%s" % (field, key), rule.get(key))
+
+
+def _iter_values(field: str, value: Any) -> Iterator[Tuple[str, str]]:
+    values = value if isinstance(value, list) else [value]
+    for pattern in values:
+        # Non-string values are reported by the parsers
+        if isinstance(pattern, str):
+            yield field, pattern
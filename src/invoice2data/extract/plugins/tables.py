@@ -1,12 +1,14 @@
 """Plugin to extract tables from an invoice."""
 
-import re
 from collections import OrderedDict
 from logging import getLogger
 from typing import Any
 from typing import Dict
+from typing import List
 from typing import Optional
 
+from ..columns import Columns
+from ..patterns import compile_pattern
 from ..utils import _apply_grouping
 
 
@@ -14,6 +16,10 @@ logger = getLogger(__name__)
 
 DEFAULT_OPTIONS = {"field_separator": r"\s+", "line_separator": r"\n"}
 
+# Coercions of the fields named after dates and amounts, whatever their types
+DATE_FIELD = "date field"
+AMOUNT_FIELD = "amount field"
+
 
 def extract(
     self: "OrderedDict[str, Any]", content: str, output: Dict[str, Any]
@@ -38,15 +44,11 @@ def extract(
         if table is None:
             continue
 
-        # Extract table body
-        table_body = _extract_table_body(content, table)
-        if table_body is None:
-            continue
-
-        # Process table lines
-        table_data = _process_table_lines(self, table, table_body)
-        if table_data is None:
+        # Extract the table rows, as columns
+        columns = _extract_table_columns(self, table, content)
+        if columns is None:
             continue
+        table_data = columns.to_fields()
 
         # Apply grouping to individual fields within table_data
         for field, field_settings in table.get("fields", {}).items():
@@ -60,6 +62,51 @@ def extract(
     return output
 
 
+def extract_columns(
+    self: "OrderedDict[str, Any]", content: str
+) -> List[Optional[Columns]]:
+    """Extract the rows of the tables of an invoice, as columns.
+
+    The columns hold the values `extract` outputs before grouping them,
+    `Columns.to_fields` giving them by field.
+
+    Args:
+        self (InvoiceTemplate): The current instance of the class.  # noqa: DOC103
+        content (str): The content of the invoice.
+
+    Returns:
+        List[Optional[Columns]]: The columns of each table of the template,
+            or None for the tables not found or failing to parse.
+    """
+    tables = []
+    for table in self["tables"]:
+        table = _extract_and_validate_settings(self, table)
+        tables.append(
+            None if table is None else _extract_table_columns(self, table, content)
+        )
+    return tables
+
+
+def _extract_table_columns(
+    self: "OrderedDict[str, Any]", table: Dict[str, Any], content: str
+) -> Optional[Columns]:
+    """Extract the rows of a table as columns.
+
+    Args:
+        self (InvoiceTemplate): The current instance of the class.  # noqa: DOC103
+        table (Dict[str, Any]): The validated table settings.
+        content (str): The content of the invoice.
+
+    Returns:
+        Optional[Columns]: The rows of the table, or None if the table
+            isn't found or a date can't be parsed.
+    """
+    table_body = _extract_table_body(content, table)
+    if table_body is None:
+        return None
+    return _process_table_lines(self, table, table_body)
+
+
 def _extract_and_validate_settings(
     self: "OrderedDict[str, Any]",
     table: Dict[str, Any],
@@ -96,8 +143,8 @@ def _extract_table_body(content: str, table: Dict[str, Any]) -> Optional[str]:
         Optional[str]: The extracted table body, or None if start or end
                        regexes are not found.
     """
-    start = re.search(table["start"], content)
-    end = re.search(table["end"], content)
+    start = compile_pattern(table["start"]).search(content)
+    end = compile_pattern(table["end"]).search(content)
 
     if not start:
         logger.debug("Failed to find the start of the table")
@@ -117,105 +164,134 @@ def _process_table_lines(
     self: "OrderedDict[str, Any]",
     table: Dict[str, Any],
     table_body: str,
-) -> Optional[Dict[str, Any]]:
+) -> Optional[Columns]:
     """Process the lines within the table body.
 
+    The values of all the lines are read first, then their types are
+    coerced column by column.
+
     Args:
         self (InvoiceTemplate): The current instance of the class.  # noqa: DOC103
         table (Dict[str, Any]): The validated table settings.
         table_body (str): The extracted table body.
 
     Returns:
-        List[Dict[str, Any]]: A list of dictionaries, where each dictionary
-                              represents a row in the table.
+        Optional[Columns]: The rows of the table, one per matching line, or
+            None if a date can't be parsed.
     """
-    types = table.get("types", {})
-    no_match_found = True
-    line_output: Dict[str, Any] = {}
-    for line in re.split(table["line_separator"], table_body):
+    rows = []
+    for line in compile_pattern(table["line_separator"]).split(table_body):
         if not line.strip("").strip("\n") or line.isspace():
             continue
 
-        # Correct the function call and return logic
-        if not _process_table_line(self, table, line, types, line_output):
-            return None  # Return None immediately if line parsing fails
-        else:
-            no_match_found = (
-                False  # Update no_match_found only if line processing is successful
-            )
+        row = _process_table_line(table, line)
+        if row is not None:
+            rows.append(row)
 
-    if no_match_found:
+    if not rows:
         logger.debug(
             "\033[1;43mWarning\033[0m regex=\033[91m*%s*\033[0m doesn't match anything!",
             table["body"],
         )
 
-    return line_output
+    if not _coerce_table_rows(self, table, rows):
+        return None  # Return None if a date can't be parsed
+    return Columns(rows)
 
 
-def _process_table_line(  # noqa: C901
-    self: "OrderedDict[str, Any]",
-    table: Dict[str, Any],
-    line: str,
-    types: Dict[str, Any],
-    output: Dict[str, Any],
-) -> bool:
+def _process_table_line(table: Dict[str, Any], line: str) -> Optional[Dict[str, Any]]:
     """Process a single line within the table body.
 
     Args:
-        self (InvoiceTemplate): The current instance of the class.
         table (Dict[str, Any]): The validated table settings.
         line (str): A single line from the table body.
-        types (Dict[str, Any]): A dictionary of type coercion rules.
-        output (Dict[str, Any]): A dictionary to store the extracted data.
 
     Returns:
-        bool: True if processing is successful, False if date parsing fails.
+        Optional[Dict[str, Any]]: The values of the line, as found, or None
+            if the line doesn't match.
     """
-    match = re.search(table["body"], line)
-    if match:
-        for field, value in match.groupdict().items():
-            logger.debug(
-                (
-                    "field=\033[1m\033[93m%s\033[0m |"
-                    "regex=\033[36m%s\033[0m | "
-                    "matches=\033[1m\033[92m['%s']\033[0m"
-                ),
-                field,
-                match.re.pattern,
-                value,
-            )
-
-            if field.startswith("date") or field.endswith("date"):
-                value = self.parse_date(value)  # type: ignore[attr-defined]
-                if not value:
-                    logger.error("Date parsing failed on date *%s*", value)
-                    return False
-            elif field.startswith("amount"):
-                value = self.parse_number(value)  # type: ignore[attr-defined]
-            elif field in types:
-                value = self.coerce_type(value, types[field])  # type: ignore[attr-defined]
-            elif table.get("fields"):
-                # Writing templates is hard. So we also support the following format
-                # In case someone mixup syntax
-                # fields:
-                #    example_field:
-                #      type: float
-                #      group: sum
-                field_set = table["fields"].get(field, {})
-                if "type" in field_set:
-                    value = self.coerce_type(value, field_set.get("type"))  # type: ignore[attr-defined]
-
-            if field in output:
-                # Ensure output[field] is a list before appending
-                if not isinstance(output[field], list):
-                    output[field] = [output[field]]
-                output[field].append(value)
-            else:
-                output[field] = value
-        # Return True if a match is found and processed successfully
-        return True
-    else:
+    match = compile_pattern(table["body"]).search(line)
+    if not match:
         logger.debug("The following line doesn't match anything:\n*%s*", line)
-        # Return True to continue processing even if a line doesn't match
+        return None
+    row = match.groupdict()
+    for field, value in row.items():
+        logger.debug(
+            (
+                "field=\033[1m\033[93m%s\033[0m |"
+                "regex=\033[36m%s\033[0m | "
+                "matches=\033[1m\033[92m['%s']\033[0m"
+            ),
+            field,
+            match.re.pattern,
+            value,
+        )
+    return row
+
+
+def _coerce_table_rows(
+    self: "OrderedDict[str, Any]", table: Dict[str, Any], rows: List[Dict[str, Any]]
+) -> bool:
+    """Coerce the values of the table rows, column by column.
+
+    Dates are parsed first. When a date can't be parsed, only the rows
+    before its own are coerced, as the lines after it are not processed.
+
+    Args:
+        self (InvoiceTemplate): The current instance of the class.
+        table (Dict[str, Any]): The validated table settings.
+        rows (List[Dict[str, Any]]): The rows, updated in place.
+
+    Returns:
+        bool: True if processing is successful, False if date parsing fails.
+    """
+    if not rows:
         return True
+    coercions = [(field, _field_type(table, field)) for field in rows[0]]
+    dates = [field for field, target_type in coercions if target_type == DATE_FIELD]
+
+    failed = failed_date = None
+    for field in dates:
+        values = self.coerce_column([row[field] for row in rows[:failed]], "date")  # type: ignore[attr-defined]
+        for i, value in enumerate(values):
+            if not value:
+                failed, failed_date = i, rows[i][field]
+                break
+            rows[i][field] = value
+    if failed is not None:
+        logger.error("Date parsing failed on date *%s*", failed_date)
+        rows = rows[:failed]
+
+    for field, target_type in coercions:
+        if target_type is None or target_type == DATE_FIELD:
+            continue
+        column = [row[field] for row in rows]
+        if target_type == AMOUNT_FIELD:
+            values = self.number_parser.parse_column(column, self["template_name"])  # type: ignore[attr-defined]
+        else:
+            values = self.coerce_column(column, target_type)  # type: ignore[attr-defined]
+        for row, value in zip(rows, values):
+            row[field] = value
+    return failed is None
+
+
+def _field_type(table: Dict[str, Any], field: str) -> Optional[str]:
+    """Return the type a table field is coerced to, if any."""
+    types = table.get("types", {})
+    if field.startswith("date") or field.endswith("date"):
+        return DATE_FIELD
+    elif field.startswith("amount"):
+        return AMOUNT_FIELD
+    elif field in types:
+        return types[field]
+    elif table.get("fields"):
+        # Writing templates is hard. So we also support the following format
+        # In case someone mixup syntax
+        # fields:
+        #    example_field:
+        #      type: float
+        #      group: sum
+        field_set = table["fields"].get(field, {})
+        if "type" in field_set:
+            return field_set.get("type")
+    return None
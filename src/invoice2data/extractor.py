@@ -0,0 +1,567 @@
+"""Extraction of documents by a session keeping its state between documents.
+
+Loading the templates, opening the text cache and starting threads cost
+more than extracting a small document. An `Extractor` is built once with
+its templates, input reader and cache settings, and extracts any number of
+documents with them until it is closed. `extract_data` uses a default
+extractor with the built-in templates, loaded on its first call.
+
+`Extractor.extract_async` and `extract_data_async` extract documents in an
+event loop, the subprocesses of the input modules running without a thread
+per document.
+"""
+
+import os
+import threading
+from logging import getLogger
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+from weakref import WeakKeyDictionary
+
+from .extract.invoice_template import InvoiceTemplate
+from .extract.keyword_index import KeywordIndex
+from .extract.loader import read_templates
+from .extract.normalizer import NormalizationMemo
+from .input import InputReaders
+from .input import cache
+from .input.cache import DEFAULT_MAX_SIZE
+from .input.cache import TextCache
+
+
+logger = getLogger(__name__)
+
+# Input modules are imported when selected, see `InputReaders`
+input_mapping = InputReaders(
+    {
+        "pdftotext": "pdftotext",
+        "tesseract": "tesseract",
+        "pdfminer": "pdfminer_wrapper",
+        "pdfplumber": "pdfplumber",
+        "gvision": "gvision",
+        "text": "text",
+        "ocrmypdf": "ocrmypdf",
+    }
+)
+
+
+class Extractor:
+    """Extract documents with templates, an input reader and caches kept alive.
+
+    Templates are frozen once loaded, so the threads of `extract_many`
+    share them, as well as the compiled patterns, the date parsers and the
+    text cache.
+
+    Args:
+        template_folders (Union[str, Iterable[str], None]): Folders of YAML
+            templates, read once.
+        built_in_templates (bool): Also use the built-in templates, after
+            the templates of the folders. Default: True
+        templates (Optional[List[InvoiceTemplate]]): Templates already
+            loaded, used instead of reading any folder.
+        input_reader (Any): Name of the input reader, or input module,
+            extracting the text of the documents. Default: `text` for .txt
+            files, `pdftotext` for the others.
+        template_cache (bool): Store the prepared templates in a cache file
+            of the user cache directory. Default: False
+        lazy_templates (bool): Only read the keywords of the templates, and
+            load a template when a document matches it. Default: False
+        text_cache_dir (Optional[str]): Folder of a persistent cache of the
+            extracted texts. Default: no cache
+        text_cache_size (int): Maximum size of the text cache, in bytes.
+        jobs (Optional[int]): Number of threads of `extract_many`, and of
+            documents extracted at once by `extract_async` in an event loop.
+            Default: the number of CPUs
+    """
+
+    def __init__(
+        self,
+        template_folders: Union[str, Iterable[str], None] = None,
+        built_in_templates: bool = True,
+        templates: Optional[List[InvoiceTemplate]] = None,
+        input_reader: Any = None,
+        template_cache: bool = False,
+        lazy_templates: bool = False,
+        text_cache_dir: Optional[str] = None,
+        text_cache_size: int = DEFAULT_MAX_SIZE,
+        jobs: Optional[int] = None,
+    ) -> None:
+        if templates is None:
+            if isinstance(template_folders, str):
+                template_folders = [template_folders]
+            templates = load_templates(
+                list(template_folders or []),
+                not built_in_templates,
+                template_cache,
+                lazy=lazy_templates,
+            )
+        self.templates = templates
+        self.input_module = (
+            input_mapping[input_reader]
+            if isinstance(input_reader, str)
+            else input_reader
+        )
+        self.text_cache = (
+            TextCache(text_cache_dir, text_cache_size) if text_cache_dir else None
+        )
+        self.jobs = jobs or os.cpu_count() or 1
+        self._executor: Any = None
+        self._semaphores: WeakKeyDictionary = WeakKeyDictionary()  # type: ignore[type-arg]
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def extract(self, path: str) -> Dict[str, Any]:
+        """Extract the data of a document.
+
+        Args:
+            path (str): Path of the document.
+
+        Returns:
+            Dict[str, Any]: Extracted and matched fields, empty if no
+            template matches.
+
+        Raises:
+            ValueError: If the extractor is closed.
+        """
+        if self._closed:
+            raise ValueError("Extractor is closed")
+        return extract_file(path, self.templates, self.input_module, self.text_cache)
+
+    def extract_many(self, paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Extract documents in threads, yielding results in the order of the paths.
+
+        The thread pool is started on the first call and kept until the
+        extractor is closed. An exception raised for a document is raised
+        when its result is reached.
+
+        Args:
+            paths (Iterable[str]): Paths of the documents.
+
+        Yields:
+            Dict[str, Any]: Extracted and matched fields of each document.
+
+        Raises:
+            ValueError: If the extractor is closed.
+        """
+        if self._closed:
+            raise ValueError("Extractor is closed")
+        if self.jobs == 1:
+            yield from map(self.extract, paths)
+            return
+        yield from self._pool().map(self.extract, paths)
+
+    async def extract_async(self, path: str) -> Dict[str, Any]:
+        """Extract the data of a document without blocking the event loop.
+
+        At most `jobs` documents are extracted at once in an event loop, the
+        others wait for them. See `extract_file_async`, the blocking calls
+        run in the threads of the extractor.
+
+        Args:
+            path (str): Path of the document.
+
+        Returns:
+            Dict[str, Any]: Extracted and matched fields, empty if no
+            template matches.
+
+        Raises:
+            ValueError: If the extractor is closed.
+        """
+        if self._closed:
+            raise ValueError("Extractor is closed")
+        async with self.limit():
+            return await extract_file_async(
+                path, self.templates, self.input_module, self.text_cache, self._pool()
+            )
+
+    def limit(self) -> Any:
+        """Return the semaphore limiting the documents extracted in the event loop.
+
+        Returns:
+            asyncio.Semaphore: The semaphore, of `jobs` documents.
+        """
+        return _semaphore(self._semaphores, self.jobs)
+
+    def _pool(self) -> Any:
+        """Return the thread pool of the extractor, started on the first call."""
+        with self._lock:
+            if self._executor is None:
+                # Imported here, threads are only needed to extract several files
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.jobs, thread_name_prefix="invoice2data"
+                )
+            return self._executor
+
+    def close(self) -> None:
+        """Stop the threads and close the text cache of the extractor."""
+        self._closed = True
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+        if self.text_cache is not None:
+            self.text_cache.close()
+
+    def __enter__(self) -> "Extractor":  # noqa: PYI034
+        """Return the extractor, closed when leaving the context."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the extractor."""
+        self.close()
+
+
+_default: Optional[Extractor] = None
+_default_lock = threading.Lock()
+
+
+# Documents extracted at once by `extract_data_async` with given templates,
+# by event loop
+_limits: WeakKeyDictionary = WeakKeyDictionary()  # type: ignore[type-arg]
+_limits_lock = threading.Lock()
+
+
+def _semaphore(semaphores: WeakKeyDictionary, size: int) -> Any:  # type: ignore[type-arg]
+    """Return the semaphore of the running event loop, created on the first call."""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    with _limits_lock:
+        semaphore = semaphores.get(loop)
+        if semaphore is None:
+            semaphore = semaphores[loop] = asyncio.Semaphore(size)
+        return semaphore
+
+
+def default_extractor() -> Extractor:
+    """Return the extractor of `extract_data`, with the built-in templates.
+
+    Returns:
+        Extractor: The default extractor, built on the first call.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Extractor()
+        return _default
+
+
+def extract_file(
+    invoicefile: str,
+    templates: List[InvoiceTemplate],
+    input_module: Any = None,
+    text_cache: Optional[TextCache] = None,
+) -> Dict[str, Any]:
+    """Extract the data of a document with the first template matching its text.
+
+    Args:
+        invoicefile (str): Path of the document.
+        templates (List[InvoiceTemplate]): Templates matched against the text.
+        input_module (Any): Name of the input reader, or input module.
+            Default: `text` for .txt files, `pdftotext` for the others.
+        text_cache (Optional[TextCache]): Persistent cache of the extracted
+            texts. Default: always extract the text
+
+    Returns:
+        Dict[str, Any]: Extracted and matched fields, empty if no template
+        matches.
+    """
+    input_module = _input_module(invoicefile, input_module)
+    extracted_str = cache.to_text(input_module, invoicefile, text_cache=text_cache)
+    if not _has_text(extracted_str, invoicefile, input_module):
+        return {}
+
+    output = _extract_matching(
+        extracted_str, templates, invoicefile, input_module, text_cache
+    )
+    if output is not None:
+        return output  # Return directly if match found
+
+    # If no template matches, try OCR fallback
+    if _ocrmypdf_fallback(input_module):
+        extracted_str, invoicefile, templates_matched = extract_data_fallback_ocrmypdf(
+            invoicefile, templates, input_module, text_cache
+        )
+        if templates_matched:
+            template = templates_matched[0]
+            return template.extract(
+                extracted_str, invoicefile, input_module, text_cache
+            )
+
+    logger.error("No template for %s", invoicefile)
+    return {}
+
+
+async def extract_file_async(
+    invoicefile: str,
+    templates: List[InvoiceTemplate],
+    input_module: Any = None,
+    text_cache: Optional[TextCache] = None,
+    executor: Any = None,
+) -> Dict[str, Any]:
+    """Extract the data of a document without blocking the event loop.
+
+    The text is extracted by asyncio subprocesses when the input module has
+    a `to_text_async` function, in the executor otherwise. The template is
+    applied in the executor, as it matches the text in Python.
+
+    Args:
+        invoicefile (str): Path of the document.
+        templates (List[InvoiceTemplate]): Templates matched against the text.
+        input_module (Any): Name of the input reader, or input module.
+            Default: `text` for .txt files, `pdftotext` for the others.
+        text_cache (Optional[TextCache]): Persistent cache of the extracted
+            texts. Default: always extract the text
+        executor (Any): Executor of the blocking calls. Default: the default
+            executor of the event loop
+
+    Returns:
+        Dict[str, Any]: Extracted and matched fields, empty if no template
+        matches.
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    input_module = _input_module(invoicefile, input_module)
+    extracted_str = await cache.to_text_async(
+        input_module, invoicefile, text_cache=text_cache, executor=executor
+    )
+    if not _has_text(extracted_str, invoicefile, input_module):
+        return {}
+
+    # Matching the templates scans the whole text, it runs in the executor too
+    output = await loop.run_in_executor(
+        executor,
+        _extract_matching,
+        extracted_str,
+        templates,
+        invoicefile,
+        input_module,
+        text_cache,
+    )
+    if output is not None:
+        return output  # type: ignore[no-any-return]
+
+    # If no template matches, try OCR fallback
+    if await loop.run_in_executor(executor, _ocrmypdf_fallback, input_module):
+        logger.debug("Trying OCR extraction with ocrmypdf")
+        extracted_str = await cache.to_text_async(
+            input_mapping["ocrmypdf"],
+            invoicefile,
+            text_cache=text_cache,
+            executor=executor,
+        )
+        output = await loop.run_in_executor(
+            executor,
+            _extract_ocrmypdf_text,
+            extracted_str,
+            templates,
+            invoicefile,
+            input_module,
+            text_cache,
+        )
+        if output is not None:
+            return output  # type: ignore[no-any-return]
+
+    logger.error("No template for %s", invoicefile)
+    return {}
+
+
+async def extract_data_async(
+    invoicefile: str,
+    templates: Optional[List[InvoiceTemplate]] = None,
+    input_module: Any = None,
+    text_cache: Optional[TextCache] = None,
+) -> Dict[str, Any]:
+    """Extracts structured data from PDF/image invoices in an event loop.
+
+    As `extract_data`, with the pdftotext, tesseract and ocrmypdf readers
+    running in asyncio subprocesses. At most as many documents as CPUs are
+    extracted at once in an event loop, the others wait for them, see
+    `Extractor.extract_async` for another limit.
+
+    Args:
+        invoicefile (str): Path of electronic invoice file in PDF, JPEG, PNG
+        templates (Optional[List[InvoiceTemplate]]): List of instances of class `InvoiceTemplate`.
+                                            Defaults to the built-in templates.
+        input_module (Any, optional): Library to be used to extract text
+                                        from the given `invoicefile`.
+        text_cache (Optional[TextCache]): Persistent cache of the extracted texts.
+                                        Defaults to None (always extract the text).
+
+    Returns:
+        Dict[str, Any]: Extracted and matched fields, or an empty dict if no template matches.
+
+    Examples:
+        When using `invoice2data` in an asyncio application:
+
+        >>> import asyncio
+        >>> async def main(paths):
+        ...     return await asyncio.gather(*map(extract_data_async, paths))
+    """
+    import asyncio
+
+    if templates:
+        limit = _semaphore(_limits, os.cpu_count() or 1)
+    else:
+        # The built-in templates are loaded once, out of the event loop
+        extractor = await asyncio.get_running_loop().run_in_executor(
+            None, default_extractor
+        )
+        templates = extractor.templates
+        limit = extractor.limit()
+    async with limit:
+        return await extract_file_async(
+            invoicefile, templates, input_module, text_cache
+        )
+
+
+def extract_data_fallback_ocrmypdf(
+    invoicefile: str,
+    templates: List[InvoiceTemplate],
+    input_module: Any,
+    text_cache: Optional[TextCache] = None,
+) -> Tuple[str, str, List[InvoiceTemplate]]:
+    logger.debug("Trying OCR extraction with ocrmypdf")
+    extracted_str = cache.to_text(
+        input_mapping["ocrmypdf"], invoicefile, text_cache=text_cache
+    )
+    # Return empty list if no template is matched
+    return extracted_str, invoicefile, _ocrmypdf_templates(extracted_str, templates)
+
+
+def _input_module(invoicefile: str, input_module: Any) -> Any:
+    """Return the input module of a reader name, or the default one of a file."""
+    if isinstance(input_module, str):
+        return input_mapping[input_module]
+    if input_module is None:
+        return input_mapping[
+            "text" if invoicefile.lower().endswith(".txt") else "pdftotext"
+        ]
+    return input_module
+
+
+def _has_text(extracted_str: Any, invoicefile: str, input_module: Any) -> bool:
+    """Return whether a text was extracted, logging the text or the failure."""
+    if not isinstance(extracted_str, str) or not extracted_str.strip():
+        logger.error(
+            "Failed to extract text from %s using %s",
+            invoicefile,
+            input_module.__name__,
+        )
+        return False
+
+    logger.debug(
+        "START pdftotext result ===========================\n%s", extracted_str
+    )
+    logger.debug("END pdftotext result =============================")
+    return True
+
+
+def _extract_matching(
+    extracted_str: str,
+    templates: List[InvoiceTemplate],
+    invoicefile: str,
+    input_module: Any,
+    text_cache: Optional[TextCache],
+) -> Optional[Dict[str, Any]]:
+    """Extract the fields of the first template matching a text, if any.
+
+    When a matching template can't parse its required fields, the next
+    matching templates are tried, the error of the first one is raised if
+    none of them can.
+    """
+    templates_matched: List[InvoiceTemplate] = KeywordIndex.for_templates(
+        templates
+    ).candidates(extracted_str)
+    # Candidates with the same normalization options share one prepared text
+    memo = NormalizationMemo()
+    errors = []
+    for template in templates_matched:
+        logger.info("Using %s template", template["template_name"])
+        optimized_str = template.prepare_input(extracted_str, memo)
+        try:
+            return template.extract(
+                optimized_str, invoicefile, input_module, text_cache
+            )
+        except ValueError as error:
+            if len(templates_matched) == 1:
+                raise
+            logger.warning(
+                "Template %s failed on %s: %s",
+                template["template_name"],
+                invoicefile,
+                error,
+            )
+            errors.append(error)
+    if errors:
+        raise errors[0]
+    return None
+
+
+def _extract_ocrmypdf_text(
+    extracted_str: str,
+    templates: List[InvoiceTemplate],
+    invoicefile: str,
+    input_module: Any,
+    text_cache: Optional[TextCache],
+) -> Optional[Dict[str, Any]]:
+    """Extract the fields of the template matching the text of ocrmypdf, if any."""
+    templates_matched = _ocrmypdf_templates(extracted_str, templates)
+    if not templates_matched:
+        return None
+    return templates_matched[0].extract(
+        extracted_str, invoicefile, input_module, text_cache
+    )
+
+
+def _ocrmypdf_fallback(input_module: Any) -> bool:
+    """Return whether to extract the text again with ocrmypdf."""
+    ocrmypdf = input_mapping["ocrmypdf"]
+    if ocrmypdf.ocrmypdf_available() and input_module is not ocrmypdf:
+        logger.debug("Text extraction failed, falling back to ocrmypdf")
+        return True
+    return False
+
+
+def _ocrmypdf_templates(
+    extracted_str: str, templates: List[InvoiceTemplate]
+) -> List[InvoiceTemplate]:
+    """Return the templates matching the text of ocrmypdf, by priority."""
+    templates_matched: List[InvoiceTemplate] = KeywordIndex.for_templates(
+        templates
+    ).candidates(extracted_str)
+    templates_matched.sort(key=lambda k: k["priority"], reverse=True)
+    return templates_matched
+
+
+def load_templates(
+    template_folders: List[str],
+    exclude_built_in_templates: bool,
+    use_cache: bool = False,
+    rebuild_cache: bool = False,
+    lazy: bool = False,
+) -> List[InvoiceTemplate]:
+    """Load templates from the specified folders, then the built-in templates."""
+    templates = []
+    for template_folder in template_folders:
+        templates.extend(
+            read_templates(
+                os.path.abspath(template_folder),
+                use_cache=use_cache,
+                rebuild_cache=rebuild_cache,
+                lazy=lazy,
+            )
+        )
+    if not exclude_built_in_templates:
+        templates.extend(
+            read_templates(use_cache=use_cache, rebuild_cache=rebuild_cache, lazy=lazy)
+        )
+    return templates
@@ -1 +1,34 @@
-"""Initialize the Input modules."""
+"""Initialize the Input modules.
+
+Input modules are only imported when they are selected, as some of them
+import large libraries or cloud SDKs.
+"""
+
+import importlib
+from types import ModuleType
+from typing import Dict
+from typing import Iterator
+from typing import Mapping
+
+
+class InputReaders(Mapping[str, ModuleType]):
+    """Input modules by reader name, imported on first access.
+
+    Args:
+        modules (Dict[str, str]): Module name in this package, by reader name.
+    """
+
+    def __init__(self, modules: Dict[str, str]) -> None:
+        self._modules = modules
+
+    def __getitem__(self, name: str) -> ModuleType:
+        """Import and return the input module of a reader."""
+        return importlib.import_module("%s.%s" % (__name__, self._modules[name]))
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the reader names."""
+        return iter(self._modules)
+
+    def __len__(self) -> int:
+        """Return the number of readers."""
+        return len(self._modules)
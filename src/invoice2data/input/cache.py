@@ -0,0 +1,418 @@
+"""Persistent cache of the text extracted by the input modules.
+
+Running pdftotext, tesseract or ocrmypdf again on a document which was
+already processed gives the same text. The cache stores extracted texts in
+a SQLite database, keyed by the hash of the file content, the input module
+and its backend, its options and the area to extract. The least recently
+used texts are evicted when the database grows over its maximum size.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from logging import getLogger
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+
+logger = getLogger(__name__)
+
+TEXT_CACHE_FILENAME = "invoice2data-text-cache.sqlite3"
+TEXT_CACHE_VERSION = 2
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class TextCache:
+    """SQLite cache of extracted texts with a least recently used eviction.
+
+    Args:
+        directory (str): Folder of the cache database, created if needed.
+        max_size (int): Maximum size of the cached texts, in bytes.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, TEXT_CACHE_FILENAME)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False
+        )
+        # Parallel workers read while another one writes
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA busy_timeout = 30000")
+        with self._connection:
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != TEXT_CACHE_VERSION:
+                self._connection.execute("DROP TABLE IF EXISTS texts")
+                self._connection.execute("DROP TABLE IF EXISTS totals")
+                self._connection.execute(
+                    "PRAGMA user_version = %d" % TEXT_CACHE_VERSION
+                )
+            # `used` is an increasing counter, lowest for least recently used
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS texts ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, "
+                "size INTEGER NOT NULL, used INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS texts_used ON texts (used)"
+            )
+            # The last `used` value and the size of the texts, in a single row
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS totals ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), "
+                "used INTEGER NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "INSERT OR IGNORE INTO totals (id, used, size) VALUES (0, 0, 0)"
+            )
+
+    def to_text(
+        self,
+        input_module: Any,
+        path: str,
+        area_details: Optional[Dict[str, Any]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Return the text of a file, extracting it only if it isn't cached.
+
+        Args:
+            input_module (Any): The input module extracting the text.
+            path (str): Path of the file.
+            area_details (Optional[Dict[str, Any]]): Area to extract, if any.
+            options (Optional[Dict[str, Any]]): Options of the input module,
+                passed as keyword arguments to its `to_text`.
+
+        Returns:
+            str: The extracted text.
+        """
+        return self.cached(
+            functools.partial(_to_text, input_module, path, area_details, options),
+            input_module,
+            path,
+            area_details,
+            options,
+        )
+
+    def cached(
+        self,
+        extract: Callable[[], str],
+        input_module: Any,
+        path: str,
+        area_details: Optional[Dict[str, Any]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Return a cached text, or extract and store it.
+
+        Args:
+            extract (Callable[[], str]): Extracts the text.
+            input_module (Any): The input module extracting the text.
+            path (str): Path of the file.
+            area_details (Optional[Dict[str, Any]]): Area to extract, if any.
+            options (Optional[Dict[str, Any]]): Options of the extraction.
+
+        Returns:
+            str: The extracted text.
+        """
+        key = self.key(input_module, path, area_details, options)
+        text = self.lookup(key, path)
+        if text is not None:
+            return text
+
+        text = extract()
+        # Failed extractions are not cached, they may succeed next time
+        if isinstance(text, str) and text.strip():
+            self.put(key, text)
+        return text
+
+    async def to_text_async(
+        self,
+        input_module: Any,
+        path: str,
+        area_details: Optional[Dict[str, Any]] = None,
+        executor: Any = None,
+    ) -> str:
+        """Return the text of a file, extracting it only if it isn't cached.
+
+        The file is hashed and the database is read and written in the
+        executor, the text is extracted as by the module `to_text_async`.
+
+        Args:
+            input_module (Any): The input module extracting the text.
+            path (str): Path of the file.
+            area_details (Optional[Dict[str, Any]]): Area to extract, if any.
+            executor (Any): Executor of the blocking calls. Default: the
+                default executor of the event loop
+
+        Returns:
+            str: The extracted text.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        key = await loop.run_in_executor(
+            executor, self.key, input_module, path, area_details
+        )
+        text = await loop.run_in_executor(executor, self.lookup, key, path)
+        if text is not None:
+            return text
+
+        text = await _to_text_async(input_module, path, area_details, executor)
+        # Failed extractions are not cached, they may succeed next time
+        if isinstance(text, str) and text.strip():
+            await loop.run_in_executor(executor, self.put, key, text)
+        return text
+
+    def lookup(self, key: str, path: str) -> Optional[str]:
+        """Return a cached text, counting the cache hits and misses.
+
+        Args:
+            key (str): The cache key.
+            path (str): Path of the file.
+
+        Returns:
+            Optional[str]: The text, or None if it isn't cached.
+        """
+        text = self.get(key)
+        # The cache is shared by the threads of an extractor
+        with self._lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if text is not None:
+            logger.debug("Text cache hit for %s", path)
+        return text
+
+    def key(
+        self,
+        input_module: Any,
+        path: str,
+        area_details: Optional[Dict[str, Any]] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Return the cache key of an extraction.
+
+        Args:
+            input_module (Any): The input module extracting the text.
+            path (str): Path of the file.
+            area_details (Optional[Dict[str, Any]]): Area to extract, if any.
+            options (Optional[Dict[str, Any]]): Options of the input module.
+
+        Returns:
+            str: The key, a sha256 hex digest.
+        """
+        backend = getattr(input_module, "backend", None)
+        parts = [
+            self.file_digest(path),
+            input_module.__name__,
+            # pdftotext extracts the text in process or with the command line tool
+            backend() if backend is not None else None,
+            options or {},
+            # Area values are compared as strings, pdftotext converts them
+            {k: str(v) for k, v in area_details.items()} if area_details else None,
+        ]
+        encoded = json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def file_digest(self, path: str) -> str:
+        """Return the sha256 of a file content, hashing each file version once.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            str: The sha256 hex digest.
+        """
+        stat = os.stat(path)
+        version = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        digest = self._digests.get(version)
+        if digest is None:
+            sha256 = hashlib.sha256()
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b""):
+                    sha256.update(chunk)
+            digest = self._digests[version] = sha256.hexdigest()
+        return digest
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached text and mark it as recently used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[str]: The text, or None if it isn't cached.
+        """
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT text FROM texts WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE totals SET used = used + 1")
+            self._connection.execute(
+                "UPDATE texts SET used = (SELECT used FROM totals) WHERE key = ?",
+                (key,),
+            )
+        return str(row[0])
+
+    def put(self, key: str, text: str) -> None:
+        """Store a text, then evict the least recently used texts if needed.
+
+        Args:
+            key (str): The cache key.
+            text (str): The extracted text.
+        """
+        size = len(text.encode("utf-8"))
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT size FROM texts WHERE key = ?", (key,)
+            ).fetchone()
+            replaced = row[0] if row is not None else 0
+            self._connection.execute(
+                "UPDATE totals SET used = used + 1, size = size + ?",
+                (size - replaced,),
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO texts (key, text, size, used) "
+                "VALUES (?, ?, ?, (SELECT used FROM totals))",
+                (key, text, size),
+            )
+            total = self._connection.execute("SELECT size FROM totals").fetchone()[0]
+            if total <= self.max_size:
+                return
+            evicted = []
+            # The index on `used` reads the least recently used texts first
+            for old_key, old_size in self._connection.execute(
+                "SELECT key, size FROM texts ORDER BY used"
+            ):
+                if total <= self.max_size:
+                    break
+                evicted.append((old_key,))
+                total -= old_size
+            self._connection.executemany("DELETE FROM texts WHERE key = ?", evicted)
+            self._connection.execute("UPDATE totals SET size = ?", (total,))
+            logger.debug("Text cache evicted %s texts", len(evicted))
+
+    def clear(self) -> None:
+        """Remove all cached texts."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM texts")
+            self._connection.execute("UPDATE totals SET size = 0")
+
+    def close(self) -> None:
+        """Close the database."""
+        self._connection.close()
+
+
+def to_text(
+    input_module: Any,
+    path: str,
+    area_details: Optional[Dict[str, Any]] = None,
+    text_cache: Optional[TextCache] = None,
+) -> str:
+    """Extract the text of a file, through the text cache if there is one.
+
+    Args:
+        input_module (Any): The input module extracting the text.
+        path (str): Path of the file.
+        area_details (Optional[Dict[str, Any]]): Area to extract, if any.
+        text_cache (Optional[TextCache]): The text cache.
+
+    Returns:
+        str: The extracted text.
+    """
+    if text_cache is None:
+        return _to_text(input_module, path, area_details)
+    return text_cache.to_text(input_module, path, area_details)
+
+
+async def to_text_async(
+    input_module: Any,
+    path: str,
+    area_details: Optional[Dict[str, Any]] = None,
+    text_cache: Optional[TextCache] = None,
+    executor: Any = None,
+) -> str:
+    """Extract the text of a file without blocking the event loop.
+
+    Input modules with a `to_text_async` function extract the text in
+    asyncio subprocesses, the others in the executor.
+
+    Args:
+        input_module (Any): The input module extracting the text.
+        path (str): Path of the file.
+        area_details (Optional[Dict[str, Any]]): Area to extract, if any.
+        text_cache (Optional[TextCache]): The text cache.
+        executor (Any): Executor of the blocking calls. Default: the default
+            executor of the event loop
+
+    Returns:
+        str: The extracted text.
+    """
+    if text_cache is None:
+        return await _to_text_async(input_module, path, area_details, executor)
+    return await text_cache.to_text_async(input_module, path, area_details, executor)
+
+
+def to_bbox_layout(
+    input_module: Any, path: str, text_cache: Optional[TextCache] = None
+) -> str:
+    """Extract the words of a file and their boxes, see `layout.Layout`.
+
+    Args:
+        input_module (Any): The input module, with a `to_bbox_layout` function.
+        path (str): Path of the file.
+        text_cache (Optional[TextCache]): The text cache.
+
+    Returns:
+        str: The XHTML written by `pdftotext -bbox-layout`.
+    """
+    extract = functools.partial(input_module.to_bbox_layout, path)
+    if text_cache is None:
+        return extract()  # type: ignore[no-any-return]
+    return text_cache.cached(extract, input_module, path, options={"bbox_layout": True})
+
+
+def _to_text(
+    input_module: Any,
+    path: str,
+    area_details: Optional[Dict[str, Any]] = None,
+    options: Optional[Dict[str, Any]] = None,
+) -> str:
+    # Input modules without area support only take the path
+    if area_details is None:
+        return input_module.to_text(path, **(options or {}))  # type: ignore[no-any-return]
+    return input_module.to_text(path, area_details, **(options or {}))  # type: ignore[no-any-return]
+
+
+async def _to_text_async(
+    input_module: Any,
+    path: str,
+    area_details: Optional[Dict[str, Any]] = None,
+    executor: Any = None,
+) -> str:
+    to_text = getattr(input_module, "to_text_async", None)
+    if to_text is None:
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, _to_text, input_module, path, area_details
+        )
+    # Input modules without area support only take the path
+    if area_details is None:
+        return await to_text(path)  # type: ignore[no-any-return]
+    return await to_text(path, area_details)  # type: ignore[no-any-return]
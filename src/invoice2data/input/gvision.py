@@ -1,25 +1,43 @@
-"""Google Cloud Vision input module for invoice2data."""
+"""Google Cloud Vision input module for invoice2data.
 
+The Google Cloud SDK is only imported when a file is sent to Cloud Vision.
+"""
+
+import functools
+import importlib.util
 import logging
 import os
+from typing import Any
 from typing import Optional
 
 
 logger = logging.getLogger(__name__)
 
 
-try:
-    import google  # type: ignore[import-not-found] # noqa
-    from google.cloud import storage  # type: ignore[import-not-found]
-    from google.cloud import vision
+@functools.lru_cache(maxsize=None)
+def have_google_cloud() -> bool:
+    """Checks if the Google Cloud Vision and Storage clients are available.
+
+    Returns:
+        bool: True if they are available, False otherwise.
+    """
+    try:
+        return all(
+            importlib.util.find_spec(name) is not None
+            for name in ("google.cloud.storage", "google.cloud.vision")
+        )
+    except ImportError:
+        return False
 
-    GOOGLE_CLOUD_AVAILABLE = True
-except ImportError:
-    GOOGLE_CLOUD_AVAILABLE = False
 
+def __getattr__(name: str) -> Any:
+    """Import the Google Cloud clients when `google` is first accessed."""
+    if name == "google":
+        import google.cloud.storage  # type: ignore[import-not-found]
+        import google.cloud.vision
 
-def have_google_cloud() -> bool:
-    return GOOGLE_CLOUD_AVAILABLE
+        return google
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
 
 def to_text(path: str, bucket_name: Optional[str] = None, language: str = "en") -> str:
@@ -46,6 +64,9 @@ def to_text(path: str, bucket_name: Optional[str] = None, language: str = "en")
             "Install with 'pip install google-cloud-vision' to enable."
         )
         return ""
+    from google.cloud import storage  # type: ignore[import-not-found]
+    from google.cloud import vision
+
     # Supported mime_types are: 'application/pdf' and 'image/tiff'
     mime_type = "application/pdf"
     if bucket_name is None:
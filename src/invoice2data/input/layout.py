@@ -0,0 +1,233 @@
+"""Word-level layout of a PDF, used to extract the text of areas.
+
+Each `area` field runs pdftotext (or the whole OCR pipeline) once more
+with the `-x -y -W -H` crop options. With the `area_layout` template
+option, the document is instead converted once with
+`pdftotext -bbox-layout` and every area is cropped in memory:
+
+- a character is kept when it overlaps the area horizontally and its
+  baseline lies within the area, as pdftotext does,
+- kept characters are laid out in rows and columns like `pdftotext -layout`,
+- each page ends with a form feed.
+
+Character positions are estimated from the word boxes, so the cropped text
+may differ from pdftotext's in the spacing between words.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from logging import getLogger
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+
+logger = getLogger(__name__)
+
+AREA_KEYS = ("f", "l", "r", "x", "y", "W", "H")
+
+# Share of the word height below the baseline, for an average font
+DESCENT_RATIO = 0.2
+
+
+class Word(NamedTuple):
+    """A word and its bounding box, in points."""
+
+    x_min: float
+    y_min: float
+    x_max: float
+    y_max: float
+    text: str
+
+
+class Page(NamedTuple):
+    """A page size, in points, and its words."""
+
+    width: float
+    height: float
+    words: List[Word]
+
+
+class Layout:
+    """Words of all pages of a document.
+
+    Args:
+        pages (List[Page]): The pages of the document.
+    """
+
+    def __init__(self, pages: List[Page]) -> None:
+        self.pages = pages
+
+    @classmethod
+    def from_bbox_layout(cls, xhtml: str) -> "Layout":
+        """Parse the output of `pdftotext -bbox-layout`.
+
+        Args:
+            xhtml (str): The XHTML document written by pdftotext.
+
+        Returns:
+            Layout: The layout of the document.
+        """
+        # Drop the DOCTYPE, referring to an external DTD, and the namespace
+        xhtml = re.sub(r"<!DOCTYPE[^>]*>", "", xhtml, count=1)
+        xhtml = re.sub(r'\sxmlns="[^"]*"', "", xhtml, count=1)
+        # The XHTML is written by pdftotext, not by a third party
+        root = ET.fromstring(xhtml)  # noqa: S314
+        pages = []
+        for page in root.iter("page"):
+            words = [
+                Word(
+                    float(word.get("xMin", 0)),
+                    float(word.get("yMin", 0)),
+                    float(word.get("xMax", 0)),
+                    float(word.get("yMax", 0)),
+                    word.text or "",
+                )
+                for word in page.iter("word")
+            ]
+            pages.append(
+                Page(float(page.get("width", 0)), float(page.get("height", 0)), words)
+            )
+        return cls(pages)
+
+    def crop(self, area_details: Dict[str, Any]) -> str:
+        """Return the text of an area, like `pdftotext -layout` with crop options.
+
+        Args:
+            area_details (Dict[str, Any]): The area, with the first (f) and
+                last (l) pages, the resolution (r), the top-left corner (x, y)
+                and the size (W, H) in pixels at that resolution.
+
+        Returns:
+            str: The text of the area.
+        """
+        for key in AREA_KEYS:
+            assert key in area_details, "Area %s details missing" % key
+        first = max(int(area_details["f"]), 1)
+        last = min(int(area_details["l"]), len(self.pages))
+        scale = 72 / float(area_details["r"])
+        x_min = float(area_details["x"]) * scale
+        y_min = float(area_details["y"]) * scale
+
+        text = []
+        for page in self.pages[first - 1 : last]:
+            # A size of 0 extends the area to the page border, as in pdftotext
+            width = float(area_details["W"]) * scale or page.width - x_min
+            height = float(area_details["H"]) * scale or page.height - y_min
+            fragments = _crop_words(page.words, x_min, y_min, width, height)
+            text.append(_lay_out(fragments) + "\f")
+        return "".join(text)
+
+
+class LazyLayout:
+    """Layout of a document, only converted when an area is first cropped.
+
+    Args:
+        load (Callable[[], str]): Returns the `pdftotext -bbox-layout` XHTML
+            of the document, or an empty string if it can't be converted. An
+            `OSError`, e.g. when only python-poppler is installed and not the
+            pdftotext command, is handled as an empty string.
+    """
+
+    def __init__(self, load: Callable[[], str]) -> None:
+        self._load = load
+        self._layout: Optional[Layout] = None
+        self._loaded = False
+
+    def crop(self, area_details: Dict[str, Any]) -> Optional[str]:
+        """Return the text of an area.
+
+        Args:
+            area_details (Dict[str, Any]): The area, see `Layout.crop`.
+
+        Returns:
+            Optional[str]: The text, or None if the document has no layout.
+        """
+        if not self._loaded:
+            try:
+                xhtml = self._load()
+            except OSError as error:
+                logger.debug("No layout of the document: %s", error)
+                xhtml = ""
+            if xhtml:
+                self._layout = Layout.from_bbox_layout(xhtml)
+            else:
+                logger.warning("Failed to read the layout, areas use pdftotext")
+            self._loaded = True
+        if self._layout is None:
+            return None
+        return self._layout.crop(area_details)
+
+
+def _crop_words(
+    words: List[Word], x_min: float, y_min: float, width: float, height: float
+) -> List[Word]:
+    """Keep the characters inside an area, translated to the area origin."""
+    fragments = []
+    for word in words:
+        baseline = word.y_max - (word.y_max - word.y_min) * DESCENT_RATIO - y_min
+        if not word.text or not 0 <= baseline <= height:
+            continue
+        char_width = (word.x_max - word.x_min) / len(word.text)
+        kept = [
+            i
+            for i in range(len(word.text))
+            if word.x_min + (i + 1) * char_width >= x_min
+            and word.x_min + i * char_width <= x_min + width
+        ]
+        if kept:
+            start, end = kept[0], kept[-1] + 1
+            fragments.append(
+                Word(
+                    word.x_min + start * char_width - x_min,
+                    word.y_min - y_min,
+                    word.x_min + end * char_width - x_min,
+                    word.y_max - y_min,
+                    word.text[start:end],
+                )
+            )
+    return fragments
+
+
+def _lay_out(fragments: List[Word]) -> str:
+    """Write words in rows and columns, as in the physical layout mode."""
+    if not fragments:
+        return ""
+    char_width = sum(f.x_max - f.x_min for f in fragments) / sum(
+        len(f.text) for f in fragments
+    )
+    left = min(f.x_min for f in fragments)
+
+    lines = []
+    rows = _rows(fragments)
+    for i, (y_min, y_max, row) in enumerate(rows):
+        line = ""
+        for fragment in sorted(row):
+            column = int((fragment.x_min - left) / char_width + 0.5)
+            if line:
+                column = max(column, len(line) + 1)
+            line = line.ljust(column) + fragment.text
+        lines.append(line)
+        # Vertical space between rows is kept as blank lines
+        if i + 1 < len(rows) and y_max > y_min:
+            blank_lines = int((rows[i + 1][0] - y_max) / (y_max - y_min) + 0.5)
+            lines.extend([""] * max(blank_lines, 0))
+    return "\n".join(lines) + "\n"
+
+
+def _rows(fragments: List[Word]) -> List[Tuple[float, float, List[Word]]]:
+    """Group words sharing a line, from top to bottom."""
+    rows: List[Tuple[float, float, List[Word]]] = []
+    for fragment in sorted(fragments, key=lambda f: (f.y_min, f.x_min)):
+        middle = (fragment.y_min + fragment.y_max) / 2
+        if rows and rows[-1][0] <= middle <= rows[-1][1]:
+            y_min, y_max, row = rows[-1]
+            row.append(fragment)
+            rows[-1] = (y_min, max(y_max, fragment.y_max), row)
+        else:
+            rows.append((fragment.y_min, fragment.y_max, [fragment]))
+    return rows
@@ -1,10 +1,12 @@
 """OCRmyPDF input module for invoice2data."""
 
 import logging
+import sys
 import tempfile
 from pathlib import Path
 from typing import Any
 from typing import Dict
+from typing import List
 from typing import Optional
 
 from . import pdftotext
@@ -71,6 +73,60 @@ def to_text(
         return ""
 
 
+async def to_text_async(
+    path: str,
+    area_details: Optional[Dict[str, Any]] = None,
+    input_reader_config: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Pre-processes PDF files with ocrmypdf without blocking the event loop.
+
+    The ocrmypdf command line tool of the installed module runs in an
+    asyncio subprocess, then pdftotext, see `pdftotext.to_text_async`.
+
+    Args:
+        path (str): Path to the PDF invoice file.
+        area_details (Optional[Dict[str, Any]], optional): Details about the area to extract. Defaults to None.
+        input_reader_config (Optional[Dict[str, Any]], optional): Configuration settings for the input reader. Defaults to None.
+
+    Returns:
+        str: Extracted text from the PDF, or an empty string if OCRmyPDF is not available or processing fails.
+    """
+    if not ocrmypdf_available():
+        logger.warning("ocrmypdf is not available. Install with 'pip install ocrmypdf'")
+        return ""
+    import asyncio
+
+    logger.debug("Input reader config received: %s", input_reader_config)
+    ocrmypdf_conf = _options(path, input_reader_config)
+    cmd = [sys.executable, "-m", "ocrmypdf", *_arguments(ocrmypdf_conf)]
+    cmd += [path, ocrmypdf_conf["output_file"]]
+    process = await asyncio.create_subprocess_exec(*cmd)
+    if await process.wait() != 0:
+        logger.warning("ocrmypdf failed, stopping processing of this file")
+        return ""
+    logger.info("Text extraction performed with ocrmypdf")
+    return await pdftotext.to_text_async(ocrmypdf_conf["output_file"], area_details)
+
+
+def to_bbox_layout(
+    path: str, input_reader_config: Optional[Dict[str, Any]] = None
+) -> str:
+    """Extract the words of a PDF file and their boxes after OCR with ocrmypdf.
+
+    Args:
+        path (str): Path to the PDF invoice file.
+        input_reader_config (Optional[Dict[str, Any]], optional): Configuration settings for the input reader. Defaults to None.
+
+    Returns:
+        str: The XHTML written by `pdftotext -bbox-layout`, or an empty string
+            if OCRmyPDF is not available or processing fails.
+    """
+    pre_proc_output = pre_process_pdf(path, pre_conf=input_reader_config)
+    if pre_proc_output:
+        return pdftotext.to_bbox_layout(pre_proc_output)
+    return ""
+
+
 def pre_process_pdf(
     path: str, pre_conf: Optional[Dict[str, Any]] = None
 ) -> Optional[str]:
@@ -92,20 +148,7 @@ def pre_process_pdf(
 
     import ocrmypdf
 
-    ocrmypdf_conf = OPTIONS_DEFAULT.copy()
-    if pre_conf:
-        ocrmypdf_conf.update(pre_conf)
-    logger.debug("ocrmypdf config settings: %s", ocrmypdf_conf)
-
-    if "output_file" not in ocrmypdf_conf:
-        inputfile = Path(path)
-        filename = inputfile.name
-        tmp_folder = str(tempfile.gettempdir()) + "/"
-        ocrmypdf_conf["output_file"] = tmp_folder + filename
-        logger.debug(
-            "No output_file specified, using temp file: %s",
-            ocrmypdf_conf["output_file"],
-        )
+    ocrmypdf_conf = _options(path, pre_conf)
 
     # Silence excessive debug logs
     logging.getLogger("ocrmypdf").setLevel(logging.WARNING)
@@ -124,3 +167,42 @@ def pre_process_pdf(
     else:
         logger.warning("ocrmypdf failed, stopping processing of this file")
         return None
+
+
+def _options(path: str, pre_conf: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Return the ocrmypdf options, writing to a temporary file by default."""
+    ocrmypdf_conf = OPTIONS_DEFAULT.copy()
+    if pre_conf:
+        ocrmypdf_conf.update(pre_conf)
+    logger.debug("ocrmypdf config settings: %s", ocrmypdf_conf)
+
+    if "output_file" not in ocrmypdf_conf:
+        inputfile = Path(path)
+        filename = inputfile.name
+        tmp_folder = str(tempfile.gettempdir()) + "/"
+        ocrmypdf_conf["output_file"] = tmp_folder + filename
+        logger.debug(
+            "No output_file specified, using temp file: %s",
+            ocrmypdf_conf["output_file"],
+        )
+    return ocrmypdf_conf
+
+
+def _arguments(ocrmypdf_conf: Dict[str, Any]) -> List[str]:
+    """Return the command line options of the ocrmypdf options.
+
+    Options set to True are flags, lists are joined by "+" as the
+    languages are, options set to False or None are left out.
+    """
+    args = []
+    for key, value in ocrmypdf_conf.items():
+        if key == "output_file" or value is None or value is False:
+            continue
+        option = "--" + key.replace("_", "-")
+        if value is True:
+            args.append(option)
+        elif isinstance(value, (list, tuple)):
+            args += [option, "+".join(map(str, value))]
+        else:
+            args += [option, str(value)]
+    return args
@@ -1,10 +1,58 @@
-"""Poppler pdftotext input module for invoice2data."""
+"""Poppler pdftotext input module for invoice2data.
 
+The pdftotext command line tool is run for every document. The text can
+also be extracted in process by the python-poppler bindings, with the
+physical layout of `pdftotext -layout`: set the environment variable
+INVOICE2DATA_PDFTOTEXT_BACKEND to "poppler" to try it. It is opt-in until
+its text matches the one of the command on all PDFs, see
+tests/test_pdftotext.py.
+"""
+
+import functools
 import os
+from logging import getLogger
 from typing import Any
 from typing import Dict
+from typing import List
 from typing import Optional
 
+from .layout import AREA_KEYS
+
+
+logger = getLogger(__name__)
+
+# Environment variable selecting the backend, "pdftotext" or "poppler"
+BACKEND_VARIABLE = "INVOICE2DATA_PDFTOTEXT_BACKEND"
+
+
+@functools.lru_cache(maxsize=None)
+def poppler_available() -> bool:
+    """Checks if the python-poppler bindings are available.
+
+    Returns:
+        bool: True if python-poppler is available, False otherwise.
+    """
+    try:
+        import poppler  # type: ignore[import-not-found]  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def backend() -> str:
+    """Return the backend extracting the texts, their layout can differ.
+
+    python-poppler is only used when it is selected by `BACKEND_VARIABLE`
+    and installed.
+
+    Returns:
+        str: "poppler" for the python-poppler bindings, "pdftotext" for the
+            command line tool.
+    """
+    if os.environ.get(BACKEND_VARIABLE) == "poppler" and poppler_available():
+        return "poppler"
+    return "pdftotext"
+
 
 def to_text(path: str, area_details: Optional[Dict[str, Any]] = None) -> str:
     """Extract text from a PDF file using pdftotext.
@@ -30,47 +78,165 @@ def to_text(path: str, area_details: Optional[Dict[str, Any]] = None) -> str:
         FileNotFoundError: If the specified PDF file is not found.
         OSError: If pdftotext fails to extract text.
     """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    if backend() == "poppler":
+        return _to_text_in_process(path, area_details)
+    import subprocess
+
+    cmd = _text_command(path, area_details)
+    # Run the extraction
+    out, err = subprocess.Popen(cmd, stdout=subprocess.PIPE).communicate()
+    return out.decode("utf-8")
+
+
+async def to_text_async(
+    path: str, area_details: Optional[Dict[str, Any]] = None
+) -> str:
+    """Extract text from a PDF file using pdftotext, without blocking the event loop.
+
+    pdftotext runs in an asyncio subprocess. The python-poppler bindings,
+    when selected, extract the text in the default executor of the event loop.
+
+    Args:
+        path (str): Path to the PDF file.
+        area_details (Optional[Dict[str, Any]], optional):
+            Specific area in the PDF to extract text from, see `to_text`.
+
+    Returns:
+        str: The extracted text.
+
+    Raises:
+        FileNotFoundError: If the specified PDF file is not found.
+        OSError: If pdftotext fails to extract text.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    import asyncio
+
+    if backend() == "poppler":
+        return await asyncio.get_running_loop().run_in_executor(
+            None, _to_text_in_process, path, area_details
+        )
+    cmd = _text_command(path, area_details)
+    process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE)
+    out, _err = await process.communicate()
+    return out.decode("utf-8")
+
+
+def to_bbox_layout(path: str) -> str:
+    """Extract the words of a PDF file and their boxes using pdftotext.
+
+    Args:
+        path (str): Path to the PDF file.
+
+    Returns:
+        str: The XHTML written by `pdftotext -bbox-layout`, see `layout.Layout`.
+
+    Raises:
+        FileNotFoundError: If the specified PDF file is not found.
+        OSError: If pdftotext is not installed.
+    """
     if not os.path.exists(path):
         raise FileNotFoundError(f"File not found: {path}")
     import shutil
     import subprocess
 
-    if shutil.which("pdftotext"):
-        cmd = ["pdftotext", "-layout", "-q", "-enc", "UTF-8"]
-        if area_details is not None:
-            # An area was specified
-            # Validate the required keys were provided
-            assert "f" in area_details, "Area f details missing"
-            assert "l" in area_details, "Area l details missing"
-            assert "r" in area_details, "Area r details missing"
-            assert "x" in area_details, "Area x details missing"
-            assert "y" in area_details, "Area y details missing"
-            assert "W" in area_details, "Area W details missing"
-            assert "H" in area_details, "Area H details missing"
-            # Convert all of the values to strings
-            for key in area_details.keys():
-                area_details[key] = str(area_details[key])
-            cmd += [
-                "-f",
-                area_details["f"],
-                "-l",
-                area_details["l"],
-                "-r",
-                area_details["r"],
-                "-x",
-                area_details["x"],
-                "-y",
-                area_details["y"],
-                "-W",
-                area_details["W"],
-                "-H",
-                area_details["H"],
-            ]
-        cmd += [path, "-"]
-        # Run the extraction
-        out, err = subprocess.Popen(cmd, stdout=subprocess.PIPE).communicate()
-        return out.decode("utf-8")
-    else:
+    if not shutil.which("pdftotext"):
+        raise OSError(
+            "pdftotext not installed. Can be downloaded from https://poppler.freedesktop.org/"
+        )
+    cmd = ["pdftotext", "-bbox-layout", "-q", "-enc", "UTF-8", path, "-"]
+    out, _err = subprocess.Popen(cmd, stdout=subprocess.PIPE).communicate()
+    return out.decode("utf-8")
+
+
+def _text_command(path: str, area_details: Optional[Dict[str, Any]]) -> List[str]:
+    """Return the pdftotext command extracting the text of a PDF file."""
+    if not _pdftotext_available():
         raise OSError(
             "pdftotext not installed. Can be downloaded from https://poppler.freedesktop.org/"
         )
+    cmd = ["pdftotext", "-layout", "-q", "-enc", "UTF-8"]
+    if area_details is not None:
+        # An area was specified
+        # Validate the required keys were provided
+        assert "f" in area_details, "Area f details missing"
+        assert "l" in area_details, "Area l details missing"
+        assert "r" in area_details, "Area r details missing"
+        assert "x" in area_details, "Area x details missing"
+        assert "y" in area_details, "Area y details missing"
+        assert "W" in area_details, "Area W details missing"
+        assert "H" in area_details, "Area H details missing"
+        # Convert all of the values to strings, in a copy of the area of the
+        # template, which is shared
+        area_details = {key: str(value) for key, value in area_details.items()}
+        cmd += [
+            "-f",
+            area_details["f"],
+            "-l",
+            area_details["l"],
+            "-r",
+            area_details["r"],
+            "-x",
+            area_details["x"],
+            "-y",
+            area_details["y"],
+            "-W",
+            area_details["W"],
+            "-H",
+            area_details["H"],
+        ]
+    cmd += [path, "-"]
+    return cmd
+
+
+@functools.lru_cache(maxsize=None)
+def _pdftotext_available() -> bool:
+    import shutil
+
+    return shutil.which("pdftotext") is not None
+
+
+def _to_text_in_process(
+    path: str, area_details: Optional[Dict[str, Any]] = None
+) -> str:
+    """Extract text with python-poppler, as `pdftotext -layout` would."""
+    from poppler import load_from_file
+    from poppler.page import Page
+    from poppler.rectangle import Rectangle
+
+    document = load_from_file(path)
+    first, last = 1, document.pages
+    rect = Rectangle()
+    if area_details is not None:
+        for key in AREA_KEYS:
+            assert key in area_details, "Area %s details missing" % key
+        first = max(int(area_details["f"]), 1)
+        last = min(int(area_details["l"]), document.pages)
+        # The area is in pixels at the given resolution, poppler uses points
+        scale = 72 / float(area_details["r"])
+        rect = Rectangle(
+            float(area_details["x"]) * scale,
+            float(area_details["y"]) * scale,
+            float(area_details["W"]) * scale,
+            float(area_details["H"]) * scale,
+        )
+
+    pages = []
+    for index in range(first - 1, last):
+        page = document.create_page(index)
+        page_rect = rect
+        if area_details is not None and not (rect.width and rect.height):
+            # A size of 0 extends the area to the page border, as in pdftotext
+            page_box = page.page_rect()
+            page_rect = Rectangle(
+                rect.x,
+                rect.y,
+                rect.width or page_box.width - rect.x,
+                rect.height or page_box.height - rect.y,
+            )
+        # pdftotext ends every page with a form feed
+        pages.append(page.text(page_rect, Page.TextLayout.physical_layout) + "\f")
+    logger.debug("Extracted %s pages of %s with python-poppler", len(pages), path)
+    return "".join(pages)
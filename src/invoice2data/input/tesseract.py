@@ -14,12 +14,19 @@ from subprocess import TimeoutExpired
 from subprocess import run
 from typing import Any
 from typing import Dict
+from typing import List
 from typing import Optional
 from typing import Set
+from typing import Tuple
+
+from . import pdftotext
 
 
 logger = getLogger(__name__)
 
+# Timeout of each OCR and pdftotext subprocess, in seconds
+TIMEOUT = 180
+
 
 def to_text(path: str, area_details: Optional[Dict[str, Any]] = None) -> str:
     """Extract text from image using tesseract OCR.
@@ -39,18 +46,145 @@ def to_text(path: str, area_details: Optional[Dict[str, Any]] = None) -> str:
     """
     if not os.path.exists(path):
         raise FileNotFoundError(f"File not found: {path}")
+    timeout = TIMEOUT
+    ocr_pdf = _ocr_to_pdf(path, timeout)
+
+    pdftotext_cmd = _pdftotext_command(ocr_pdf, area_details)
+
+    logger.debug("Calling pdfttext with, %s", pdftotext_cmd)
+    p3 = Popen(pdftotext_cmd, stdout=PIPE)
+    try:
+        out, err = p3.communicate(timeout=timeout)
+
+        extracted_str = out
+    except TimeoutExpired:
+        p3.kill()
+        logger.warning("pdftotext took too long - skipping")
+    return extracted_str.decode("utf-8")
+
+
+async def to_text_async(
+    path: str, area_details: Optional[Dict[str, Any]] = None
+) -> str:
+    """Extract text from image using tesseract OCR, without blocking the event loop.
+
+    imagemagick, tesseract and pdftotext run in asyncio subprocesses.
+
+    Args:
+        path (str): Path to the image file.
+        area_details (Optional[Dict[str, Any]], optional):
+            Specific area in the image to extract text from.
+            Defaults to None (extract from the entire image).
+
+    Returns:
+        str: The extracted text, empty if a subprocess took too long.
+
+    Raises:
+        FileNotFoundError: If the specified image file is not found.
+        OSError: If Tesseract OCR fails to extract text.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    import asyncio
+
+    timeout = TIMEOUT
+    _check_dependencies()
+    convert, tess_cmd, ocr_pdf = _ocr_commands(path, await _get_languages_async())
+
+    logger.debug("Calling tesseract with args, %s", tess_cmd)
+    if convert is not None:
+        # imagemagick writes the png to a pipe read by tesseract
+        read_fd, write_fd = os.pipe()
+        try:
+            p1 = await asyncio.create_subprocess_exec(*convert, stdout=write_fd)
+            p2 = await asyncio.create_subprocess_exec(
+                *tess_cmd, stdin=read_fd, stdout=asyncio.subprocess.PIPE
+            )
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+        await _communicate(p2, timeout, "tesseract took too long to OCR - skipping")
+        await p1.wait()
+    else:
+        p2 = await asyncio.create_subprocess_exec(
+            *tess_cmd, stdout=asyncio.subprocess.PIPE
+        )
+        await _communicate(p2, timeout, "tesseract took too long to OCR - skipping")
+
+    pdftotext_cmd = _pdftotext_command(ocr_pdf, area_details)
+    logger.debug("Calling pdfttext with, %s", pdftotext_cmd)
+    p3 = await asyncio.create_subprocess_exec(
+        *pdftotext_cmd, stdout=asyncio.subprocess.PIPE
+    )
+    out = await _communicate(p3, timeout, "pdftotext took too long - skipping")
+    return out.decode("utf-8")
+
+
+def to_bbox_layout(path: str) -> str:
+    """Extract the words of an image and their boxes using tesseract OCR.
+
+    Args:
+        path (str): Path to the image file.
+
+    Returns:
+        str: The XHTML written by `pdftotext -bbox-layout` from the OCR result.
+
+    Raises:
+        FileNotFoundError: If the specified image file is not found.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"File not found: {path}")
+    return pdftotext.to_bbox_layout(_ocr_to_pdf(path, TIMEOUT))
+
+
+def _ocr_to_pdf(path: str, timeout: int) -> str:
+    """Run tesseract OCR and return the path of the text-only PDF it writes."""
+    _check_dependencies()
+    convert, tess_cmd, ocr_pdf = _ocr_commands(path, get_languages())
+    if convert is not None:
+        p1 = Popen(convert, stdout=PIPE)
+        stdin = p1.stdout
+    else:
+        stdin = None
+
+    logger.debug("Calling tesseract with args, %s", tess_cmd)
+    p2 = Popen(tess_cmd, stdin=stdin, stdout=PIPE)
+
+    # Wait for p2 to finish generating the pdf
+    try:
+        p2.wait(timeout=timeout)
+    except TimeoutExpired:
+        p2.kill()
+        logger.warning("tesseract took too long to OCR - skipping")
+    return ocr_pdf
+
+
+def _check_dependencies() -> None:
     # Check for dependencies. Needs Tesseract and Imagemagick installed.
     if not shutil.which("tesseract"):
         raise OSError("tesseract not installed.")
     if not shutil.which("convert"):
         raise OSError("imagemagick not installed.")
 
-    language = get_languages()
+
+def _ocr_commands(
+    path: str, language: str
+) -> Tuple[Optional[List[str]], List[str], str]:
+    """Return the imagemagick and tesseract commands OCRing a file.
+
+    Args:
+        path (str): Path to the image or PDF file.
+        language (str): The tesseract languages, joined by "+".
+
+    Returns:
+        Tuple[Optional[List[str]], List[str], str]: The imagemagick command
+        converting a PDF file to the png read by tesseract on its stdin, None
+        for images, the tesseract command and the path of the PDF it writes.
+    """
     logger.debug("tesseract language arg is, %s", language)
-    timeout = 180
 
     # convert the (multi-page) pdf file to a 300dpi png
-    convert = [
+    convert: Optional[List[str]] = [
         "convert",
         "-units",
         "PixelsPerInch",
@@ -70,12 +204,10 @@ def to_text(path: str, area_details: Optional[Dict[str, Any]] = None) -> str:
     if mt[0] == "application/pdf":
         # tesseract does not support pdf files, pre-processing is needed.
         logger.debug("PDF file detected, start pre-processing by converting to png")
-        p1 = Popen(convert, stdout=PIPE)
         tess_input = "stdin"
-        stdin = p1.stdout
     else:
         tess_input = path
-        stdin = None
+        convert = None
 
     inputfile = Path(path)
     filename = inputfile.stem
@@ -100,17 +232,13 @@ def to_text(path: str, area_details: Optional[Dict[str, Any]] = None) -> str:
         "pdf",
         "txt",
     ]
+    return convert, tess_cmd, tmp_folder + filename + ".pdf"
 
-    logger.debug("Calling tesseract with args, %s", tess_cmd)
-    p2 = Popen(tess_cmd, stdin=stdin, stdout=PIPE)
-
-    # Wait for p2 to finish generating the pdf
-    try:
-        p2.wait(timeout=timeout)
-    except TimeoutExpired:
-        p2.kill()
-        logger.warning("tesseract took too long to OCR - skipping")
 
+def _pdftotext_command(
+    ocr_pdf: str, area_details: Optional[Dict[str, Any]] = None
+) -> List[str]:
+    """Return the pdftotext command extracting the text of the OCR result."""
     pdftotext_cmd = [
         "pdftotext",
         "-layout",
@@ -127,9 +255,9 @@ def to_text(path: str, area_details: Optional[Dict[str, Any]] = None) -> str:
         assert "y" in area_details, "Area y details missing"
         assert "W" in area_details, "Area W details missing"
         assert "H" in area_details, "Area H details missing"
-        # Convert all of the values to strings
-        for key in area_details.keys():
-            area_details[key] = str(area_details[key])
+        # Convert all of the values to strings, in a copy of the area of the
+        # template, which is shared
+        area_details = {key: str(value) for key, value in area_details.items()}
         pdftotext_cmd += [
             "-f",
             area_details["f"],
@@ -146,29 +274,25 @@ def to_text(path: str, area_details: Optional[Dict[str, Any]] = None) -> str:
             "-H",
             area_details["H"],
         ]
-    pdftotext_cmd += [tmp_folder + filename + ".pdf", "-"]
+    pdftotext_cmd += [ocr_pdf, "-"]
+    return pdftotext_cmd
 
-    logger.debug("Calling pdfttext with, %s", pdftotext_cmd)
-    p3 = Popen(pdftotext_cmd, stdin=p2.stdout, stdout=PIPE)
-    try:
-        out, err = p3.communicate(timeout=timeout)
 
-        extracted_str = out
-    except TimeoutExpired:
-        p3.kill()
-        logger.warning("pdftotext took too long - skipping")
-    return extracted_str.decode("utf-8")
+async def _communicate(process: Any, timeout: int, message: str) -> bytes:
+    """Return the output of an asyncio subprocess, killed after the timeout."""
+    import asyncio
 
+    try:
+        out, _err = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        logger.warning(message)
+        return b""
+    return out or b""
 
-def get_languages() -> str:
-    def lang_error(output: str) -> str:
-        logger.warning(  # Use logger.warning instead of assigning to it
-            "Tesseract failed to report available languages.\n"
-            "Output from Tesseract:\n"
-            "-----------\n"
-        )
-        return output  # Add return statement
 
+def get_languages() -> str:
     logger.debug("get lang called")
     args_tess = ["tesseract", "--list-langs"]
     try:
@@ -181,11 +305,42 @@ def get_languages() -> str:
         )
         output = proc.stdout
     except CalledProcessError as e:
-        raise OSError(lang_error(e.output)) from e
+        raise OSError(_lang_error(e.output)) from e
+    return _parse_languages(output)
+
+
+async def _get_languages_async() -> str:
+    """Return the tesseract languages, listed by an asyncio subprocess."""
+    import asyncio
+
+    logger.debug("get lang called")
+    process = await asyncio.create_subprocess_exec(
+        "tesseract",
+        "--list-langs",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    out, _err = await process.communicate()
+    output = out.decode()
+    if process.returncode:
+        raise OSError(_lang_error(output))
+    return _parse_languages(output)
+
+
+def _lang_error(output: str) -> str:
+    logger.warning(  # Use logger.warning instead of assigning to it
+        "Tesseract failed to report available languages.\n"
+        "Output from Tesseract:\n"
+        "-----------\n"
+    )
+    return output  # Add return statement
+
 
+def _parse_languages(output: str) -> str:
+    """Return the languages listed by `tesseract --list-langs`, joined by "+"."""
     for line in output.splitlines():
         if line.startswith("Error"):
-            raise OSError(lang_error(output))
+            raise OSError(_lang_error(output))
     _header, *rest = output.splitlines()
     langlist: Set[str] = {lang.strip() for lang in rest}
     return "+".join(map(str, langlist))
@@ -2,9 +2,62 @@
 
 import csv
 import datetime  # noqa
+from contextlib import closing
 from typing import Any
+from typing import ClassVar
 from typing import Dict
 from typing import List
+from typing import Optional
+
+from .writer import StreamWriter
+
+
+class CsvWriter(StreamWriter):
+    """Writes extracted fields to CSV, one row per invoice.
+
+    A header row is written before the first invoice and whenever the
+    fields change from the previous invoice.
+    """
+
+    extension = ".csv"
+    open_kwargs: ClassVar[Dict[str, Any]] = {"newline": "", "encoding": "utf-8"}
+
+    def start(self) -> None:
+        """Create the CSV writer."""
+        self.writer = csv.writer(self.file, delimiter=",")
+        self.last_header: Optional[List[str]] = None
+
+    def write_item(self, data: Dict[str, Any]) -> None:
+        """Write an invoice as a row, after a header if its fields changed.
+
+        Args:
+            data (Dict[str, Any]): Extracted fields of one invoice.
+        """
+        header = list(data.keys())
+        if header != self.last_header:
+            self.writer.writerow(header)
+            self.last_header = header
+
+        csv_items = []
+        for k, v in data.items():
+            if k.startswith("date") or k.endswith("date"):
+                v = v.strftime(self.date_format)  # Assuming v is a date object
+            csv_items.append(v)
+        self.writer.writerow(csv_items)
+
+
+def open_writer(path: str, date_format: str = "%Y-%m-%d") -> CsvWriter:
+    """Open a CSV file to write invoices to as they are extracted.
+
+    Args:
+        path (str): CSV file to save output to, .csv is appended if missing.
+        date_format (str): Date format used in the generated file.
+                            Defaults to "%Y-%m-%d".
+
+    Returns:
+        CsvWriter: The writer, to close once all invoices are written.
+    """
+    return CsvWriter(path, date_format)
 
 
 def write_to_file(
@@ -31,25 +84,6 @@ def write_to_file(
         >>> data = [{'amount': 123.45, 'date': datetime.datetime(2024, 1, 1)}]
         >>> to_csv.write_to_file(data, "invoice.csv")
     """
-    if not path.endswith(".csv"):
-        filename = path + ".csv"
-    else:
-        filename = path
-
-    with open(filename, "w", newline="", encoding="utf-8") as csv_file:
-        writer = csv.writer(csv_file, delimiter=",")
-
-        last_header = None
+    with closing(open_writer(path, date_format)) as writer:
         for line in data:
-            header = list(line.keys())
-
-            if header != last_header:
-                writer.writerow(header)
-                last_header = header
-
-            csv_items = []
-            for k, v in line.items():
-                if k.startswith("date") or k.endswith("date"):
-                    v = v.strftime(date_format)  # Assuming v is a date object
-                csv_items.append(v)
-            writer.writerow(csv_items)
+            writer.write(line)
@@ -2,10 +2,17 @@
 
 import datetime
 import json
+from contextlib import closing
 from typing import Any
 from typing import Dict
 from typing import List
 
+from .writer import StreamWriter
+
+
+# Indentation of the invoices in the array, as written by json.dump
+_INDENT = " " * 4
+
 
 def format_item(item: Any, date_format: str) -> Any:
     """Format an item for JSON serialization.
@@ -26,6 +33,49 @@ def format_item(item: Any, date_format: str) -> Any:
     return item
 
 
+class JsonWriter(StreamWriter):
+    """Writes extracted fields to a JSON array, one invoice at a time.
+
+    The file is the same as `json.dump(data, indent=4)` once closed.
+    """
+
+    extension = ".json"
+
+    def start(self) -> None:
+        """Open the array."""
+        self.file.write("[")
+
+    def write_item(self, data: Dict[str, Any]) -> None:
+        """Write an invoice as an element of the array.
+
+        Args:
+            data (Dict[str, Any]): Extracted fields of one invoice.
+        """
+        for k, v in data.items():
+            data[k] = format_item(v, self.date_format)
+        encoded = json.dumps(data, indent=4, ensure_ascii=False)
+        self.file.write("\n" if self.count == 0 else ",\n")
+        self.file.write(_INDENT + encoded.replace("\n", "\n" + _INDENT))
+
+    def end(self) -> None:
+        """Close the array."""
+        self.file.write("\n]" if self.count else "]")
+
+
+def open_writer(path: str, date_format: str = "%Y-%m-%d") -> JsonWriter:
+    """Open a JSON file to write invoices to as they are extracted.
+
+    Args:
+        path (str): JSON file to save the output to, .json is appended if missing.
+        date_format (str): Date format used in the generated file.
+                            Defaults to "%Y-%m-%d".
+
+    Returns:
+        JsonWriter: The writer, to close once all invoices are written.
+    """
+    return JsonWriter(path, date_format)
+
+
 def write_to_file(
     data: List[Dict[str, Any]], path: str, date_format: str = "%Y-%m-%d"
 ) -> None:
@@ -48,14 +98,6 @@ def write_to_file(
         >>> data = [{'amount': 123.45, 'date': datetime.datetime(2024, 1, 1)}]
         >>> to_json.write_to_file(data, "invoice.json")
     """
-    for invoice in data:
-        for k, v in invoice.items():
-            invoice[k] = format_item(v, date_format)
-
-    if not path.endswith(".json"):
-        filename = path + ".json"
-    else:
-        filename = path
-
-    with open(filename, "w", encoding="utf-8") as json_file:
-        json.dump(data, json_file, indent=4, ensure_ascii=False)
+    with closing(open_writer(path, date_format)) as writer:
+        for invoice in data:
+            writer.write(invoice)
@@ -0,0 +1,68 @@
+"""JSON Lines output module for invoice2data.
+
+Each invoice is written on its own line as soon as it is extracted, so the
+file can be read while invoices are still being processed, and the invoices
+extracted before an interruption are kept.
+"""
+
+import json
+from contextlib import closing
+from typing import Any
+from typing import Dict
+from typing import List
+
+from .to_json import format_item
+from .writer import StreamWriter
+
+
+class JsonLinesWriter(StreamWriter):
+    """Writes extracted fields to JSON Lines, one invoice per line."""
+
+    extension = ".jsonl"
+
+    def write_item(self, data: Dict[str, Any]) -> None:
+        """Write an invoice as a JSON object on its own line.
+
+        Args:
+            data (Dict[str, Any]): Extracted fields of one invoice.
+        """
+        for k, v in data.items():
+            data[k] = format_item(v, self.date_format)
+        self.file.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+
+def open_writer(path: str, date_format: str = "%Y-%m-%d") -> JsonLinesWriter:
+    """Open a JSON Lines file to write invoices to as they are extracted.
+
+    Args:
+        path (str): File to save the output to, .jsonl is appended if missing.
+        date_format (str): Date format used in the generated file.
+                            Defaults to "%Y-%m-%d".
+
+    Returns:
+        JsonLinesWriter: The writer, to close once all invoices are written.
+    """
+    return JsonLinesWriter(path, date_format)
+
+
+def write_to_file(
+    data: List[Dict[str, Any]], path: str, date_format: str = "%Y-%m-%d"
+) -> None:
+    """Export extracted fields to JSON Lines.
+
+    Appends .jsonl to path if missing.
+
+    Args:
+        data (List[Dict[str, Any]]): List of dictionaries of extracted fields.
+        path (str): JSON Lines file to save the output to.
+        date_format (str): Date format used in the generated file.
+                            Defaults to "%Y-%m-%d".
+
+    Examples:
+        >>> from invoice2data.output import to_jsonl
+        >>> data = [{'amount': 123.45, 'date': datetime.datetime(2024, 1, 1)}]
+        >>> to_jsonl.write_to_file(data, "invoices.jsonl")
+    """
+    with closing(open_writer(path, date_format)) as writer:
+        for invoice in data:
+            writer.write(invoice)
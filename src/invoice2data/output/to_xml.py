@@ -2,11 +2,15 @@
 
 import datetime
 import importlib.util
+from contextlib import closing
 from typing import Any
+from typing import ClassVar
 from typing import Dict
 from typing import List
 from xml.etree import ElementTree
 
+from .writer import StreamWriter
+
 
 def defusedxml_available() -> bool:
     """Checks if the defusedxml module is available.
@@ -17,6 +21,14 @@ def defusedxml_available() -> bool:
     return importlib.util.find_spec("defusedxml") is not None
 
 
+def _minidom() -> Any:
+    if defusedxml_available():
+        from defusedxml import minidom  # type: ignore[import-not-found]
+    else:
+        from xml.dom import minidom
+    return minidom
+
+
 def prettify(elem: ElementTree.Element) -> Any:
     """Return a pretty-printed XML string for the Element.
 
@@ -26,13 +38,8 @@ def prettify(elem: ElementTree.Element) -> Any:
     Returns:
         Any: A pretty-printed XML string.
     """
-    if defusedxml_available():
-        from defusedxml import minidom  # type: ignore[import-not-found]
-    else:
-        from xml.dom import minidom
-
     rough_string = ElementTree.tostring(elem, "utf-8")
-    reparsed = minidom.parseString(rough_string)  # noqa S318
+    reparsed = _minidom().parseString(rough_string)
     return reparsed.toprettyxml(indent="  ")
 
 
@@ -64,6 +71,57 @@ def dict_to_tags(
                 dict_to_tags(item, e, date_format)
 
 
+class XmlWriter(StreamWriter):
+    """Writes extracted fields to XML, one `item` element per invoice.
+
+    The file is the same as `prettify` of the whole `data` element once
+    closed, each item being pretty-printed on its own.
+    """
+
+    extension = ".xml"
+    open_kwargs: ClassVar[Dict[str, Any]] = {}
+
+    def start(self) -> None:
+        """Write the XML declaration."""
+        self.file.write('<?xml version="1.0" ?>\n')
+
+    def write_item(self, data: Dict[str, Any]) -> None:
+        """Write an invoice as an `item` element of the root.
+
+        Args:
+            data (Dict[str, Any]): Extracted fields of one invoice.
+        """
+        if self.count == 0:
+            self.file.write("<data>\n")
+        tag_item = ElementTree.Element("item")
+        tag_item.set("id", str(self.count + 1))
+        dict_to_tags(tag_item, data, self.date_format)
+        rough_string = ElementTree.tostring(tag_item, "utf-8")
+        reparsed = _minidom().parseString(rough_string)
+        reparsed.documentElement.writexml(
+            self.file, indent="  ", addindent="  ", newl="\n"
+        )
+
+    def end(self) -> None:
+        """Close the root element."""
+        self.file.write("</data>\n" if self.count else "<data/>\n")
+
+
+def open_writer(path: str, date_format: str = "%Y-%m-%d") -> XmlWriter:
+    """Open an XML file to write invoices to as they are extracted.
+
+    Args:
+        path (str): Path to save the generated XML file, .xml is appended if
+            missing.
+        date_format (str, optional): Date format used in generated file.
+            Defaults to "%Y-%m-%d".
+
+    Returns:
+        XmlWriter: The writer, to close once all invoices are written.
+    """
+    return XmlWriter(path, date_format)
+
+
 def write_to_file(
     data: List[Dict[str, Any]], path: str, date_format: str = "%Y-%m-%d"
 ) -> None:
@@ -86,16 +144,6 @@ def write_to_file(
         >>> data = [{'amount': 123.45, 'date': datetime.datetime(2024, 1, 1)}]
         >>> to_xml.write_to_file(data, "invoice.xml")
     """
-    if not path.endswith(".xml"):
-        filename = path + ".xml"
-    else:
-        filename = path
-
-    tag_data = ElementTree.Element("data")
-    with open(filename, "w") as xml_file:
-        for i, line in enumerate(data):
-            tag_item = ElementTree.SubElement(tag_data, "item")
-            tag_item.set("id", str(i + 1))
-            dict_to_tags(tag_item, line, date_format)
-
-        xml_file.write(prettify(tag_data))
+    with closing(open_writer(path, date_format)) as writer:
+        for line in data:
+            writer.write(line)
@@ -0,0 +1,72 @@
+"""Base class of the streaming output writers.
+
+Output modules write each result to the file as soon as it is extracted,
+instead of keeping all results in memory until the end of the run.
+"""
+
+from typing import IO
+from typing import Any
+from typing import ClassVar
+from typing import Dict
+
+
+class StreamWriter:
+    """Writes extracted results to a file, one at a time.
+
+    Appends the extension of the format to the path if it's missing.
+
+    Args:
+        path (str): File to save the output to.
+        date_format (str): Date format used in the generated file.
+            Defaults to "%Y-%m-%d".
+
+    Attributes:
+        extension (str): Extension of the format, with its dot.
+        open_kwargs (ClassVar[Dict[str, Any]]): Keyword arguments opening
+            the file.
+    """
+
+    extension: str = ""
+    open_kwargs: ClassVar[Dict[str, Any]] = {"encoding": "utf-8"}
+
+    def __init__(self, path: str, date_format: str = "%Y-%m-%d") -> None:
+        if not path.endswith(self.extension):
+            path += self.extension
+        self.filename = path
+        self.date_format = date_format
+        self.count = 0
+        self.file: IO[str] = open(path, "w", **self.open_kwargs)  # noqa: SIM115
+        self.start()
+
+    def start(self) -> None:
+        """Write the beginning of the file."""
+
+    def write(self, data: Dict[str, Any]) -> None:
+        """Write one result and flush it to the file.
+
+        Args:
+            data (Dict[str, Any]): Extracted fields of one invoice.
+        """
+        self.write_item(data)
+        self.count += 1
+        self.file.flush()
+
+    def write_item(self, data: Dict[str, Any]) -> None:
+        """Write one result, implemented by each format.
+
+        Args:
+            data (Dict[str, Any]): Extracted fields of one invoice.
+
+        Raises:
+            NotImplementedError: In the base class.
+        """
+        raise NotImplementedError
+
+    def end(self) -> None:
+        """Write the end of the file."""
+
+    def close(self) -> None:
+        """Write the end of the file and close it."""
+        if not self.file.closed:
+            self.end()
+            self.file.close()
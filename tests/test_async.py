@@ -0,0 +1,165 @@
+import asyncio
+import glob
+import os
+import threading
+import types
+from typing import Any
+from typing import Dict
+from typing import Iterator
+
+import pytest
+
+from invoice2data import Extractor
+from invoice2data import extract_data
+from invoice2data import extract_data_async
+from invoice2data import extractor as extractor_module
+from invoice2data.extract.loader import read_templates
+from invoice2data.input import cache
+from invoice2data.input import ocrmypdf
+from invoice2data.input import pdftotext
+from invoice2data.input import tesseract
+from invoice2data.input import text
+
+
+PATHS = sorted(glob.glob("tests/custom/*.txt"))
+
+# Command line tools printing their arguments, or languages for tesseract
+FAKE_TOOLS = {
+    "pdftotext": 'echo "pdftotext $*"',
+    "convert": 'echo "png"',
+    "tesseract": 'if [ "$1" = --list-langs ]; then printf "Languages\\neng\\n"; '
+    "else cat > /dev/null; fi",
+}
+
+AREA = {"f": 1, "l": 1, "r": 300, "x": 0, "y": 10, "W": 200, "H": 0}
+
+
+@pytest.fixture
+def fake_tools(tmp_path: Any, monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, script in FAKE_TOOLS.items():
+        tool = bin_dir / name
+        tool.write_text("#!/bin/sh\n%s\n" % script)
+        tool.chmod(0o755)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ["PATH"])
+    monkeypatch.setattr(pdftotext, "poppler_available", lambda: False)
+    pdftotext._pdftotext_available.cache_clear()
+    yield
+    pdftotext._pdftotext_available.cache_clear()
+
+
+def test_extract_data_async() -> None:
+    templates = read_templates("tests/custom/templates")
+    expected = [extract_data(path, templates) for path in PATHS]
+    assert all(expected)
+
+    async def extract_all() -> Any:
+        return await asyncio.gather(
+            *(extract_data_async(path, templates) for path in PATHS)
+        )
+
+    assert asyncio.run(extract_all()) == expected
+    result = asyncio.run(extract_data_async("tests/compare/Orlen.txt"))
+    assert result == extract_data("tests/compare/Orlen.txt")
+
+
+def test_extract_data_async_templates(monkeypatch: pytest.MonkeyPatch) -> None:
+    templates = read_templates("tests/custom/templates")
+    expected = extract_data(PATHS[0], templates)
+    threads = []
+
+    def matching(*args: Any) -> Any:
+        threads.append(threading.get_ident())
+        return extract_matching(*args)
+
+    extract_matching = extractor_module._extract_matching
+    monkeypatch.setattr(extractor_module, "_extract_matching", matching)
+    monkeypatch.setattr(extractor_module, "_default", None)
+    assert asyncio.run(extract_data_async(PATHS[0], templates)) == expected
+    # The built-in templates are not loaded, the templates match out of the loop
+    assert extractor_module._default is None
+    assert threads and threading.get_ident() not in threads
+
+
+def test_extract_async_limit() -> None:
+    in_flight = []
+    peak = []
+
+    async def to_text_async(path: str) -> str:
+        in_flight.append(path)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(path)
+        return text.to_text(path)
+
+    reader = types.SimpleNamespace(__name__="slow", to_text_async=to_text_async)
+    with Extractor(
+        "tests/custom/templates", built_in_templates=False, input_reader=reader, jobs=2
+    ) as extractor:
+        expected = [extract_data(path, extractor.templates) for path in PATHS]
+
+        async def extract_all() -> Any:
+            return await asyncio.gather(*map(extractor.extract_async, PATHS * 3))
+
+        # The limit is kept by event loop
+        assert asyncio.run(extract_all()) == expected * 3
+        assert asyncio.run(extract_all()) == expected * 3
+    assert max(peak) == 2
+    with pytest.raises(ValueError, match="Extractor is closed"):
+        asyncio.run(extractor.extract_async(PATHS[0]))
+
+
+def test_text_cache_async(tmp_path: Any) -> None:
+    text_cache = cache.TextCache(str(tmp_path))
+    try:
+        for _ in range(2):
+            extracted = asyncio.run(
+                cache.to_text_async(text, PATHS[0], text_cache=text_cache)
+            )
+            assert extracted == text.to_text(PATHS[0])
+        assert (text_cache.hits, text_cache.misses) == (1, 1)
+    finally:
+        text_cache.close()
+
+
+@pytest.mark.parametrize("area_details", [None, AREA])
+def test_pdftotext_async(fake_tools: None, area_details: Any) -> None:
+    path = "tests/compare/oyo.pdf"
+    extracted = asyncio.run(pdftotext.to_text_async(path, area_details))
+    assert extracted == pdftotext.to_text(path, area_details)
+    assert extracted.startswith("pdftotext -layout")
+    assert extracted.rstrip().endswith("%s -" % path)
+
+
+@pytest.mark.parametrize("path", ["tests/compare/oyo.pdf", "tests/compare/oyo.png"])
+def test_tesseract_async(fake_tools: None, path: str) -> None:
+    extracted = asyncio.run(tesseract.to_text_async(path, AREA))
+    assert extracted == tesseract.to_text(path, AREA)
+    assert extracted.startswith("pdftotext -layout -enc UTF-8 -f 1 -l 1")
+
+
+def test_async_readers_missing_file() -> None:
+    for reader in (pdftotext, tesseract):
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(reader.to_text_async("tests/compare/missing.pdf"))
+
+
+def test_ocrmypdf_arguments() -> None:
+    conf: Dict[str, Any] = dict(
+        ocrmypdf.OPTIONS_DEFAULT,
+        language=["eng", "fra"],
+        deskew=False,
+        output_file="/tmp/out.pdf",  # noqa: S108
+    )
+    assert ocrmypdf._arguments(conf) == [
+        "--redo-ocr",
+        "--optimize",
+        "0",
+        "--output-type",
+        "pdf",
+        "--fast-web-view",
+        "0",
+        "--language",
+        "eng+fra",
+    ]
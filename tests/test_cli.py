@@ -439,6 +439,83 @@ class TestCLI(unittest.TestCase):
             else:
                 self.fail("No data extracted from the file")
 
+    def test_jobs(self) -> None:
+        """Tests that --jobs keeps the results in the order of the input files."""
+        custom_files = sorted(
+            os.path.join("tests/custom", file)
+            for file in os.listdir("tests/custom")
+            if file.endswith(".txt")
+        )
+        outputs = []
+        for jobs in ("1", "3"):
+            test_file = "test_jobs_%s.json" % jobs
+            with self.assertRaises(SystemExit) as cm:
+                main(
+                    [
+                        "--jobs",
+                        jobs,
+                        "--exclude-built-in-templates",
+                        "--template-folder",
+                        "tests/custom/templates",
+                        "--output-format",
+                        "json",
+                        "--output-name",
+                        test_file,
+                        *custom_files,
+                        # Fails without stopping the other files
+                        "tests/compare/AzureInterior.pdf",
+                    ]
+                )
+            self.assertEqual(cm.exception.code, 0)
+            with open(test_file) as json_test_file:
+                outputs.append(json.load(json_test_file))
+            os.remove(test_file)
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(len(outputs[0]), len(custom_files))
+
+    def test_date_languages(self) -> None:
+        """Tests the --date-languages argument."""
+        for date_languages, code in (("auto", 0), ("fr,en", 0), ("xx", 2)):
+            with self.assertRaises(SystemExit) as cm:
+                main(
+                    [
+                        "--date-languages",
+                        date_languages,
+                        "--exclude-built-in-templates",
+                        "--template-folder",
+                        "tests/custom/templates",
+                        "tests/custom/basic.txt",
+                    ]
+                )
+            self.assertEqual(cm.exception.code, code)
+
+    def test_output_format_jsonl(self) -> None:
+        """Tests the JSON Lines output, one invoice per line."""
+        test_file = "test_output_format_jsonl.jsonl"
+        with self.assertRaises(SystemExit) as cm:
+            main(
+                [
+                    "--jobs",
+                    "1",
+                    "--exclude-built-in-templates",
+                    "--template-folder",
+                    "tests/custom/templates",
+                    "--output-format",
+                    "jsonl",
+                    "--output-name",
+                    test_file,
+                    "tests/custom/basic.txt",
+                    "tests/custom/basic.txt",
+                ]
+            )
+        self.assertEqual(cm.exception.code, 0)
+        with open(test_file, encoding="utf-8") as jsonl_test_file:
+            lines = [json.loads(line) for line in jsonl_test_file]
+        os.remove(test_file)
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]["issuer"], "Basic Test")
+        self.assertEqual(lines[0], lines[1])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,74 @@
+from array import array
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+
+from invoice2data.extract.columns import Columns
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.loader import read_templates
+from invoice2data.extract.parsers import lines
+from invoice2data.extract.plugins import tables
+
+
+def _template(name: str) -> InvoiceTemplate:
+    templates = read_templates("tests/custom/templates")
+    return next(t for t in templates if t["template_name"] == name + ".yml")
+
+
+def test_rows_round_trip() -> None:
+    rows: List[Dict[str, Any]] = [
+        {"name": "A", "qty": 1, "price": 1.5},
+        {"price": 2.5, "name": "B"},
+        {"name": "C", "qty": 2**70, "price": 3, "note": None},
+        {"name": "D", "qty": 4, "price": 4.5},
+    ]
+    columns = Columns(rows)
+    assert columns.to_rows() == rows
+    assert [list(row) for row in columns.to_rows()] == [list(row) for row in rows]
+    assert columns.row_count == 4
+    assert list(columns) == ["name", "qty", "price", "note"]
+    assert columns.row_keys[0] is columns.row_keys[3]
+
+    # Columns of floats or ints only are arrays, others are lists
+    floats = Columns([{"price": 1.5}, {"price": 2.0}, {}])
+    assert floats["price"] == array("d", [1.5, 2.0, 0])
+    # Overflowing or mixed values turn the column into a list
+    assert isinstance(columns["qty"], list) and columns["qty"][2] == 2**70
+    assert isinstance(columns["price"], list) and columns["price"][2] == 3
+    assert len(columns["note"]) == 4
+
+
+def test_to_fields() -> None:
+    columns = Columns([{"amount": 1.0, "qty": 1}, {"amount": 2.0}])
+    assert columns.to_fields() == {"amount": [1.0, 2.0], "qty": 1}
+    assert Columns().to_fields() == {}
+
+
+def test_lines_columns() -> None:
+    template = _template("lines-multiple-patterns")
+    content = template.prepare_input(
+        Path("tests/custom/lines-multiple-patterns.txt").read_text(encoding="utf-8")
+    )
+    settings = template["fields"]["lines"]
+    expected = lines.parse(template, "lines", settings, content)
+    assert expected
+    columns = lines.parse_columns(template, "lines", settings, content)
+    assert columns.to_rows() == expected
+
+
+def test_tables_columns() -> None:
+    template = _template("table-groups")
+    content = template.prepare_input(
+        Path("tests/custom/table-groups.txt").read_text(encoding="utf-8")
+    )
+    hotels, taxes = tables.extract_columns(template, content)
+    assert hotels is not None and taxes is not None
+    assert hotels.row_count > 1
+    assert isinstance(hotels["qty_rooms"], array)
+    assert isinstance(taxes["random_num_to_sum"], array)
+
+    output = tables.extract(template, content, {})
+    assert output is not None
+    assert output["qty_rooms"] == sum(hotels["qty_rooms"])
+    assert output["lamount_tax"] == taxes.to_fields()["lamount_tax"]
@@ -0,0 +1,122 @@
+import dateparser  # type: ignore[import-untyped]
+import pytest
+from pytest_mock import MockerFixture
+
+from invoice2data.extract import dates
+from invoice2data.extract.dates import DateCoercer
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.loader import declared_languages
+from invoice2data.extract.loader import read_templates
+from invoice2data.extract.loader import template_languages
+
+
+VALUES = [
+    "01/02/2023",
+    "2023-02-30",
+    "31/12/99",
+    "12. März 2023",
+    "3 février 2023",
+    "February 3, 2023",
+]
+
+
+def test_dates_match_dateparser() -> None:
+    options = [
+        ((), ()),
+        ((), ("fr", "en")),
+        (("%d/%m/%Y",), ()),
+        (("%d/%m/%Y", "%d %B %Y"), ("fr",)),
+        (("%d %B %Y", "%d/%m/%Y"), ("en",)),
+        (("%d.%m.%Y",), ("de",)),
+        (("%Y-%m-%d",), ("de",)),
+        (("%d/%m/%y",), ()),
+    ]
+    for date_formats, languages in options:
+        coercer = DateCoercer(list(date_formats), list(languages))
+        for value in VALUES:
+            assert coercer(value) == dateparser.parse(
+                value, date_formats=list(date_formats), languages=list(languages)
+            ), (value, date_formats, languages)
+
+
+def test_numeric_formats_skip_dateparser(mocker: MockerFixture) -> None:
+    dates._cached_date.cache_clear()
+    parser = mocker.patch.object(dates, "_parser")
+    coercer = DateCoercer(["%Y-%m-%d", "%d/%m/%Y"], ["en"])
+
+    assert coercer("03/02/2023").day == 3  # type: ignore[union-attr]
+    parser.assert_not_called()
+
+    coercer("3 February 2023")
+    assert {call.args[0] for call in parser.call_args_list} == {("en",)}
+
+
+def test_dates_are_cached_and_shared() -> None:
+    dates._cached_date.cache_clear()
+    template = InvoiceTemplate(
+        [
+            ("keywords", ["ACME"]),
+            ("template_name", "acme"),
+            ("options", {"date_formats": ["%d/%m/%Y"], "languages": ["fr"]}),
+        ]
+    )
+    other = InvoiceTemplate(
+        [
+            ("keywords", ["Other"]),
+            ("template_name", "other"),
+            ("options", {"languages": ["fr"], "date_formats": ["%d/%m/%Y"]}),
+        ]
+    )
+
+    assert template.date_coercer is other.date_coercer
+    assert template.parse_date("3 février 2023") == other.parse_date("3 février 2023")
+    assert dates._cached_date.cache_info().hits == 1
+
+
+def test_relative_dates_are_parsed_again(mocker: MockerFixture) -> None:
+    dates._cached_date.cache_clear()
+    coercer = DateCoercer([], ["en"])
+    for value in ("5 March 2024", "March 5", "yesterday"):
+        assert coercer(value) is not None
+    parse = mocker.spy(dates, "_parse")
+
+    assert coercer("5 March 2024") == dateparser.parse("5 March 2024")
+    parse.assert_not_called()
+    # Relative to the current date, the result of the first call isn't reused
+    assert coercer("March 5") == dateparser.parse("March 5", languages=["en"])
+    assert coercer("yesterday") is not None
+    assert parse.call_count == 2
+
+
+def test_languages_can_be_capped() -> None:
+    coercer = DateCoercer()
+    try:
+        dates.restrict_languages(["fr"])
+        assert dates.effective_languages(("de", "fr")) == ("fr",)
+        assert dates.effective_languages(("de",)) == ("fr",)
+        assert coercer("3 février 2023") == dateparser.parse(
+            "3 février 2023", languages=["fr"]
+        )
+        assert coercer("February 3, 2023") is None
+        dates.preload([(), ("fr",), ("de", "fr")])
+    finally:
+        dates.restrict_languages(None)
+    assert coercer("February 3, 2023") == dateparser.parse("February 3, 2023")
+
+
+def test_unknown_languages_are_refused() -> None:
+    with pytest.raises(ValueError, match="xx"):
+        dates.restrict_languages(["xx"])
+    assert dates.effective_languages(()) == ()
+
+
+def test_declared_languages() -> None:
+    templates = read_templates()
+    languages = template_languages(templates)
+
+    assert languages["pl.orlen.yml"] == ()
+    assert languages["be.accor.invest.ibis.yml"] == ("nl", "be", "en")
+    assert set(declared_languages(templates)) == {
+        lang for langs in languages.values() for lang in langs
+    }
+    assert "fr" in declared_languages(templates)
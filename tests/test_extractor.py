@@ -0,0 +1,93 @@
+import glob
+import os
+from typing import Any
+from typing import Dict
+
+import pytest
+
+from invoice2data import Extractor
+from invoice2data.__main__ import extract_data
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.loader import read_templates
+from invoice2data.extract.normalizer import Normalizer
+from invoice2data.extractor import default_extractor
+from invoice2data.extractor import input_mapping
+
+
+PATHS = sorted(glob.glob("tests/custom/*.txt"))
+
+
+def test_extract_many() -> None:
+    templates = read_templates("tests/custom/templates")
+    expected: Dict[str, Any] = {path: extract_data(path, templates) for path in PATHS}
+    assert all(expected.values())
+
+    with Extractor(
+        "tests/custom/templates", built_in_templates=False, jobs=3
+    ) as extractor:
+        assert [t["template_name"] for t in extractor.templates] == [
+            t["template_name"] for t in templates
+        ]
+        assert extractor.extract(PATHS[0]) == expected[PATHS[0]]
+        assert list(extractor.extract_many(PATHS)) == [expected[p] for p in PATHS]
+        # The threads are kept between the calls
+        executor = extractor._executor
+        assert list(extractor.extract_many(reversed(PATHS))) == [
+            expected[p] for p in reversed(PATHS)
+        ]
+        assert extractor._executor is executor
+
+    assert extractor._executor is None
+    with pytest.raises(ValueError, match="Extractor is closed"):
+        extractor.extract(PATHS[0])
+    with pytest.raises(ValueError, match="Extractor is closed"):
+        next(extractor.extract_many(PATHS))
+
+
+def test_extract_many_sequential() -> None:
+    templates = read_templates("tests/custom/templates")
+    with Extractor(templates=templates, input_reader="text", jobs=1) as extractor:
+        assert extractor.input_module is input_mapping["text"]
+        results = list(extractor.extract_many(PATHS))
+        assert extractor._executor is None
+    assert results == [extract_data(path, templates) for path in PATHS]
+
+
+def test_text_cache(tmp_path: Any) -> None:
+    with Extractor(
+        ["tests/custom/templates"],
+        built_in_templates=False,
+        text_cache_dir=str(tmp_path),
+    ) as extractor:
+        first = extractor.extract(PATHS[0])
+        assert extractor.extract(PATHS[0]) == first
+        assert (extractor.text_cache.hits, extractor.text_cache.misses) == (1, 1)
+    assert os.listdir(tmp_path)
+
+
+def test_default_extractor() -> None:
+    extractor = default_extractor()
+    assert extractor is default_extractor()
+    assert {t["template_name"] for t in extractor.templates} == {
+        t["template_name"] for t in read_templates()
+    }
+    path = "tests/compare/Orlen.txt"
+    result = extract_data(path)
+    assert result
+    assert result == extract_data(path, read_templates())
+
+
+def test_next_matching_template_is_tried(mocker: Any) -> None:
+    basic = read_templates("tests/custom/templates")[0]
+    strict = dict(basic, template_name="strict", required_fields=["missing"])
+    templates = [InvoiceTemplate(strict), basic]
+    expected = extract_data("tests/custom/basic.txt", [basic])
+    normalize = mocker.spy(Normalizer, "__call__")
+
+    with Extractor(templates=templates, jobs=1) as extractor:
+        assert extractor.extract("tests/custom/basic.txt") == expected
+    # Both templates have the same options, the text is prepared once for them
+    assert normalize.call_count == 1
+
+    with pytest.raises(ValueError, match="missing"):
+        extract_data("tests/custom/basic.txt", [InvoiceTemplate(strict)] * 2)
@@ -0,0 +1,44 @@
+import subprocess
+import sys
+from typing import Dict
+
+
+# Modules only needed once an input reader, a date or the regex engine is used
+DEFERRED_MODULES = (
+    "dateparser",
+    "google",
+    "multiprocessing",
+    "ocrmypdf",
+    "pdfminer",
+    "pdfplumber",
+    "poppler",
+    "regex",
+)
+
+
+def _import_times(module: str) -> Dict[str, int]:
+    """Return the cumulative import time of each module, from -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import %s" % module],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_heavy_dependencies_are_deferred() -> None:
+    times = _import_times("invoice2data.__main__")
+
+    imported = {name.split(".")[0] for name in times}
+    assert imported.isdisjoint(DEFERRED_MODULES), imported & set(DEFERRED_MODULES)
+    # Input readers are imported when selected
+    inputs = {name for name in times if name.startswith("invoice2data.input.")}
+    assert inputs <= {"invoice2data.input.cache", "invoice2data.input.layout"}
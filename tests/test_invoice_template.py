@@ -3,6 +3,8 @@ from typing import Any
 from typing import Dict
 from typing import List
 
+import pytest
+
 from invoice2data.extract.invoice_template import InvoiceTemplate
 
 
@@ -47,6 +49,19 @@ def test_skip_template_with_too_long_lang_code() -> None:
         )
 
 
+def test_invalid_regex_is_reported_at_load_time() -> None:
+    tpl: Dict[str, Any] = {
+        "keywords": ["Basic Test"],
+        "exclude_keywords": [],
+        "template_name": "invalid_regex.yml",
+        "fields": {
+            "amount": {"parser": "regex", "regex": r"Total\s+(\d+"},
+        },
+    }
+    with pytest.raises(ValueError, match=r"invalid_regex\.yml field amount"):
+        InvoiceTemplate(tpl)
+
+
 class TestInvoiceTemplateMethods(unittest.TestCase):
     def test_replace_a_with_b(self) -> None:
         options_test: Dict[str, Any] = {
@@ -0,0 +1,51 @@
+import glob
+
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.keyword_index import KeywordIndex
+from invoice2data.extract.loader import read_templates
+
+
+def _template(name: str, keywords: list, exclude_keywords: list) -> InvoiceTemplate:
+    return InvoiceTemplate(
+        [
+            ("keywords", keywords),
+            ("exclude_keywords", exclude_keywords),
+            ("template_name", name),
+            ("priority", 5),
+        ]
+    )
+
+
+def test_candidates_match_linear_scan() -> None:
+    templates = read_templates()
+    index = KeywordIndex(templates)
+    texts = []
+    for path in glob.glob("tests/**/*.txt"):
+        with open(path, encoding="utf-8") as text_file:
+            texts.append(text_file.read())
+    texts += ["", "OYO Invoice Hotel", "Amazon Web Services, Inc. Invoice"]
+    for text in texts:
+        expected = [t for t in templates if t.matches_input(text)]
+        assert index.candidates(text) == expected
+
+
+def test_keyword_order_and_exclusion() -> None:
+    templates = [
+        _template("first", ["Invoice", "ACME"], ["Credit note"]),
+        _template("second", ["ACME"], []),
+        _template("third", ["ACM", "CME Corp"], []),
+        _template("empty", [""], []),
+    ]
+    index = KeywordIndex(templates)
+    names = [t["template_name"] for t in index.candidates("Invoice ACME Corp")]
+    assert names == ["first", "second", "third", "empty"]
+
+    names = [t["template_name"] for t in index.candidates("ACME Credit note")]
+    assert names == ["second", "empty"]
+
+
+def test_index_is_reused_for_same_templates() -> None:
+    templates = [_template("first", ["Invoice"], [])]
+    assert KeywordIndex.for_templates(templates) is KeywordIndex.for_templates(
+        templates
+    )
@@ -0,0 +1,168 @@
+import shutil
+from typing import Any
+
+import pytest
+from pytest_mock import MockerFixture
+
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.loader import read_templates
+from invoice2data.input import pdftotext
+from invoice2data.input.layout import Layout
+
+
+BBOX_LAYOUT = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+"http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head>
+<title></title>
+<meta name="Producer" content="Test &amp; Co"/>
+</head>
+<body>
+<doc>
+  <page width="600.000000" height="800.000000">
+    <flow>
+      <block xMin="50.000000" yMin="50.000000" xMax="290.000000" yMax="112.000000">
+        <line xMin="50.000000" yMin="50.000000" xMax="290.000000" yMax="62.000000">
+          <word xMin="50.000000" yMin="50.000000" xMax="92.000000" yMax="62.000000">Invoice</word>
+          <word xMin="98.000000" yMin="50.000000" xMax="122.000000" yMax="62.000000">INV</word>
+          <word xMin="254.000000" yMin="50.000000" xMax="290.000000" yMax="62.000000">ACME</word>
+        </line>
+        <line xMin="50.000000" yMin="100.000000" xMax="200.000000" yMax="112.000000">
+          <word xMin="50.000000" yMin="100.000000" xMax="80.000000" yMax="112.000000">Total</word>
+          <word xMin="158.000000" yMin="100.000000" xMax="200.000000" yMax="112.000000">12,50&amp;</word>
+        </line>
+      </block>
+    </flow>
+  </page>
+  <page width="600.000000" height="800.000000">
+    <flow>
+      <block xMin="50.000000" yMin="50.000000" xMax="80.000000" yMax="62.000000">
+        <line xMin="50.000000" yMin="50.000000" xMax="80.000000" yMax="62.000000">
+          <word xMin="50.000000" yMin="50.000000" xMax="80.000000" yMax="62.000000">Page2</word>
+        </line>
+      </block>
+    </flow>
+  </page>
+</doc>
+</body>
+</html>
+"""
+
+
+def _area(**kwargs: int) -> dict:
+    return {"f": 1, "l": 1, "r": 72, "x": 0, "y": 0, "W": 0, "H": 0, **kwargs}
+
+
+def test_layout_is_parsed() -> None:
+    layout = Layout.from_bbox_layout(BBOX_LAYOUT)
+    assert [len(page.words) for page in layout.pages] == [5, 1]
+    assert layout.pages[0].words[4].text == "12,50&"
+    assert layout.pages[0].width == 600
+
+
+def test_crop_whole_pages() -> None:
+    layout = Layout.from_bbox_layout(BBOX_LAYOUT)
+    text = layout.crop(_area(l=2))
+    assert text == (
+        "Invoice INV                  ACME\n\n\n\nTotal           12,50&\n\fPage2\n\f"
+    )
+
+
+def test_crop_area() -> None:
+    layout = Layout.from_bbox_layout(BBOX_LAYOUT)
+    # Area in pixels at 144 DPI: x 100-250 and y 90-115 in points
+    assert layout.crop(_area(r=144, x=200, y=180, W=300, H=50)) == "12,50&\n\f"
+    # Characters overlapping the area border are kept, as in pdftotext
+    assert layout.crop(_area(x=60, y=40, W=45, H=30)) == "nvoice I\n\f"
+    assert layout.crop(_area(f=3, l=3)) == ""
+
+
+def _area_template(**options: Any) -> InvoiceTemplate:
+    return InvoiceTemplate(
+        [
+            ("keywords", ["ACME"]),
+            ("template_name", "acme"),
+            (
+                "fields",
+                {
+                    "amount": {
+                        "parser": "regex",
+                        "regex": r"(\d+,\d+)",
+                        "type": "float",
+                        "area": _area(y=90, H=30),
+                    },
+                    "invoice_number": {
+                        "parser": "regex",
+                        "regex": r"Invoice\s+(\w+)",
+                        "area": _area(H=70),
+                    },
+                },
+            ),
+            ("options", dict(options, decimal_separator=",")),
+            ("required_fields", ["amount", "invoice_number"]),
+        ]
+    )
+
+
+def test_areas_are_cropped_from_one_layout(mocker: MockerFixture) -> None:
+    to_bbox_layout = mocker.patch.object(
+        pdftotext, "to_bbox_layout", return_value=BBOX_LAYOUT
+    )
+    to_text = mocker.patch.object(pdftotext, "to_text")
+    template = _area_template(area_layout=True)
+
+    output = template.extract("Invoice INV ACME", "invoice.pdf", pdftotext)
+
+    assert output["amount"] == 12.5
+    assert output["invoice_number"] == "INV"
+    to_bbox_layout.assert_called_once_with("invoice.pdf")
+    to_text.assert_not_called()
+
+
+def test_areas_use_pdftotext_by_default(mocker: MockerFixture) -> None:
+    to_bbox_layout = mocker.patch.object(pdftotext, "to_bbox_layout")
+    to_text = mocker.patch.object(
+        pdftotext, "to_text", side_effect=["Total 12,50", "Invoice INV"]
+    )
+    output = _area_template().extract("Invoice INV ACME", "invoice.pdf", pdftotext)
+
+    assert output["amount"] == 12.5
+    assert output["invoice_number"] == "INV"
+    assert to_text.call_count == 2
+    to_bbox_layout.assert_not_called()
+
+
+@pytest.mark.skipif(not shutil.which("pdftotext"), reason="needs the pdftotext command")
+def test_area_layout_extracts_as_pdftotext(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(pdftotext, "poppler_available", lambda: False)
+    path = "tests/compare/NetpresseInvoice.pdf"
+    (template,) = (
+        t
+        for t in read_templates("src/invoice2data/extract/templates/fr")
+        if t["template_name"] == "fr.publicationannoncelegale.yml"
+    )
+    text = template.prepare_input(pdftotext.to_text(path))
+    expected = template.extract(text, path, pdftotext)
+    assert expected["date"]
+
+    options = dict(template.get("options", {}), area_layout=True)
+    area_layout = InvoiceTemplate(dict(template, options=options))
+    assert area_layout.extract(text, path, pdftotext) == expected
+
+
+def test_areas_without_layout_use_pdftotext(mocker: MockerFixture) -> None:
+    # python-poppler extracts the text, but the pdftotext command is missing
+    to_bbox_layout = mocker.patch.object(
+        pdftotext, "to_bbox_layout", side_effect=OSError("pdftotext not installed")
+    )
+    to_text = mocker.patch.object(
+        pdftotext, "to_text", side_effect=["Total 12,50", "Invoice INV"]
+    )
+    template = _area_template(area_layout=True)
+    output = template.extract("Invoice INV ACME", "invoice.pdf", pdftotext)
+
+    assert output["amount"] == 12.5
+    assert output["invoice_number"] == "INV"
+    to_bbox_layout.assert_called_once_with("invoice.pdf")
+    assert to_text.call_count == 2
@@ -0,0 +1,233 @@
+import glob
+import re
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from unittest import mock
+
+import pytest
+
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.loader import read_templates
+from invoice2data.extract.parsers import lines
+from invoice2data.extract.patterns import SearchMemo
+from invoice2data.extract.patterns import compile_pattern
+from invoice2data.extract.patterns import is_anchored
+from invoice2data.extract.patterns import iter_split
+from invoice2data.extract.patterns import prefix_groups
+from invoice2data.extract.patterns import search_from
+
+
+def _statement(blocks: int) -> str:
+    return "".join(
+        "Header\nItems %s\nitem A %s\nitem B %s\nTotal\nfooter\n" % (i, i, i * 2)
+        for i in range(blocks)
+    )
+
+
+def _sliced_blocks(start: str, end: str, content: str) -> List[str]:
+    """Former block search, slicing the content after each block."""
+    blocks = []
+    while True:
+        match = compile_pattern(start).search(content)
+        if not match:
+            return blocks
+        content = content[match.end() :]
+        match = compile_pattern(end).search(content)
+        if not match:
+            return blocks
+        blocks.append(content[0 : match.start()])
+        content = content[match.end() :]
+
+
+def _rule(start: str, end: str) -> Dict[str, Any]:
+    return {
+        **lines.DEFAULT_OPTIONS,
+        "start": start,
+        "end": end,
+        "line": r"item (?P<name>\w+) (?P<qty>\d+)",
+    }
+
+
+def test_blocks_match_sliced_search() -> None:
+    content = _statement(50)
+    for start, end in (
+        (r"Items \d+", "Total"),
+        (r"^Items \d+", "Total"),
+        (r"(?m)^Items \d+", r"(?m)^Total"),
+        (r"\bItems", r"(?<=\n)Total"),
+        (r"\AHeader", "Total"),
+        (r"Items [^\n]+", r"footer\n"),
+    ):
+        expected: List[Dict[str, Any]] = []
+        for block in _sliced_blocks(start, end, content):
+            expected += lines.parse_block(
+                {"template_name": "test"}, "lines", _rule(start, end), block
+            )
+        parsed = lines.parse_by_rule(
+            {"template_name": "test"}, "lines", _rule(start, end), content
+        )
+        assert parsed == expected, (start, end)
+
+
+def test_search_from() -> None:
+    assert search_from("b", "abab", 2) == (3, 4)
+    assert search_from("^a", "abab", 2) == (2, 3)
+    # As in a slice, the search position is a word boundary
+    assert search_from(r"\bb", "ab b", 1) == (1, 2)
+    assert search_from("c", "abab", 0) is None
+
+
+def test_iter_split_matches_split() -> None:
+    for pattern, string in (
+        (r"\n", "a\nb\n\nc\n"),
+        (r"(\n)", "a\nb\n"),
+        (r"(x)|(\n)", "axb\nc"),
+        (r"\s*", "a b"),
+        (r"\n", ""),
+    ):
+        assert list(iter_split(pattern, string)) == re.split(pattern, string)
+
+
+def test_iter_lines_is_lazy() -> None:
+    template = InvoiceTemplate(
+        [
+            ("template_name", "test"),
+            ("keywords", ["Header"]),
+            ("fields", {"lines": {"parser": "lines", **_rule("Items", "Total")}}),
+        ]
+    )
+    content = _statement(1000)
+    expected = lines.parse(template, "lines", template["fields"]["lines"], content)
+    assert len(expected) == 2000
+    assert list(template.iter_lines(content)) == expected
+
+    rows = template.iter_lines(content)
+    assert next(rows) == {"name": "A", "qty": "0"}
+    # Only the first block has been parsed
+    with mock.patch.object(lines, "iter_block", wraps=lines.iter_block) as block:
+        assert next(rows) == {"name": "B", "qty": "0"}
+        assert next(rows) == {"name": "A", "qty": "1"}
+    assert block.call_count == 1
+
+    with pytest.raises(KeyError):
+        template.iter_lines(content, "missing")
+
+
+def _sequential(
+    matcher: lines.LineMatcher, line: str, in_row: bool
+) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """Former classification, searching the patterns one after the other."""
+    for kind, pattern in matcher.patterns if in_row else matcher.first_patterns:
+        match = compile_pattern(pattern).search(line)
+        if match:
+            return kind, None if kind == lines.SKIP_LINE else match.groupdict()
+    return None, None
+
+
+def _lines_rules(templates: List[InvoiceTemplate]) -> Iterator[Dict[str, Any]]:
+    for template in templates:
+        fields = [v for v in template["fields"].values() if isinstance(v, dict)]
+        fields += [template["lines"]] if "lines" in template else []
+        for settings in fields:
+            if "line" in settings or "rules" in settings:
+                for rule in settings.get("rules") or [settings]:
+                    rule = dict(rule)
+                    if "first_line" not in rule and "last_line" not in rule:
+                        rule["first_line"] = rule["line"]
+                    yield rule
+
+
+def test_line_matcher_matches_sequential_search() -> None:
+    text_lines = [
+        line
+        for path in glob.glob("tests/custom/*.txt")
+        for line in Path(path).read_text(encoding="utf-8").splitlines()
+    ]
+    for rule in _lines_rules(read_templates("tests/custom/templates")):
+        matcher = lines.LineMatcher.for_settings(rule)
+        assert matcher.dispatcher is not None
+        for line in text_lines:
+            for in_row in (False, True):
+                assert matcher.classify(line, in_row) == _sequential(
+                    matcher, line, in_row
+                ), (rule, line)
+
+
+def test_line_matcher_combines_templates_rules() -> None:
+    rules = list(_lines_rules(read_templates()))
+    matchers = [lines.LineMatcher.for_settings(rule) for rule in rules]
+    assert sum(matcher.dispatcher is not None for matcher in matchers) > len(rules) / 2
+
+
+def test_line_matcher_precedence() -> None:
+    matcher = lines.LineMatcher(
+        (r"(?P<item>\d+) item",),
+        (r"(?P<desc>Total)",),
+        ("skip", "ignored"),
+        (r"(?P<desc>\w+)", r"(?P<desc>=)"),
+    )
+    assert matcher.dispatcher is not None
+    # The first line pattern wins even if another pattern matches earlier
+    kind, match = matcher.classify("Total skip 1 item", True)
+    assert kind == lines.FIRST_LINE and match and match["item"] == "1"
+    assert matcher.classify("1 item", False)[0] == lines.FIRST_LINE
+    assert matcher.classify("Total", False) == (None, None)
+    assert matcher.classify("skip Total", True)[0] == lines.LAST_LINE
+    assert matcher.classify("-- ignored --", True) == (lines.SKIP_LINE, None)
+    kind, match = matcher.classify("-- text --", True)
+    assert kind == lines.LINE and match and match["desc"] == "text"
+    assert matcher.classify("--", True) == (None, None)
+    kind, match = matcher.classify("-=-", True)
+    assert kind == lines.LINE and match and match["desc"] == "="
+
+    # Group references can't be combined, the patterns are searched in turn
+    assert lines.LineMatcher((), (), (), (r"(.)\1",)).dispatcher is None
+    assert prefix_groups(r"(?P<a>x)[(](y)\(", "_0_") == (
+        r"(?P<_0_a>x)[(](?:y)\(",
+        ["a"],
+    )
+    assert prefix_groups(r"(?i)x", "_0_") is None
+    assert is_anchored(r"^(a|b)c")
+    assert not is_anchored(r"^a|b")
+
+
+def test_rules_share_block_searches() -> None:
+    template = {"template_name": "test"}
+    content = _statement(30) + "Items 99\nitem C 1\n"
+    rules = [
+        _rule(r"Items \d+", "Total"),
+        dict(_rule(r"Items \d+", "Total"), line=r"item (?P<name>B) (?P<qty>\d+)"),
+        _rule("Header", r"footer\n"),
+        _rule(r"Items \d+", r"(?m)^Total"),
+        _rule(r"\bitem B", r"Items"),
+        _rule("Missing", "Total"),
+    ]
+    expected: List[Dict[str, Any]] = []
+    for rule in rules:
+        expected += lines.parse_by_rule(template, "lines", rule, content)
+    assert lines.parse(template, "lines", {"rules": rules}, content) == expected
+
+    # The blocks of the rules with the same start and end are searched once
+    calls = []
+    for shared_rules in (rules[:1], rules[:2]):
+        with mock.patch(
+            "invoice2data.extract.patterns.search_from", wraps=search_from
+        ) as search:
+            lines.parse(template, "lines", {"rules": shared_rules}, content)
+        calls.append(search.call_count)
+    assert calls[0] == calls[1] == 62
+
+
+def test_search_memo() -> None:
+    content = _statement(5)
+    memo = SearchMemo(content)
+    for pattern in ("Total", r"item \w", r"^Items", r"\bB", "Missing"):
+        for pos in (*range(0, len(content), 7), 20, 3, len(content)):
+            assert memo.search(pattern, content, pos) == search_from(
+                pattern, content, pos
+            ), (pattern, pos)
@@ -1,3 +1,4 @@
+import json
 import os
 import shutil
 import unittest
@@ -7,8 +8,12 @@ from typing import Generator
 import pytest
 
 from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.invoice_template import LazyInvoiceTemplate
+from invoice2data.extract.loader import TEMPLATE_CACHE_VERSION
 from invoice2data.extract.loader import ordered_load
 from invoice2data.extract.loader import read_templates
+from invoice2data.extract.loader import template_cache_path
+from invoice2data.extract.loader import template_languages
 
 
 @pytest.fixture
@@ -145,6 +150,76 @@ def test_template_bad_yaml_format_not_loaded(templatedirectory: Path) -> None:
     assert tpl == [], "Bad Yaml Template is loaded!"
 
 
+def test_template_cache_skips_parsing_unchanged_files(
+    templatedirectory: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    mocker: "pytest_mock.MockerFixture",  # type: ignore [name-defined] # noqa
+) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    yamlfile = templatedirectory / "specialchartemplate.yml"
+    yamlfile.write_text(template_with_single_special_char, encoding="utf-8")
+    cache_path = template_cache_path(str(templatedirectory))
+    assert cache_path.startswith(str(tmp_path / "invoice2data"))
+
+    templates = read_templates(str(templatedirectory), use_cache=True)
+    assert os.path.exists(cache_path)
+    # The cache is plain JSON, and nothing is written next to the templates
+    with open(cache_path, encoding="utf-8") as cache_file:
+        assert json.load(cache_file)["version"] == TEMPLATE_CACHE_VERSION
+    assert not list(templatedirectory.parent.glob(".*invoice2data-cache"))
+
+    yaml_load = mocker.patch("invoice2data.extract.loader.load")
+    cached_templates = read_templates(str(templatedirectory), use_cache=True)
+    yaml_load.assert_not_called()
+    assert cached_templates == templates
+
+    # A changed file is picked up and parsed again
+    mocker.stopall()
+    yamlfile.write_text(template_keyword_not_list, encoding="utf-8")
+    os.utime(yamlfile, ns=(0, 0))
+    templates = read_templates(str(templatedirectory), use_cache=True)
+    assert templates[0]["keywords"] == ["Basic Test"]
+    assert "fields" not in templates[0]
+
+
+def test_template_cache_skips_values_json_cannot_store(
+    templatedirectory: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    yamlfile = templatedirectory / "dated.yml"
+    yamlfile.write_text(
+        "issuer: Dated\nkeywords: [Dated]\nfields:\n  since: 2024-01-31\n",
+        encoding="utf-8",
+    )
+    templates = read_templates(str(templatedirectory), use_cache=True)
+    assert read_templates(str(templatedirectory), use_cache=True) == templates
+    # The template with a date is parsed again, there is nothing to cache
+    assert not os.path.exists(template_cache_path(str(templatedirectory)))
+
+
+def test_lazy_templates_are_loaded_on_first_use(templatedirectory: Path) -> None:
+    yamlfile = templatedirectory / "specialchartemplate.yml"
+    yamlfile.write_text(template_with_single_special_char, encoding="utf-8")
+
+    templates = read_templates(str(templatedirectory), lazy=True)
+    assert isinstance(templates[0], LazyInvoiceTemplate)
+    assert not templates[0]._materialized
+    assert templates[0].matches_input("Basic Test")
+    assert not templates[0]._materialized
+
+    assert templates[0]["fields"]["single_specialchar"]["value"] == "ä"
+    assert templates[0]._materialized
+    assert templates[0] == read_templates(str(templatedirectory))[0]
+
+
+
+def test_lazy_templates_languages_are_read_without_loading() -> None:
+    templates = read_templates(lazy=True)
+    assert template_languages(templates) == template_languages(read_templates())
+    assert not any(template._materialized for template in templates)
+
+
 template_with_missing_keywords = """
 fields:
   foo:
@@ -0,0 +1,107 @@
+import glob
+import random
+import re
+import unicodedata
+
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.loader import read_templates
+from invoice2data.extract.normalizer import NormalizationMemo
+from invoice2data.extract.normalizer import Normalizer
+
+
+def _reference(text: str, options: dict) -> str:
+    """Apply the options one after another, without merging any step."""
+    if options["remove_whitespace"]:
+        text = re.sub(" +", "", text)
+    if options["remove_accents"]:
+        text = re.sub("[\u0300-\u0362]", "", unicodedata.normalize("NFKD", text))
+    if options["lowercase"]:
+        text = text.lower()
+    for pattern, repl in options["replace"]:
+        text = re.sub(pattern, repl, text)
+    return text
+
+
+def _texts() -> list:
+    texts = []
+    for path in glob.glob("tests/**/*.txt"):
+        with open(path, encoding="utf-8") as text_file:
+            texts.append(text_file.read())
+    return [*texts, "", "  Éléphant  Çà  ÀB  ", "1'000,50 €  Net:  42"]
+
+
+def test_builtin_templates_match_reference() -> None:
+    texts = _texts()
+    for template in read_templates():
+        for text in texts:
+            assert template.prepare_input(text) == _reference(text, template.options)
+
+
+def test_merged_steps_match_reference() -> None:
+    rng = random.Random(0)  # noqa: S311
+    alphabet = "abAB é-.:,;'  \n\t0123"
+    literals = ["a", "b", "A", "é", "-", ".", ":", "ab", "Ba", "--", " :", "e"]
+    replacements = ["", "x", "a", "b", "-", "ab", "é", "B.", r"\1"]
+    for _ in range(500):
+        replace = []
+        for _ in range(rng.randint(0, 4)):
+            repl = rng.choice(replacements)
+            pattern = rng.choice(literals)
+            if repl == r"\1":
+                pattern = "(%s)" % pattern
+            replace.append([pattern, repl])
+        options = {
+            "remove_whitespace": rng.random() < 0.3,
+            "remove_accents": rng.random() < 0.3,
+            "lowercase": rng.random() < 0.3,
+            "replace": replace,
+        }
+        normalizer = Normalizer.for_options(options)
+        for _ in range(5):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            assert normalizer(text) == _reference(text, options), (options, text)
+
+
+def test_steps_use_cheapest_operation() -> None:
+    normalizer = Normalizer(
+        remove_whitespace=True,
+        replace=[["€", "EUR"], [".", ""], ["Net amount", "Sum"], ["(a)", r"\1"]],
+    )
+    assert [kind for kind, _ in normalizer.steps] == [
+        "literal",
+        "literal",
+        "regex",
+        "regex",
+        "regex",
+    ]
+
+
+def test_prepare_input_does_not_change_options() -> None:
+    template = InvoiceTemplate(
+        [
+            ("keywords", ["ACME"]),
+            ("template_name", "acme"),
+            ("options", {"replace": [["EUR", "€"]]}),
+        ]
+    )
+    assert template.options["replace"] == [["EUR", "€"]]
+    assert template.prepare_input("10 EUR") == "10 €"
+    assert template.options["replace"] == [["EUR", "€"]]
+
+
+def test_memo_shares_text_between_templates_with_same_options() -> None:
+    def template(name: str, options: dict) -> InvoiceTemplate:
+        return InvoiceTemplate(
+            [("keywords", [name]), ("template_name", name), ("options", options)]
+        )
+
+    first = template("first", {"lowercase": True, "currency": "EUR"})
+    second = template("second", {"lowercase": True, "decimal_separator": ","})
+    other = template("other", {"lowercase": True, "replace": [["a", "b"]]})
+    text = "Invoice " * 1000
+    memo = NormalizationMemo()
+
+    normalized = first.prepare_input(text, memo)
+    assert second.prepare_input(text, memo) is normalized
+    assert other.prepare_input(text, memo) == normalized.replace("a", "b")
+    assert (memo.hits, memo.misses) == (1, 2)
@@ -0,0 +1,139 @@
+import sys
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import List
+
+import pytest
+
+from invoice2data.extract.invoice_template import THOUSANDS_SEPARATORS_REGEX
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.numbers import REMOVED_CHARS
+from invoice2data.extract.numbers import NumberParser
+from invoice2data.extract.parsers import lines
+from invoice2data.extract.plugins import tables
+
+
+NUMBERS = [
+    "0",
+    "12",
+    "-3",
+    "1.5",
+    "1,5",
+    "1.234,56",
+    "1,234.56",
+    "1'234.56",
+    "1 234,56",
+    "1\u00a0234.56",
+    "1\u2009234,5",
+    "1\u3000234",
+    " 42 ",
+    "1e3",
+    "1.234.567",
+    "1,234,567",
+    "1\\2",
+    "abc",
+    "1..2",
+    "1,,2",
+]
+
+
+def _template(decimal_separator: Any) -> InvoiceTemplate:
+    return InvoiceTemplate(
+        [
+            ("template_name", "numbers"),
+            ("keywords", ["numbers"]),
+            ("options", {"decimal_separator": decimal_separator}),
+        ]
+    )
+
+
+def _outcome(function: Any, *args: Any) -> Any:
+    try:
+        return function(*args)
+    except (AssertionError, ValueError) as error:
+        return type(error), str(error)
+
+
+def test_removed_chars() -> None:
+    assert REMOVED_CHARS == "".join(
+        chr(code)
+        for code in range(sys.maxunicode + 1)
+        if THOUSANDS_SEPARATORS_REGEX.match(chr(code))
+    )
+
+
+@pytest.mark.parametrize("decimal_separator", [".", ",", "'", " ", "::"])
+def test_parse_column(decimal_separator: str) -> None:
+    template = _template(decimal_separator)
+    for value in NUMBERS:
+        expected = _outcome(template.parse_number, value)
+        found = _outcome(template.number_parser.parse_column, [value], "numbers")
+        assert found == ([expected] if isinstance(expected, float) else expected), value
+
+
+def test_coerce_column() -> None:
+    template = _template(",")
+    values = ["", "1.234,5", "2", "3,75"]
+    for target_type in ("int", "float"):
+        expected = [template.coerce_type(value, target_type) for value in values]
+        found = template.coerce_column(values, target_type)
+        assert found == expected
+        assert [type(value) for value in found] == [type(value) for value in expected]
+    dates = ["2024-01-31", "not a date", "31.01.2024"]
+    assert template.coerce_column(dates, "date") == [
+        template.coerce_type(value, "date") for value in dates
+    ]
+    with pytest.raises(AssertionError, match="Unknown type"):
+        template.coerce_column(["1"], "decimal")
+
+
+def test_parsers_shared() -> None:
+    assert NumberParser.for_options({"decimal_separator": ","}) is (
+        NumberParser.for_options({"decimal_separator": ","})
+    )
+    assert _template(",").number_parser is _template(",").number_parser
+
+
+def test_lines_batches(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(lines, "COERCE_BATCH_SIZE", 3)
+    template = _template(".")
+    settings = {
+        "start": "Items",
+        "end": "Total",
+        "line": r"(?P<name>\w+) (?P<qty>\d+)(?: (?P<price>[\d,.]+))?",
+        "types": {"qty": "int", "price": "float"},
+    }
+    content = "Items\n" + "".join(
+        "item%s %s%s\n" % (i, i, " 1,00%s.5" % i if i % 3 else "") for i in range(10)
+    )
+    content += "Total\n"
+    rows = lines.parse(template, "lines", settings, content)
+    expected: List[Dict[str, Any]] = [
+        {"name": "item%s" % i, "qty": i, "price": float("100%s.5" % i)}
+        if i % 3
+        else {"name": "item%s" % i, "qty": i, "price": 0.0}
+        for i in range(10)
+    ]
+    assert rows == expected
+
+
+def test_table_date_failure() -> None:
+    template = _template(".")
+    table = OrderedDict(
+        [
+            ("start", "Items"),
+            ("end", "Total"),
+            ("body", r"(?P<date>\S+) (?P<amount>\S+)"),
+            ("line_separator", r"\n"),
+            ("types", {}),
+        ]
+    )
+    body = "2024-01-31 1,000.5\nnot-a-date 2\n2024-02-01 oops\n"
+    assert tables._process_table_lines(template, table, body) is None
+
+    body = "2024-01-31 1,000.5\n2024-02-01 2\n"
+    columns = tables._process_table_lines(template, table, body)
+    assert columns is not None
+    assert list(columns["amount"]) == [1000.5, 2.0]
+    assert columns["date"][1] == template.parse_date("2024-02-01")
@@ -0,0 +1,79 @@
+import datetime
+import json
+from contextlib import closing
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import List
+from xml.etree import ElementTree
+
+from invoice2data.output import to_json
+from invoice2data.output import to_jsonl
+from invoice2data.output import to_xml
+
+
+def _invoices() -> List[Dict[str, Any]]:
+    return [
+        {
+            "issuer": "ACME & Co",
+            "amount": 12.5,
+            "date": datetime.datetime(2024, 1, 2),
+            "lines": [{"description": "Multi\nline", "qty": 2}],
+        },
+        {"issuer": "Ünïcode", "date": datetime.date(2024, 3, 4)},
+    ]
+
+
+def test_json_writer_matches_json_dump(tmp_path: Path) -> None:
+    path = str(tmp_path / "invoices.json")
+    with closing(to_json.open_writer(path, "%d/%m/%Y")) as writer:
+        for invoice in _invoices():
+            writer.write(invoice)
+            # Each invoice is flushed as soon as it is written
+            assert "issuer" in Path(path).read_text(encoding="utf-8")
+
+    expected = _invoices()
+    for invoice in expected:
+        for k, v in invoice.items():
+            invoice[k] = to_json.format_item(v, "%d/%m/%Y")
+    assert Path(path).read_text(encoding="utf-8") == json.dumps(
+        expected, indent=4, ensure_ascii=False
+    )
+
+
+def test_empty_outputs(tmp_path: Path) -> None:
+    to_json.write_to_file([], str(tmp_path / "invoices"))
+    to_xml.write_to_file([], str(tmp_path / "invoices"))
+    to_jsonl.write_to_file([], str(tmp_path / "invoices"))
+
+    assert (tmp_path / "invoices.json").read_text(encoding="utf-8") == "[]"
+    with open(tmp_path / "invoices.xml") as xml_file:
+        assert xml_file.read() == to_xml.prettify(ElementTree.Element("data"))
+    assert (tmp_path / "invoices.jsonl").read_text(encoding="utf-8") == ""
+
+
+def test_xml_writer_matches_prettify(tmp_path: Path) -> None:
+    to_xml.write_to_file(_invoices(), str(tmp_path / "invoices.xml"))
+
+    tag_data = ElementTree.Element("data")
+    for i, invoice in enumerate(_invoices()):
+        tag_item = ElementTree.SubElement(tag_data, "item")
+        tag_item.set("id", str(i + 1))
+        to_xml.dict_to_tags(tag_item, invoice, "%Y-%m-%d")
+    with open(tmp_path / "invoices.xml") as xml_file:
+        assert xml_file.read() == to_xml.prettify(tag_data)
+
+
+def test_jsonl_writer(tmp_path: Path) -> None:
+    to_jsonl.write_to_file(_invoices(), str(tmp_path / "invoices"))
+
+    lines = (tmp_path / "invoices.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {
+            "issuer": "ACME & Co",
+            "amount": 12.5,
+            "date": "2024-01-02",
+            "lines": [{"description": "Multi\nline", "qty": 2}],
+        },
+        {"issuer": "Ünïcode", "date": "2024-03-04"},
+    ]
@@ -0,0 +1,149 @@
+import glob
+import logging
+import re
+from typing import Any
+from typing import Dict
+from typing import Iterator
+
+import pytest
+
+from invoice2data.__main__ import extract_data
+from invoice2data.extract import patterns
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.loader import read_templates
+from invoice2data.extract.parsers import lines
+
+
+@pytest.fixture
+def regex_engine() -> Iterator[None]:
+    patterns.set_engine("regex")
+    try:
+        yield
+    finally:
+        patterns.set_engine("re")
+
+
+def _extract_custom() -> Dict[str, Any]:
+    templates = read_templates("tests/custom/templates")
+    return {
+        path: extract_data(path, templates)
+        for path in sorted(glob.glob("tests/custom/*.txt"))
+    }
+
+
+def test_engines_extract_the_same() -> None:
+    expected = _extract_custom()
+    assert all(expected.values())
+    patterns.set_engine("regex")
+    try:
+        assert _extract_custom() == expected
+    finally:
+        patterns.set_engine("re")
+
+
+def test_regex_engine(regex_engine: None) -> None:
+    assert patterns.get_engine() == "regex"
+    compiled = patterns.compile_pattern(r"(?P<code>\d+)-(\w)")
+    assert isinstance(compiled, patterns.ConcurrentPattern)
+    assert compiled.groupindex == {"code": 1}
+    assert compiled.search("ab 12-x", 3).groupdict() == {"code": "12"}
+    assert compiled.findall("1-a 2-b") == [("1", "a"), ("2", "b")]
+    assert compiled.sub("_", "1-a b") == "_ b"
+    assert list(patterns.iter_split(r"(-)", "a-b")) == ["a", "-", "b"]
+
+    # The matchers of the lines parser are kept by engine
+    settings = {"first_line": r"(?P<name>\w+)", "line": r"\d"}
+    matcher = lines.LineMatcher.for_settings(settings)
+    assert matcher.classify("item", False) == ("first_line", {"name": "item"})
+    patterns.set_engine("re")
+    assert lines.LineMatcher.for_settings(settings) is not matcher
+
+
+def test_regex_engine_errors(regex_engine: None) -> None:
+    with pytest.raises(re.error):
+        patterns.compile_pattern(r"(?P<name>\d+")
+
+
+def test_unknown_engine() -> None:
+    with pytest.raises(ValueError, match="Unknown regex engine"):
+        patterns.set_engine("pcre")
+    assert patterns.get_engine() == "re"
+
+
+def _slow_template(**options: Any) -> InvoiceTemplate:
+    return InvoiceTemplate(
+        [
+            ("issuer", "Slow"),
+            ("template_name", "slow"),
+            ("keywords", ["Invoice"]),
+            (
+                "fields",
+                {
+                    "invoice_number": r"Invoice\s+(\d+)",
+                    "total": {
+                        "parser": "regex",
+                        "regex": r"(.*,){12}Total",
+                        "regex_timeout": 0.05,
+                    },
+                    "lines": {
+                        "parser": "lines",
+                        "start": "Invoice",
+                        "end": "$",
+                        "line": r"(?P<text>(.*,){12}Total)",
+                    },
+                },
+            ),
+            ("options", options),
+            ("required_fields", ["invoice_number"]),
+        ]
+    )
+
+
+def test_regex_timeout(caplog: pytest.LogCaptureFixture) -> None:
+    content = "Invoice 42\n" + "," * 2000
+    template = _slow_template(regex_timeout=0.05)
+    with caplog.at_level(logging.WARNING):
+        output = template.extract(content, "slow.txt", None)
+    assert output["invoice_number"] == "42"
+    assert "total" not in output and "lines" not in output
+    for field in ("total", "lines"):
+        assert "Error in Template slow field %s: regex timed out" % field in caplog.text
+
+
+def test_default_regex_timeout() -> None:
+    assert patterns.get_timeout() is None
+    patterns.set_timeout(0.5)
+    try:
+        with patterns.match_timeout(0.05):
+            assert patterns.get_timeout() == 0.05
+            compiled = patterns.compile_pattern(r"(.*,){12}Total")
+            with pytest.raises(TimeoutError):
+                compiled.search("," * 2000)
+        assert patterns.get_timeout() == 0.5
+    finally:
+        patterns.set_timeout(None)
+    assert not isinstance(patterns.compile_pattern(r"\d"), patterns.ConcurrentPattern)
+
+
+
+def test_replace_patterns_are_not_timed() -> None:
+    patterns.set_timeout(0.05)
+    try:
+        template = InvoiceTemplate(
+            [
+                ("keywords", ["Slow"]),
+                ("template_name", "slow"),
+                ("options", {"replace": [[r"(.*,){12}Total", "x"]]}),
+            ]
+        )
+        assert template.prepare_input("," * 2000) == "," * 2000
+    finally:
+        patterns.set_timeout(None)
+
+
+@pytest.mark.parametrize("timeout", [0, -1, "1", True])
+def test_invalid_regex_timeout(timeout: Any) -> None:
+    with pytest.raises(ValueError, match="Error in Template slow field options"):
+        _slow_template(regex_timeout=timeout)
+    with pytest.raises(ValueError, match="Invalid regex timeout"):
+        patterns.set_timeout(timeout)
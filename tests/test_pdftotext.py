@@ -0,0 +1,43 @@
+import glob
+import shutil
+
+import pytest
+
+from invoice2data.input import pdftotext
+
+
+AREAS = [
+    None,
+    {"f": 1, "l": 1, "r": 300, "x": 0, "y": 0, "W": 1000, "H": 600},
+    # The area of fr.publicationannoncelegale.yml, for NetpresseInvoice.pdf
+    {"f": 1, "l": 1, "r": 100, "x": 0, "y": 155, "W": 825, "H": 170},
+    # A size of 0 extends the area to the page border
+    {"f": 1, "l": 2, "r": 72, "x": 50, "y": 100, "W": 0, "H": 0},
+]
+
+
+@pytest.mark.skipif(
+    not pdftotext.poppler_available() or not shutil.which("pdftotext"),
+    reason="needs python-poppler and the pdftotext command",
+)
+@pytest.mark.parametrize("path", sorted(glob.glob("tests/compare/*.pdf")))
+def test_in_process_text_matches_pdftotext_command(
+    monkeypatch: pytest.MonkeyPatch, path: str
+) -> None:
+    monkeypatch.delenv(pdftotext.BACKEND_VARIABLE, raising=False)
+    for area in AREAS:
+        command = pdftotext.to_text(path, dict(area) if area else None)
+        with monkeypatch.context() as patch:
+            patch.setenv(pdftotext.BACKEND_VARIABLE, "poppler")
+            in_process = pdftotext.to_text(path, dict(area) if area else None)
+        assert in_process == command, area
+
+
+def test_poppler_backend_is_opt_in(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(pdftotext, "poppler_available", lambda: True)
+    monkeypatch.delenv(pdftotext.BACKEND_VARIABLE, raising=False)
+    assert pdftotext.backend() == "pdftotext"
+    monkeypatch.setenv(pdftotext.BACKEND_VARIABLE, "poppler")
+    assert pdftotext.backend() == "poppler"
+    monkeypatch.setattr(pdftotext, "poppler_available", lambda: False)
+    assert pdftotext.backend() == "pdftotext"
@@ -0,0 +1,105 @@
+import sqlite3
+import types
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from invoice2data import extract_data
+from invoice2data.extract.loader import read_templates
+from invoice2data.input import pdftotext
+from invoice2data.input import text
+from invoice2data.input.cache import TextCache
+
+
+def test_text_is_extracted_once_per_file_content(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    invoice = tmp_path / "invoice.txt"
+    invoice.write_text("Invoice 1", encoding="utf-8")
+    to_text = mocker.spy(text, "to_text")
+    text_cache = TextCache(str(tmp_path / "cache"))
+
+    assert text_cache.to_text(text, str(invoice)) == "Invoice 1"
+    assert text_cache.to_text(text, str(invoice)) == "Invoice 1"
+    assert to_text.call_count == 1
+
+    # A new cache on the same folder reads the stored text
+    text_cache.close()
+    text_cache = TextCache(str(tmp_path / "cache"))
+    assert text_cache.to_text(text, str(invoice)) == "Invoice 1"
+    assert to_text.call_count == 1
+
+    invoice.write_text("Invoice 22", encoding="utf-8")
+    assert text_cache.to_text(text, str(invoice)) == "Invoice 22"
+    assert to_text.call_count == 2
+    assert (text_cache.hits, text_cache.misses) == (1, 1)
+    text_cache.close()
+
+
+def test_least_recently_used_texts_are_evicted(tmp_path: Path) -> None:
+    text_cache = TextCache(str(tmp_path), max_size=25)
+    for key in ("a", "b", "c"):
+        text_cache.put(key, "0123456789")
+        assert text_cache.get("a") is not None
+
+    assert text_cache.get("a") is not None
+    assert text_cache.get("b") is None
+    assert text_cache.get("c") is not None
+    text_cache.put("c", "0123")
+    text_cache.close()
+
+    # The size of the texts is kept with them, the least recently used are indexed
+    connection = sqlite3.connect(text_cache.path)
+    assert connection.execute("SELECT size FROM totals").fetchone() == (14,)
+    assert connection.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    plan = connection.execute(
+        "EXPLAIN QUERY PLAN SELECT key, size FROM texts ORDER BY used"
+    ).fetchall()
+    assert "texts_used" in str(plan)
+    connection.close()
+
+
+def test_key_depends_on_backend(tmp_path: Path, mocker: MockerFixture) -> None:
+    invoice = tmp_path / "invoice.pdf"
+    invoice.write_bytes(b"%PDF")
+    text_cache = TextCache(str(tmp_path / "cache"))
+    mocker.patch.object(pdftotext, "backend", return_value="poppler")
+    in_process = text_cache.key(pdftotext, str(invoice))
+    mocker.patch.object(pdftotext, "backend", return_value="pdftotext")
+    assert text_cache.key(pdftotext, str(invoice)) != in_process
+
+    # Input modules without backends are keyed by their name
+    reader = types.SimpleNamespace(__name__="reader")
+    assert text_cache.key(reader, str(invoice)) == text_cache.key(reader, str(invoice))
+    text_cache.close()
+
+
+def test_extract_data_uses_text_cache(tmp_path: Path, mocker: MockerFixture) -> None:
+    templates = read_templates("tests/custom/templates")
+    text_cache = TextCache(str(tmp_path))
+    to_text = mocker.spy(text, "to_text")
+
+    for _ in range(2):
+        result = extract_data(
+            "tests/custom/basic.txt", templates, text, text_cache=text_cache
+        )
+        assert result["issuer"] == "Basic Test"
+    assert to_text.call_count == 1
+    assert (text_cache.hits, text_cache.misses) == (1, 1)
+    text_cache.close()
+
+
+def test_hits_are_counted_by_threads(tmp_path: Path) -> None:
+    invoice = tmp_path / "invoice.txt"
+    invoice.write_text("Invoice 1", encoding="utf-8")
+    text_cache = TextCache(str(tmp_path / "cache"))
+    text_cache.to_text(text, str(invoice))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        texts = list(
+            executor.map(lambda _: text_cache.to_text(text, str(invoice)), range(200))
+        )
+    assert texts == ["Invoice 1"] * 200
+    assert (text_cache.hits, text_cache.misses) == (200, 1)
+    text_cache.close()
@@ -0,0 +1,94 @@
+import copy
+import glob
+import pickle
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Dict
+from typing import Iterator
+
+import pytest
+
+from invoice2data.__main__ import extract_data
+from invoice2data.extract import patterns
+from invoice2data.extract.frozen import FrozenDict
+from invoice2data.extract.frozen import FrozenList
+from invoice2data.extract.invoice_template import InvoiceTemplate
+from invoice2data.extract.loader import read_templates
+
+
+@pytest.fixture
+def switch_often() -> Iterator[None]:
+    """Switch threads often, for the threads to interleave in each extraction."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        yield
+    finally:
+        sys.setswitchinterval(interval)
+
+
+@pytest.mark.parametrize("engine", ["re", "regex"])
+def test_extract_data_from_threads(switch_often: None, engine: str) -> None:
+    patterns.set_engine(engine)
+    try:
+        _extract_from_threads()
+    finally:
+        patterns.set_engine("re")
+
+
+def _extract_from_threads() -> None:
+    templates = read_templates("tests/custom/templates") + read_templates()
+    before = pickle.dumps(templates)
+    paths = sorted(glob.glob("tests/custom/*.txt"))
+    expected: Dict[str, Any] = {path: extract_data(path, templates) for path in paths}
+    assert all(expected.values())
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda path: (path, extract_data(path, templates)), paths * 20)
+        )
+
+    for path, result in results:
+        assert result == expected[path], path
+    # The templates shared by the threads are left unchanged
+    assert pickle.dumps(templates) == before
+
+
+def test_templates_are_frozen() -> None:
+    template = read_templates("tests/custom/templates")[0]
+    assert template.frozen
+    with pytest.raises(TypeError, match="can't be changed"):
+        template["priority"] = 1
+    with pytest.raises(TypeError, match="can't be changed"):
+        template.pop("keywords")
+    with pytest.raises(TypeError, match="can't be changed"):
+        template.update(priority=1)
+    assert isinstance(template["keywords"], FrozenList)
+    with pytest.raises(TypeError):
+        template["keywords"].append("Other")
+    assert isinstance(template["fields"], FrozenDict)
+    with pytest.raises(TypeError):
+        template["fields"]["other"] = "Other (\\d+)"
+    with pytest.raises(TypeError):
+        template.options["currency"] = "USD"
+
+    # Frozen templates are copied, pickled and compared like dicts
+    assert copy.deepcopy(template) == template
+    assert pickle.loads(pickle.dumps(template)) == template  # noqa: S301
+    assert dict(template["fields"]) == template["fields"]
+
+
+def test_template_source_is_copied() -> None:
+    fields = {"amount": {"parser": "regex", "regex": r"Total (\d+)"}}
+    template = InvoiceTemplate(
+        [
+            ("issuer", "Copied"),
+            ("template_name", "copied"),
+            ("keywords", ["Copied"]),
+            ("fields", fields),
+        ]
+    )
+    # The dicts the template is built from can still be changed
+    fields["amount"]["regex"] = r"Sum (\d+)"
+    assert template["fields"]["amount"]["regex"] == r"Total (\d+)"